@@ -0,0 +1,66 @@
+"""
+Mede o tempo de inicialização de um processo que só analisa/converte consultas.
+
+Cada cenário roda em um interpretador novo (várias repetições, mediana) e
+o tempo do interpretador vazio é descontado. Também confere que networkx,
+numpy e o driver do MySQL não são carregados no caminho sem interface.
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/bench_import.py [--runs 15]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = [
+    ("interpretador vazio", "pass"),
+    ("import conversor", "import conversor"),
+    ("import conversor, query_processor", "import conversor, query_processor"),
+    ("converter uma consulta",
+     "from conversor import RelationalAlgebraConverter\n"
+     "RelationalAlgebraConverter().convert_to_optimized_tree("
+     "\"SELECT c.nome FROM cliente c INNER JOIN pedidos p ON c.id = p.cliente_id WHERE p.valor > 5\")"),
+    ("import grafo (networkx + numpy)", "import grafo"),
+]
+
+HEAVY_MODULES = ('networkx', 'numpy', 'mysql', 'matplotlib')
+
+
+def _time_run(code, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def _loaded_heavy_modules(code):
+    probe = code + "\nimport sys\nprint(','.join(m for m in %r if m in sys.modules))" % (HEAVY_MODULES,)
+    out = subprocess.run([sys.executable, '-c', probe], cwd=ROOT, check=True,
+                         capture_output=True, text=True).stdout.strip().splitlines()
+    return out[-1] if out else ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=15)
+    args = parser.parse_args()
+
+    baseline = None
+    print(f"{'Cenário':<36} {'mediana':>9} {'acima do vazio':>15}  módulos pesados")
+    for name, code in SCENARIOS:
+        seconds = _time_run(code, args.runs)
+        if baseline is None:
+            baseline = seconds
+        heavy = _loaded_heavy_modules(code) or '-'
+        print(f"{name:<36} {seconds * 1000:7.1f}ms {(seconds - baseline) * 1000:13.1f}ms  {heavy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Mede o tempo de otimização de junções em cadeia e em estrela com N tabelas,
+pela programação dinâmica (DPccp) e pela heurística gulosa.
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/bench_join_order.py [--max-tables 12] [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversor import RelationalAlgebraConverter  # noqa: E402
+from optimizer import QueryOptimizer  # noqa: E402
+
+
+def chain_query(n):
+    joins = ''.join(f" INNER JOIN t{i} ON t{i - 1}.id = t{i}.ref_id" for i in range(1, n))
+    return f"SELECT t0.id FROM t0{joins} WHERE t0.x > 10"
+
+
+def star_query(n):
+    joins = ''.join(f" INNER JOIN d{i} ON f.d{i}_id = d{i}.id" for i in range(1, n))
+    return f"SELECT f.id FROM fato f{joins} WHERE d1.nome = 'x'"
+
+
+def _time_optimize(tree, max_dp_relations, runs):
+    samples = []
+    for _ in range(runs):
+        optimizer = QueryOptimizer(max_dp_relations=max_dp_relations)
+        start = time.perf_counter()
+        optimizer.optimize_tree(tree)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--max-tables', type=int, default=12)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    converter = RelationalAlgebraConverter()
+    print(f"{'Forma':<8} {'tabelas':>7} {'DPccp':>10} {'gulosa':>10}")
+    for name, build in (('cadeia', chain_query), ('estrela', star_query)):
+        for n in range(2, args.max_tables + 1, 2):
+            tree = converter.convert_to_tree(build(n))
+            dp = _time_optimize(tree, n, args.runs)
+            greedy = _time_optimize(tree, 1, args.runs)
+            print(f"{name:<8} {n:>7} {dp * 1000:8.2f}ms {greedy * 1000:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
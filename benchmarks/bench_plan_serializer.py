@@ -0,0 +1,68 @@
+"""
+Compara o aquecimento do cache de planos a partir do disco com refazer
+parsing + otimização das mesmas consultas.
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/bench_plan_serializer.py [--shapes 2000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversor import RelationalAlgebraConverter  # noqa: E402
+
+
+def _workload(shapes):
+    """Gera consultas com formas distintas (colunas e filtros variam)."""
+    queries = []
+    for i in range(shapes):
+        queries.append(
+            f"SELECT c.nome, p.valor_{i % 50} FROM cliente c "
+            f"INNER JOIN pedidos p ON c.id = p.cliente_id "
+            f"INNER JOIN produto pr ON p.produto_id = pr.id "
+            f"WHERE p.valor > 100 AND pr.categoria_{i} = 'x' AND (c.uf = 'SP' OR c.uf = 'RJ')"
+        )
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--shapes', type=int, default=2000)
+    args = parser.parse_args()
+    queries = _workload(args.shapes)
+
+    cold = RelationalAlgebraConverter(cache_size=args.shapes)
+    start = time.perf_counter()
+    for query in queries:
+        cold.convert_to_optimized_tree(query)
+    optimize_seconds = time.perf_counter() - start
+
+    fd, path = tempfile.mkstemp(suffix='.plans')
+    os.close(fd)
+    try:
+        start = time.perf_counter()
+        cold.save_plan_cache(path)
+        save_seconds = time.perf_counter() - start
+        size = os.path.getsize(path)
+
+        warm = RelationalAlgebraConverter(cache_size=args.shapes)
+        start = time.perf_counter()
+        warm.load_plan_cache(path)
+        load_seconds = time.perf_counter() - start
+    finally:
+        os.remove(path)
+
+    print(f"Formas distintas:             {args.shapes}")
+    print(f"Parsing + otimização:         {optimize_seconds * 1000:8.1f} ms")
+    print(f"Gravação do cache:            {save_seconds * 1000:8.1f} ms ({size / 1024:.1f} KiB, "
+          f"{size / args.shapes:.0f} bytes/plano)")
+    print(f"Carga do cache:               {load_seconds * 1000:8.1f} ms "
+          f"({optimize_seconds / load_seconds:.1f}x mais rápido)")
+
+
+if __name__ == "__main__":
+    main()
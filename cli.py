@@ -0,0 +1,303 @@
+"""
+Processamento de workloads SQL pela linha de comando (sem interface gráfica).
+
+Lê consultas de um arquivo .sql (comandos separados por ';') ou de um
+general query log do MySQL, em streaming, e grava um registro JSONL por
+consulta com o resultado da validação, a expressão em álgebra relacional, a
+árvore otimizada e o log do otimizador. O uso de memória não depende do
+tamanho do arquivo: a entrada é lida linha a linha, os resultados são
+gravados assim que ficam prontos e o cache de planos é limitado.
+
+Uso:
+    python cli.py consultas.sql -o planos.jsonl
+    python cli.py mysql-general.log --format general-log --workers 4
+    cat consultas.sql | python cli.py - > planos.jsonl
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from itertools import chain
+
+from conversor import RelationalAlgebraConverter
+
+
+# =============================================================================
+# Leitura de comandos
+# =============================================================================
+
+# Fora de literais/comentários, só estes trechos mudam o estado do separador
+_SPECIAL_RE = re.compile(r"[;'\"`]|--|/\*")
+
+
+class StatementSplitter:
+    """
+    Separa comandos SQL por ';' recebendo o texto aos pedaços (linhas).
+
+    Pontos e vírgulas dentro de literais ('...', "..."), identificadores
+    entre crases e comentários (-- e /* */) não encerram o comando. Aspas
+    duplicadas ('') e barras invertidas (\\') são tratadas como escape dentro
+    dos literais. Comentários são descartados do texto do comando.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._quote = None
+        self._in_block_comment = False
+
+    def feed(self, text):
+        """
+        Processa mais um pedaço de texto.
+
+        Returns:
+            list: Comandos completos encontrados (sem o ';' final)
+        """
+        statements = []
+        pos = 0
+        length = len(text)
+        while pos < length:
+            if self._in_block_comment:
+                end = text.find('*/', pos)
+                if end < 0:
+                    return statements
+                self._in_block_comment = False
+                pos = end + 2
+            elif self._quote:
+                pos = self._consume_quoted(text, pos)
+            else:
+                m = _SPECIAL_RE.search(text, pos)
+                if not m:
+                    self._parts.append(text[pos:])
+                    break
+                self._parts.append(text[pos:m.start()])
+                token = m.group()
+                pos = m.end()
+                if token == ';':
+                    statement = self._flush()
+                    if statement:
+                        statements.append(statement)
+                elif token == '--':
+                    newline = text.find('\n', pos)
+                    pos = length if newline < 0 else newline
+                elif token == '/*':
+                    self._in_block_comment = True
+                    self._parts.append(' ')
+                else:
+                    self._quote = token
+                    self._parts.append(token)
+        return statements
+
+    def _consume_quoted(self, text, pos):
+        quote = self._quote
+        length = len(text)
+        start = pos
+        while pos < length:
+            char = text[pos]
+            if char == '\\' and quote != '`':
+                pos += 2
+                continue
+            if char == quote:
+                if pos + 1 < length and text[pos + 1] == quote:
+                    pos += 2
+                    continue
+                self._quote = None
+                pos += 1
+                break
+            pos += 1
+        self._parts.append(text[start:pos])
+        return pos
+
+    def _flush(self):
+        statement = ''.join(self._parts).strip()
+        self._parts = []
+        return statement
+
+    def finish(self):
+        """Retorna o último comando (sem ';' final), se houver."""
+        self._quote = None
+        self._in_block_comment = False
+        return self._flush() or None
+
+
+def iter_sql_statements(lines):
+    """
+    Gera os comandos de um script SQL lido linha a linha.
+
+    Args:
+        lines: Iterável de linhas (por exemplo, um arquivo aberto)
+
+    Yields:
+        str: Cada comando, sem o ';' final
+    """
+    splitter = StatementSplitter()
+    for line in lines:
+        yield from splitter.feed(line)
+    last = splitter.finish()
+    if last:
+        yield last
+
+
+# Linha de evento do general log:
+#   2024-05-20T10:00:00.123456Z\t   12 Query\tSELECT ...   (MySQL 5.7+)
+#   240520 10:00:00\t   12 Query\tSELECT ...             (formato antigo)
+#   \t\t   12 Query\tSELECT ...                          (mesmo instante do anterior)
+_LOG_EVENT_RE = re.compile(r"^[^\t]*\t\s*(\d+)\s+([A-Za-z][A-Za-z ]*?)\t(.*)$")
+_LOG_QUERY_COMMANDS = ('Query', 'Execute')
+
+
+def iter_general_log(lines):
+    """
+    Gera as consultas de um general query log do MySQL.
+
+    Apenas eventos 'Query'/'Execute' são considerados; linhas que não
+    começam um evento são a continuação de uma consulta com várias linhas.
+
+    Args:
+        lines: Iterável de linhas do log
+
+    Yields:
+        str: Texto de cada consulta registrada
+    """
+    current = None
+    for line in lines:
+        m = _LOG_EVENT_RE.match(line.rstrip('\r\n'))
+        if m:
+            if current is not None:
+                yield from _statements_in_event(current)
+            current = [m.group(3)] if m.group(2) in _LOG_QUERY_COMMANDS else None
+        elif current is not None:
+            current.append(line.rstrip('\r\n'))
+    if current is not None:
+        yield from _statements_in_event(current)
+
+
+def _statements_in_event(parts):
+    # Um evento pode conter vários comandos (multi-statements)
+    return iter_sql_statements(['\n'.join(parts)])
+
+
+def _detect_format(first_line):
+    if 'mysqld' in first_line and 'Version' in first_line:
+        return 'general-log'
+    if _LOG_EVENT_RE.match(first_line.rstrip('\r\n')):
+        return 'general-log'
+    return 'sql'
+
+
+def read_statements(stream, input_format='auto'):
+    """
+    Gera os comandos de um fluxo de texto no formato indicado.
+
+    Args:
+        stream: Arquivo/fluxo de texto aberto
+        input_format: 'sql', 'general-log' ou 'auto' (detecta pela primeira linha)
+
+    Yields:
+        str: Cada consulta encontrada
+    """
+    lines = iter(stream)
+    if input_format == 'auto':
+        first_line = next(lines, '')
+        input_format = _detect_format(first_line)
+        lines = chain([first_line], lines)
+    reader = iter_general_log if input_format == 'general-log' else iter_sql_statements
+    return reader(lines)
+
+
+# =============================================================================
+# Saída
+# =============================================================================
+
+def result_to_record(index, result):
+    """Converte o resultado de process_query em um dicionário serializável em JSON."""
+    optimized = result['optimized_tree']
+    return {
+        'index': index,
+        'query': result['query'],
+        'valid': result['valid'],
+        'error': result['error'],
+        'algebra': result['algebra'],
+        'optimized_tree': optimized.to_tuple() if optimized is not None else None,
+        'optimization_log': result['optimization_log'],
+    }
+
+
+def run(statements, output, optimize=True, workers=1, chunk_size=256, cache_size=128):
+    """
+    Processa os comandos e grava um registro JSONL por comando.
+
+    Returns:
+        dict: {'queries', 'valid', 'invalid', 'seconds', 'queries_per_second',
+               'metrics'}; 'metrics' traz os tempos e contadores por etapa
+              somados de todas as consultas (Metrics.to_dict())
+    """
+    converter = RelationalAlgebraConverter(cache_size=cache_size)
+    start = time.perf_counter()
+    total = valid = 0
+    results = converter.iter_many(statements, optimize=optimize, workers=workers,
+                                  chunk_size=chunk_size)
+    for index, result in enumerate(results):
+        output.write(json.dumps(result_to_record(index, result), ensure_ascii=False))
+        output.write('\n')
+        total += 1
+        valid += result['valid']
+    elapsed = time.perf_counter() - start
+    return {
+        'queries': total,
+        'valid': valid,
+        'invalid': total - valid,
+        'seconds': elapsed,
+        'queries_per_second': total / elapsed if elapsed > 0 else 0.0,
+        'metrics': converter.metrics.to_dict(),
+    }
+
+
+def _build_arg_parser():
+    parser = argparse.ArgumentParser(
+        description="Converte e otimiza consultas SQL de um arquivo, gerando JSONL.")
+    parser.add_argument('input', help="Arquivo .sql ou general log do MySQL ('-' para stdin)")
+    parser.add_argument('-o', '--output', default='-', help="Arquivo JSONL de saída (padrão: stdout)")
+    parser.add_argument('--format', choices=('auto', 'sql', 'general-log'), default='auto',
+                        help="Formato da entrada (padrão: detectar)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Processos usados na conversão (padrão: 1)")
+    parser.add_argument('--chunk-size', type=int, default=256,
+                        help="Consultas por tarefa enviada a cada processo")
+    parser.add_argument('--cache-size', type=int, default=128,
+                        help="Tamanho do cache de planos")
+    parser.add_argument('--no-optimize', action='store_true',
+                        help="Apenas valida e converte, sem otimizar")
+    parser.add_argument('--metrics-json', metavar='ARQUIVO',
+                        help="Grava em JSON o tempo e os contadores por etapa do pipeline")
+    return parser
+
+
+def main(argv=None):
+    args = _build_arg_parser().parse_args(argv)
+
+    source = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8', errors='replace')
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        report = run(read_statements(source, args.format), output,
+                     optimize=not args.no_optimize, workers=args.workers,
+                     chunk_size=args.chunk_size, cache_size=args.cache_size)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+    if args.metrics_json:
+        with open(args.metrics_json, 'w', encoding='utf-8') as f:
+            json.dump(report['metrics'], f, ensure_ascii=False, indent=2)
+
+    print(f"Consultas processadas: {report['queries']} "
+          f"({report['valid']} válidas, {report['invalid']} inválidas) "
+          f"em {report['seconds']:.2f}s — {report['queries_per_second']:.1f} consultas/s",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
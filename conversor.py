@@ -1,7 +1,15 @@
-import re
-import networkx as nx
-import numpy as np
+import os
+from collections import deque
+from itertools import islice
+
 from optimizer import QueryOptimizer
+from cost_model import CostModel
+from physical_plan import build_physical_plan
+from sql_parser import Parser, SQLSyntaxError
+from plan_cache import PlanCache, fingerprint_sql, bind_text, bind_tree
+from plan_nodes import Scan, Rename, Select, Project, Join
+from plan_serializer import dump_cache_entries, load_cache_entries
+from instrumentation import Metrics
 
 class RelationalAlgebraConverter:
     """
@@ -9,353 +17,357 @@ class RelationalAlgebraConverter:
     Suporta otimização através da classe QueryOptimizer.
     """
     
-    def __init__(self):
+    def __init__(self, cache_size=128, catalog=None, schema=None):
         self.node_counter = 0
-        self.optimizer = QueryOptimizer()
+        self.catalog = catalog
+        self.schema = schema
+        self.optimizer = QueryOptimizer(catalog, schema=schema)
+        self.plan_cache = PlanCache(cache_size)
+        # Medidas por etapa somadas de todas as requisições (ver instrumentation)
+        self.metrics = Metrics()
+    
+    def set_statistics(self, catalog):
+        """
+        Troca o catálogo de estatísticas do otimizador.
+        
+        Os planos em cache foram otimizados com as estimativas antigas e são
+        descartados.
+        
+        Args:
+            catalog: StatisticsCatalog (None = valores padrão)
+        """
+        self.catalog = catalog
+        self.optimizer.set_statistics(catalog)
+        self.plan_cache.clear()
+    
+    def set_schema(self, schema):
+        """
+        Troca o esquema usado para atribuir colunas sem qualificador às
+        tabelas (projeções intermediárias) e para estimar a largura das
+        colunas. Os planos em cache são descartados.
+        
+        Args:
+            schema: {tabela: [coluna ou (coluna, tipo)]}, como em db.get_schema (None = desconhecido)
+        """
+        self.schema = schema
+        self.optimizer.set_schema(schema)
+        self.plan_cache.clear()
     
     def _get_unique_id(self):
         """Gera um ID único para cada nó do grafo."""
         self.node_counter += 1
         return f"node{self.node_counter}"
     
-    def _parse_from_clause(self, from_str):
+    def _build_tree(self, statement):
         """
-        Analisa a cláusula FROM para extrair tabelas e JOINs.
+        Constrói a árvore de álgebra relacional a partir da AST.
         
         Args:
-            from_str: String da cláusula FROM
+            statement: SelectStatement produzido pelo parser
             
         Returns:
-            tuple: (base_table_info, joins_list)
+            PlanNode: Raiz da árvore de álgebra relacional
         """
-        # Pattern para detectar INNER JOINs
-        join_pattern = re.compile(
-            r"\s+(?:(?P<join_type>INNER|LEFT|RIGHT|FULL|CROSS)\s+)?JOIN\s+"
-            r"(?P<join_table>\w+)(?:\s+(?:AS\s+)?(?P<join_alias>\w+))?\s+ON\s+"
-            r"(?P<join_on>.*?)(?=\s+(?:(?:INNER|LEFT|RIGHT|FULL|CROSS)\s+)?JOIN|$)",
-            re.IGNORECASE | re.DOTALL
-        )
-        
-        # Extrair tabela base
-        base_table_match = re.match(
-            r"^(?P<table>\w+)(?:\s+(?:AS\s+)?(?P<alias>"
-            r"(?!SELECT\b)(?!FROM\b)(?!WHERE\b)(?!JOIN\b)(?!INNER\b)"
-            r"(?!LEFT\b)(?!RIGHT\b)(?!FULL\b)(?!CROSS\b)\w+))?",
-            from_str,
-            re.IGNORECASE
-        )
+        base = statement.table
         
-        if not base_table_match:
-            return None, []
+        # Construir árvore começando pela tabela base
+        tree = Scan(base.name)
+        if base.alias:
+            tree = Rename(base.alias, tree)
         
-        base_table_info = base_table_match.groupdict()
-        remaining_from_clause = from_str[base_table_match.end():]
+        # Adicionar JOINs à árvore
+        for join in statement.joins:
+            right_node = Scan(join.table.name)
+            if join.table.alias:
+                right_node = Rename(join.table.alias, right_node)
+            tree = Join(join.condition, tree, right_node)
         
-        # Extrair todos os JOINs compatíveis
-        joins = [m.groupdict() for m in join_pattern.finditer(remaining_from_clause)]
+        # Adicionar cláusula WHERE (seleção)
+        if statement.where is not None:
+            tree = Select(statement.where, tree)
         
-        return base_table_info, joins
+        # Adicionar projeção (SELECT)
+        tree = Project(statement.columns, tree)
+        return tree
     
-    def _parse_sql(self, query):
+    def _get_plan(self, sql_query, optimize=False, metrics=None):
         """
-        Faz o parsing da consulta SQL.
+        Obtém o plano da consulta, consultando primeiro o cache LRU.
+        
+        O cache é indexado pela forma da consulta (literais trocados por
+        marcadores `$n`), então consultas que diferem apenas nas constantes
+        compartilham o mesmo parsing e a mesma otimização. Os literais da
+        consulta atual são ligados às árvores memorizadas antes do retorno.
         
         Args:
-            query: String contendo a consulta SQL
+            sql_query: Consulta SQL
+            optimize: Se True, garante que a árvore otimizada esteja na entrada
+            metrics: Metrics da requisição (None = mede e soma direto no agregado)
             
         Returns:
-            dict: Dicionário com as partes da consulta (columns, from_clause, where)
+            dict: {'parsed', 'literals', 'algebra', 'tree', 'optimized_tree',
+                  'optimization_log'}, ou None se a sintaxe for inválida.
+                  'parsed' é a AST da forma canônica (com nós Parameter).
         """
-        query = query.strip().rstrip(';')
-        
-        # Pattern para capturar SELECT, FROM e WHERE
-        pattern = re.compile(
-            r"SELECT\s+(?P<columns>.*?)\s+"
-            r"FROM\s+(?P<from_clause>.*?)"
-            r"(?:\s+WHERE\s+(?P<where>.*?))?$",
-            re.IGNORECASE | re.DOTALL
-        )
-        
-        match = pattern.match(query)
-        if not match:
-            return None
-        
-        parts = match.groupdict()
+        own_metrics = metrics is None
+        if own_metrics:
+            metrics = Metrics()
+        try:
+            entry, literals = self._get_entry(sql_query, metrics)
+            if entry is None:
+                return None
+            
+            if optimize and entry['optimized_tree'] is None:
+                with metrics.stage('optimize') as stage:
+                    entry['optimized_tree'] = self.optimizer.optimize_tree(entry['tree'])
+                    entry['optimization_log'] = list(self.optimizer.optimization_log)
+                    stage.nodes = entry['optimized_tree'].node_count()
+                for firing in self.optimizer.get_rule_trace():
+                    metrics.add(f"rule:{firing.rule}", firing.elapsed, nodes=firing.nodes_after)
+            
+            with metrics.stage('bind') as stage:
+                plan = {
+                    'parsed': entry['parsed'],
+                    'literals': literals,
+                    'algebra': bind_text(entry['algebra'], literals),
+                    'tree': bind_tree(entry['tree'], literals),
+                    'optimized_tree': None,
+                    'optimization_log': None,
+                }
+                stage.regex = 1
+                if optimize:
+                    plan['optimized_tree'] = bind_tree(entry['optimized_tree'], literals)
+                    plan['optimization_log'] = [bind_text(line, literals) for line in entry['optimization_log']]
+                    stage.regex += len(plan['optimization_log'])
+            
+            if optimize and literals:
+                # O plano em cache é genérico ($n); só com os valores da consulta
+                # dá para avaliar constantes, redundâncias e contradições
+                with metrics.stage('simplify') as stage:
+                    tree, notes = self.optimizer.simplify_predicates(plan['optimized_tree'])
+                    stage.nodes = tree.node_count()
+                if notes:
+                    plan['optimized_tree'] = tree
+                    plan['optimization_log'] = (plan['optimization_log'][:-1]
+                                                + ["\n[LITERAIS] Simplificação com os valores da consulta:"]
+                                                + notes + plan['optimization_log'][-1:])
+            if optimize:
+                # Restaura o log da otimização memorizada, já com os literais atuais
+                self.optimizer.optimization_log = list(plan['optimization_log'])
+            
+            return plan
+        finally:
+            if own_metrics:
+                self.metrics.merge(metrics)
+    
+    def _get_entry(self, sql_query, metrics):
+        """
+        Retorna a entrada de cache da forma da consulta, analisando-a só na
+        primeira vez em que a forma aparece.
         
-        # Normalizar espaços em branco
-        for key, value in parts.items():
-            if value:
-                parts[key] = ' '.join(value.strip().split())
+        Returns:
+            tuple: (entry, literals), ou (None, None) se a sintaxe for inválida
+        """
+        try:
+            with metrics.stage('fingerprint') as stage:
+                key, literals, tokens = fingerprint_sql(sql_query)
+                # Uma avaliação da expressão regular do analisador léxico por token
+                stage.regex = len(tokens)
+        except SQLSyntaxError:
+            return None, None
+        
+        entry = self.plan_cache.get(key)
+        metrics.add('plan_cache_hit' if entry is not None else 'plan_cache_miss')
+        if entry is None:
+            try:
+                with metrics.stage('parse'):
+                    statement = Parser(tokens).parse_statement()
+            except SQLSyntaxError:
+                return None, None
+            with metrics.stage('build_tree') as stage:
+                entry = self._new_plan_entry(statement)
+                stage.nodes = entry['tree'].node_count()
+            self.plan_cache.put(key, entry)
+        return entry, literals
+    
+    def _new_plan_entry(self, statement):
+        """
+        Cria uma entrada de cache para uma consulta recém-analisada.
         
-        return parts
+        A árvore lógica é construída uma única vez; a expressão em texto é
+        derivada dela e a otimização (feita sob demanda) parte da mesma
+        árvore imutável.
+        """
+        tree = self._build_tree(statement)
+        return {
+            'parsed': statement,
+            'tree': tree,
+            'algebra': tree.to_algebra(),
+            'optimized_tree': None,
+            'optimization_log': None,
+        }
     
-    def convert_to_tree(self, sql_query, optimize=False):
+    def get_statement(self, sql_query):
         """
-        Converte SQL para árvore de álgebra relacional.
+        Retorna a AST (forma canônica) da consulta, reaproveitando o cache de planos.
         
         Args:
             sql_query: Consulta SQL
-            optimize: Se True, aplica otimizações de heurísticas
-        
+            
         Returns:
-            Árvore de álgebra relacional (tupla aninhada)
+            SelectStatement: AST com nós Parameter no lugar dos literais, ou None
+                             se a sintaxe for inválida
         """
-        parsed_parts = self._parse_sql(sql_query)
-        if not parsed_parts:
-            return "Erro: A sintaxe da consulta SQL é inválida."
-        
-        select_cols = parsed_parts.get('columns')
-        from_clause = parsed_parts.get('from_clause')
-        where_clause = parsed_parts.get('where')
-        
-        # Parse da cláusula FROM
-        base_table_info, joins = self._parse_from_clause(from_clause)
-        if not base_table_info:
-            return "Erro: Cláusula FROM não encontrada."
-        
-        base_table_name = base_table_info.get('table')
-        base_alias = base_table_info.get('alias')
+        entry, _ = self._get_entry(sql_query, self.metrics)
+        return entry['parsed'] if entry is not None else None
+    
+    def estimate_plan(self, tree):
+        """
+        Estimativas de linhas e custo para cada nó de uma árvore.
         
-        # Construir árvore começando pela tabela base
-        if base_alias:
-            tree = ('ρ', base_alias, base_table_name)
-        else:
-            tree = base_table_name
+        Os planos em cache são otimizados com marcadores no lugar dos literais;
+        aqui a árvore já tem os valores da consulta, então histogramas e
+        listas de valores mais comuns do catálogo são aproveitados.
         
-        # Adicionar JOINs à árvore
-        for join in joins:
-            join_table_name = join.get('join_table')
-            join_alias = join.get('join_alias')
-            join_on = join.get('join_on')
-            
-            # Construir nó direito do JOIN
-            if join_alias:
-                right_node = ('ρ', join_alias, join_table_name)
-            else:
-                right_node = join_table_name
+        Args:
+            tree: PlanNode (ex.: a árvore otimizada de process_query)
             
-            # Adicionar operador de JOIN
-            tree = ('⨝', join_on, tree, right_node)
-        
-        # Adicionar cláusula WHERE (seleção)
-        if where_clause:
-            where_condition = where_clause.replace('AND', '∧').replace('and', '∧')
-            tree = ('σ', where_condition, tree)
-        
-        # Adicionar projeção (SELECT)
-        if select_cols:
-            tree = ('π', select_cols, tree)
+        Returns:
+            dict: {nó: Estimate}
+        """
+        model = CostModel(self.catalog, schema=self.schema)
+        estimates = {}
         
-        # Aplicar otimizações se solicitado
-        if optimize:
-            tree = self.optimizer.optimize_tree(tree)
+        def visit(node):
+            for child in node.children:
+                visit(child)
+            estimates[node] = model.estimate(node)
         
-        return tree
+        visit(tree)
+        return estimates
     
-    def convert_to_optimized_tree(self, sql_query):
+    def physical_plan(self, tree):
         """
-        Retorna tanto a árvore não otimizada quanto a otimizada.
+        Plano físico de uma árvore, com linhas, largura e custo acumulado por operador.
+        
+        Como em estimate_plan, a árvore já tem os valores da consulta; serve
+        também para comparar alternativas (ex.: árvore original x otimizada)
+        pelo custo estimado.
         
         Args:
-            sql_query: Consulta SQL
+            tree: PlanNode (ex.: a árvore otimizada de process_query)
             
         Returns:
-            tuple: (unoptimized_tree, optimized_tree)
+            PhysicalPlan
+        """
+        return build_physical_plan(tree, CostModel(self.catalog, schema=self.schema))
+    
+    def get_cache_stats(self):
         """
-        unoptimized = self.convert_to_tree(sql_query, optimize=False)
-        optimized = self.convert_to_tree(sql_query, optimize=True)
+        Retorna as estatísticas do cache de planos.
         
-        return unoptimized, optimized
+        Returns:
+            dict: {'size', 'max_size', 'hits', 'misses', 'hit_rate'}
+        """
+        return self.plan_cache.stats()
     
-    def _calculate_improved_positions(self, G, root_id):
+    def save_plan_cache(self, path):
         """
-        Calcula posições dos nós no grafo usando layout hierárquico melhorado.
+        Grava as entradas do cache de planos em disco (formato binário compacto).
         
         Args:
-            G: Grafo NetworkX
-            root_id: ID do nó raiz
+            path: Caminho do arquivo
             
         Returns:
-            dict: Dicionário com posições {node_id: (x, y)}
-        """
-        pos = {}
-        levels = {}
-        queue = [(root_id, 0)]
-        visited = set()
-        
-        # BFS para determinar níveis
-        while queue:
-            node, level = queue.pop(0)
-            if node in visited:
-                continue
-            visited.add(node)
-            levels[node] = level
-            
-            for child in G.successors(node):
-                queue.append((child, level + 1))
-        
-        # Agrupar nós por nível
-        level_nodes = {}
-        for node, level in levels.items():
-            if level not in level_nodes:
-                level_nodes[level] = []
-            level_nodes[level].append(node)
-        
-        max_level = max(levels.values()) if levels else 0
-        
-        # Posicionar nós em cada nível
-        for level, nodes in level_nodes.items():
-            y = max_level - level
-            if len(nodes) == 1:
-                x_positions = [0]
-            else:
-                width = max(4, len(nodes) * 2)
-                x_positions = np.linspace(-width/2, width/2, len(nodes))
-            
-            for i, node in enumerate(nodes):
-                pos[node] = (x_positions[i], y * 2)
-        
-        return pos
+            int: Número de entradas gravadas
+        """
+        entries = self.plan_cache.items()
+        with open(path, 'wb') as f:
+            f.write(dump_cache_entries(entries))
+        return len(entries)
     
-    def _add_nodes_to_graph(self, tree_node, G, pos_dict, node_colors, node_labels, node_shapes, level=0):
+    def load_plan_cache(self, path):
         """
-        Adiciona nós recursivamente ao grafo a partir da árvore de álgebra relacional.
+        Aquece o cache de planos a partir de um arquivo gravado por save_plan_cache,
+        evitando refazer parsing e otimização após reiniciar o processo.
         
         Args:
-            tree_node: Nó da árvore (tupla ou string)
-            G: Grafo NetworkX
-            pos_dict: Dicionário de posições
-            node_colors: Dicionário de cores dos nós
-            node_labels: Dicionário de rótulos dos nós
-            node_shapes: Dicionário de formas dos nós
-            level: Nível atual na hierarquia
+            path: Caminho do arquivo
             
         Returns:
-            str: ID do nó atual
-        """
-        current_id = self._get_unique_id()
-        
-        # Caso base: nó folha (tabela)
-        if isinstance(tree_node, str):
-            G.add_node(current_id)
-            node_colors[current_id] = 'table'
-            node_labels[current_id] = tree_node
-            node_shapes[current_id] = 'rect'
-            pos_dict[current_id] = level
-            return current_id
-        
-        operator = tree_node[0]
-        
-        # Operador de Projeção (π)
-        if operator == 'π':
-            G.add_node(current_id)
-            node_colors[current_id] = 'projection'
-            node_labels[current_id] = f'π\n{tree_node[1]}'
-            node_shapes[current_id] = 'circle'
-            pos_dict[current_id] = level
-            child_id = self._add_nodes_to_graph(
-                tree_node[2], G, pos_dict, node_colors, 
-                node_labels, node_shapes, level + 1
-            )
-            G.add_edge(current_id, child_id)
-        
-        # Operador de Seleção (σ)
-        elif operator == 'σ':
-            G.add_node(current_id)
-            node_colors[current_id] = 'selection'
-            node_labels[current_id] = f'σ\n{tree_node[1]}'
-            node_shapes[current_id] = 'rect'
-            pos_dict[current_id] = level
-            child_id = self._add_nodes_to_graph(
-                tree_node[2], G, pos_dict, node_colors, 
-                node_labels, node_shapes, level + 1
-            )
-            G.add_edge(current_id, child_id)
-        
-        # Operador de Renomeação (ρ)
-        elif operator == 'ρ':
-            G.add_node(current_id)
-            node_colors[current_id] = 'rename'
-            node_labels[current_id] = f'ρ\nalias: {tree_node[1]}'
-            node_shapes[current_id] = 'rect'
-            pos_dict[current_id] = level
-            child_id = self._add_nodes_to_graph(
-                tree_node[2], G, pos_dict, node_colors, 
-                node_labels, node_shapes, level + 1
-            )
-            G.add_edge(current_id, child_id)
-        
-        # Operador de JOIN (⨝)
-        elif operator == '⨝':
-            G.add_node(current_id)
-            node_colors[current_id] = 'join'
-            node_labels[current_id] = f'JOIN\n{tree_node[1]}'
-            node_shapes[current_id] = 'diamond'
-            pos_dict[current_id] = level
-            
-            # Processar subárvores esquerda e direita
-            left_child_id = self._add_nodes_to_graph(
-                tree_node[2], G, pos_dict, node_colors, 
-                node_labels, node_shapes, level + 1
-            )
-            right_child_id = self._add_nodes_to_graph(
-                tree_node[3], G, pos_dict, node_colors, 
-                node_labels, node_shapes, level + 1
-            )
+            int: Número de entradas carregadas
             
-            G.add_edge(current_id, left_child_id)
-            G.add_edge(current_id, right_child_id)
+        Raises:
+            ValueError: Se o arquivo não estiver no formato/versão esperados ou estiver truncado
+        """
+        with open(path, 'rb') as f:
+            entries = load_cache_entries(f.read())
+        for key, entry in entries:
+            entry['algebra'] = entry['tree'].to_algebra()
+            self.plan_cache.put(key, entry)
+        return len(entries)
+    
+    def convert_to_tree(self, sql_query, optimize=False):
+        """
+        Converte SQL para árvore de álgebra relacional.
+        
+        Args:
+            sql_query: Consulta SQL
+            optimize: Se True, aplica otimizações de heurísticas
+        
+        Returns:
+            PlanNode: Árvore de álgebra relacional
+        """
+        plan = self._get_plan(sql_query, optimize=optimize)
+        if plan is None:
+            return "Erro: A sintaxe da consulta SQL é inválida."
         
-        return current_id
+        return plan['optimized_tree'] if optimize else plan['tree']
     
-    def _calculate_hierarchical_positions(self, G, root_id):
+    def convert_to_optimized_tree(self, sql_query):
         """
-        Calcula posições hierárquicas alternativas para o grafo.
+        Retorna tanto a árvore não otimizada quanto a otimizada.
         
         Args:
-            G: Grafo NetworkX
-            root_id: ID do nó raiz
+            sql_query: Consulta SQL
             
         Returns:
-            dict: Dicionário com posições {node_id: (x, y)}
-        """
-        pos = {}
-        levels = {}
-        queue = [(root_id, 0)]
-        visited = set()
-        
-        # BFS para determinar níveis
-        while queue:
-            node, level = queue.pop(0)
-            if node in visited:
-                continue
-            visited.add(node)
-            levels[node] = level
-            
-            for successor in G.successors(node):
-                if successor not in visited:
-                    queue.append((successor, level + 1))
-        
-        # Agrupar nós por nível
-        level_nodes = {}
-        for node, level in levels.items():
-            if level not in level_nodes:
-                level_nodes[level] = []
-            level_nodes[level].append(node)
-        
-        # Posicionar nós
-        for level, nodes in level_nodes.items():
-            y = -level * 2
-            if len(nodes) == 1:
-                pos[nodes[0]] = (0, y)
-            else:
-                x_spacing = 4
-                total_width = (len(nodes) - 1) * x_spacing
-                start_x = -total_width / 2
-                for i, node in enumerate(nodes):
-                    pos[node] = (start_x + i * x_spacing, y)
-        
-        return pos
+            tuple: (unoptimized_tree, optimized_tree)
+        """
+        plan = self._get_plan(sql_query, optimize=True)
+        if plan is None:
+            error = "Erro: A sintaxe da consulta SQL é inválida."
+            return error, error
+        
+        return plan['tree'], plan['optimized_tree']
+    
+    # --- Grafo (networkx/numpy carregados só quando necessário) ---
+    
+    def _calculate_improved_positions(self, G, root_id):
+        """Calcula posições hierárquicas dos nós (ver grafo.calculate_improved_positions)."""
+        import grafo
+        with self.metrics.stage('graph_layout') as stage:
+            stage.nodes = G.number_of_nodes()
+            return grafo.calculate_improved_positions(G, root_id)
+    
+    def _add_nodes_to_graph(self, tree_node, G, pos_dict, node_colors, node_labels, node_shapes, level=0,
+                            node_refs=None):
+        """
+        Adiciona nós recursivamente ao grafo a partir da árvore de álgebra relacional
+        (ver grafo.add_nodes_to_graph), usando o contador de IDs do conversor.
+        """
+        import grafo
+        with self.metrics.stage('graph_build') as stage:
+            stage.nodes = tree_node.node_count()
+            return grafo.add_nodes_to_graph(tree_node, G, pos_dict, node_colors, node_labels,
+                                            node_shapes, self._get_unique_id, level, node_refs)
+    
+    def _calculate_hierarchical_positions(self, G, root_id):
+        """Calcula posições hierárquicas alternativas (ver grafo.calculate_hierarchical_positions)."""
+        import grafo
+        with self.metrics.stage('graph_layout') as stage:
+            stage.nodes = G.number_of_nodes()
+            return grafo.calculate_hierarchical_positions(G, root_id)
     
     def convert(self, sql_query):
         """
@@ -369,51 +381,10 @@ class RelationalAlgebraConverter:
         """
         print(f"\nConvertendo SQL para String: '{sql_query}'")
         
-        parsed_parts = self._parse_sql(sql_query)
-        if not parsed_parts:
+        plan = self._get_plan(sql_query)
+        if plan is None:
             return "Erro: A sintaxe da consulta SQL é inválida ou não é suportada pelo conversor."
-        
-        select_cols = parsed_parts.get('columns')
-        from_clause = parsed_parts.get('from_clause')
-        where_clause = parsed_parts.get('where')
-        
-        base_table_info, joins = self._parse_from_clause(from_clause)
-        
-        if not base_table_info:
-            return "Erro: Não foi possível identificar a tabela base na cláusula FROM."
-        
-        base_table_name = base_table_info.get('table')
-        base_alias = base_table_info.get('alias')
-        
-        # Construir expressão começando pela tabela base
-        if base_alias:
-            relational_expr = f"ρ_{base_alias}({base_table_name})"
-        else:
-            relational_expr = base_table_name
-        
-        # Adicionar JOINs
-        for join in joins:
-            join_table_name = join.get('join_table')
-            join_alias = join.get('join_alias')
-            join_on = join.get('join_on')
-            
-            if join_alias:
-                join_expr = f"ρ_{join_alias}({join_table_name})"
-            else:
-                join_expr = join_table_name
-            
-            relational_expr = f"({relational_expr} ⨝ ({join_on}) {join_expr})"
-        
-        # Adicionar WHERE
-        if where_clause:
-            where_condition = where_clause.replace('AND', '∧').replace('and', '∧')
-            relational_expr = f"σ ({where_condition}) ({relational_expr})"
-        
-        # Adicionar SELECT
-        if select_cols:
-            relational_expr = f"π ({select_cols}) ({relational_expr})"
-        
-        return relational_expr
+        return plan['algebra']
     
     def get_optimization_log(self):
         """
@@ -435,77 +406,161 @@ class RelationalAlgebraConverter:
             tuple: (is_valid, message)
         """
         try:
-            # Remover espaços extras e ponto e vírgula
-            query_clean = ' '.join(sql_query.strip().rstrip(';').split())
-            
-            # 1. Verificar palavras-chave duplicadas
-            if re.search(r'\b(SELECT\s+SELECT|FROM\s+FROM|WHERE\s+WHERE|ON\s+ON|JOIN\s+JOIN)\b', query_clean, re.IGNORECASE):
-                return False, "Sintaxe inválida: Palavra-chave duplicada detectada"
-            
-            # 2. Verificar INNER JOIN duplicado
-            if re.search(r'\bINNER\s+JOIN\s+INNER\s+JOIN\b', query_clean, re.IGNORECASE):
-                return False, "Sintaxe inválida: 'INNER JOIN INNER JOIN' detectado"
-            
-            # 3. Verificar operadores duplicados ou inválidos
-            if re.search(r'(>>|<<|==|>>|<<|> >|< <|\|\|)', query_clean):
-                return False, "Sintaxe inválida: Operador duplicado ou inválido detectado (>>, <<, ==, > >, etc.)"
-            
-            # 4. Verificar operadores lógicos duplicados ou inválidos
-            if re.search(r'\b(AND\s+OR|OR\s+AND|AND\s+AND|OR\s+OR)\b', query_clean, re.IGNORECASE):
-                return False, "Sintaxe inválida: Operadores lógicos inválidos (AND OR, OR AND, AND AND, OR OR)"
-            
-            # 5. Verificar WHERE usado como nome de tabela
-            if re.search(r'\bJOIN\s+WHERE\b', query_clean, re.IGNORECASE):
-                return False, "Sintaxe inválida: 'WHERE' não pode ser usado como nome de tabela"
-            
-            # 6. Verificar SELECT usado como valor
-            if re.search(r'=\s*SELECT\b', query_clean, re.IGNORECASE):
-                return False, "Sintaxe inválida: 'SELECT' usado incorretamente como valor"
-            
-            # 7. Verificar ON usado incorretamente
-            if re.search(r'\bFROM\s+\w+\s+ON\b', query_clean, re.IGNORECASE) and not re.search(r'\bJOIN\b', query_clean, re.IGNORECASE):
-                return False, "Sintaxe inválida: 'ON' usado sem JOIN"
-            
-            # 8. Verificar WHERE dentro do FROM/JOIN incorretamente
-            if re.search(r'\bFROM\s+.*?\s+WHERE\s+.*?\s+ON\b', query_clean, re.IGNORECASE):
-                return False, "Sintaxe inválida: 'WHERE' não pode aparecer entre FROM e ON"
-            
-            # 9. Verificar parênteses incorretos na lista de colunas
-            # Procura por colunas entre parênteses fora de contexto de função
-            columns_match = re.match(r'SELECT\s+(.*?)\s+FROM', query_clean, re.IGNORECASE)
-            if columns_match:
-                columns_part = columns_match.group(1)
-                # Detecta padrões como (Nome) ou Nome, (Email) que não são chamadas de função
-                if re.search(r'(?<!\w)\(\s*\w+\s*\)(?!\s*\()', columns_part):
-                    # Verifica se não é uma função válida (sem nome antes do parêntese)
-                    if not re.search(r'\w+\s*\(\s*\w+\s*\)', columns_part):
-                        return False, "Sintaxe inválida: Parênteses incorretos na lista de colunas"
-            
-            # 10. Parse básico da consulta
-            parsed_parts = self._parse_sql(query_clean)
-            if not parsed_parts:
-                return False, "Sintaxe SQL inválida: Estrutura básica SELECT...FROM não reconhecida"
-            
-            # 11. Validar cláusula FROM
-            from_clause = parsed_parts.get('from_clause')
-            if not from_clause or not from_clause.strip():
-                return False, "Sintaxe inválida: Cláusula FROM vazia ou ausente"
-            
-            base_table_info, joins = self._parse_from_clause(from_clause)
-            
-            if not base_table_info:
-                return False, "Sintaxe inválida: Tabela base não identificada na cláusula FROM"
-            
-            # 12. Validar que palavras-chave SQL não são usadas como identificadores
-            reserved_as_identifiers = ['SELECT', 'FROM', 'WHERE', 'ON', 'JOIN', 'INNER']
-            columns = parsed_parts.get('columns', '')
-            for keyword in reserved_as_identifiers:
-                if re.search(r'\b' + keyword + r'\b(?!\s*(=|>|<|>=|<=|<>|JOIN|FROM))', columns, re.IGNORECASE):
-                    return False, f"Sintaxe inválida: Palavra-chave reservada '{keyword}' usada incorretamente"
-            
-            return True, "Consulta SQL válida"
+            with self.metrics.stage('validate') as stage:
+                key, _, tokens = fingerprint_sql(sql_query)
+                stage.regex = len(tokens)
+                if key in self.plan_cache:
+                    return True, "Consulta SQL válida"
+                
+                statement = Parser(tokens).parse_statement()
+                # Memoriza o parsing para a conversão que normalmente vem em seguida
+                entry = self._new_plan_entry(statement)
+                stage.nodes = entry['tree'].node_count()
+                self.plan_cache.put(key, entry)
+                return True, "Consulta SQL válida"
+        except SQLSyntaxError as e:
+            return False, f"Sintaxe inválida: {e.message}"
         except Exception as e:
             return False, f"Erro de validação: {str(e)}"
+    
+    # --- Processamento em lote ---
+    
+    def process_query(self, sql_query, optimize=True):
+        """
+        Ponto de entrada único do pipeline: analisa a consulta uma vez (ou
+        reaproveita o cache), constrói a árvore lógica uma vez, deriva dela a
+        expressão em texto e otimiza a mesma árvore imutável. Não interrompe
+        em caso de erro.
+        
+        Args:
+            sql_query: Consulta SQL
+            optimize: Se True, inclui a árvore otimizada e o log de otimização
+            
+        Returns:
+            dict: {'query', 'valid', 'error', 'algebra', 'tree',
+                   'optimized_tree', 'optimization_log', 'metrics'}; em
+                  consultas inválidas 'error' traz a mensagem e as árvores
+                  ficam None. 'metrics' é o Metrics.to_dict() da requisição,
+                  também somado a self.metrics
+        """
+        result = {
+            'query': sql_query,
+            'valid': False,
+            'error': None,
+            'algebra': None,
+            'tree': None,
+            'optimized_tree': None,
+            'optimization_log': None,
+            'metrics': None,
+        }
+        metrics = Metrics()
+        try:
+            plan = self._get_plan(sql_query, optimize=optimize, metrics=metrics)
+            if plan is None:
+                # Só consultas inválidas pagam a segunda análise, para obter a mensagem
+                result['error'] = self.validate_sql_syntax(sql_query)[1]
+                return result
+            result['valid'] = True
+            result['algebra'] = plan['algebra']
+            result['tree'] = plan['tree']
+            if optimize:
+                result['optimized_tree'] = plan['optimized_tree']
+                result['optimization_log'] = '\n'.join(plan['optimization_log'])
+        except Exception as e:
+            result['valid'] = False
+            result['error'] = f"Erro de conversão: {str(e)}"
+        finally:
+            result['metrics'] = metrics.to_dict()
+            self.metrics.merge(metrics)
+        return result
+    
+    def iter_many(self, queries, optimize=False, workers=None, chunk_size=256):
+        """
+        Processa um iterável de consultas, em ordem, opcionalmente em vários processos.
+        
+        As consultas são agrupadas em blocos de `chunk_size` e distribuídas a um
+        ProcessPoolExecutor; cada processo mantém seu próprio conversor (e cache
+        de planos), já que `node_counter` e o log do otimizador são estado
+        mutável. No máximo `2 * workers` blocos ficam em andamento, então o
+        iterável de entrada é consumido sob demanda.
+        
+        Args:
+            queries: Iterável de strings SQL
+            optimize: Se True, inclui árvores otimizadas e logs
+            workers: Número de processos (None = os.cpu_count(); 1 = no próprio processo)
+            chunk_size: Consultas por tarefa enviada a um processo
+            
+        Yields:
+            dict: Resultado de process_query para cada consulta, na ordem de entrada
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1:
+            for sql_query in queries:
+                yield self.process_query(sql_query, optimize=optimize)
+            return
+        
+        from concurrent.futures import ProcessPoolExecutor
+        
+        chunks = _chunked(queries, chunk_size)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self.plan_cache.max_size, self.catalog, self.schema)) as executor:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(_process_chunk, chunk, optimize))
+                if len(pending) >= 2 * workers:
+                    yield from self._merge_worker_metrics(pending.popleft().result())
+            while pending:
+                yield from self._merge_worker_metrics(pending.popleft().result())
+    
+    def _merge_worker_metrics(self, results):
+        """Soma ao agregado deste processo as medidas feitas nos processos do pool."""
+        for result in results:
+            if result['metrics'] is not None:
+                self.metrics.merge(result['metrics'])
+        return results
+    
+    def convert_many(self, queries, workers=None, chunk_size=256):
+        """
+        Converte várias consultas para álgebra relacional (sem otimizar).
+        
+        Returns:
+            list: Resultados de process_query na ordem de entrada
+        """
+        return list(self.iter_many(queries, optimize=False, workers=workers, chunk_size=chunk_size))
+    
+    def optimize_many(self, queries, workers=None, chunk_size=256):
+        """
+        Converte e otimiza várias consultas.
+        
+        Returns:
+            list: Resultados de process_query na ordem de entrada
+        """
+        return list(self.iter_many(queries, optimize=True, workers=workers, chunk_size=chunk_size))
+
+
+# --- Funções executadas nos processos do pool ---
+
+_worker_converter = None
+
+
+def _init_worker(cache_size, catalog=None, schema=None):
+    """Cria o conversor exclusivo do processo (inicializador do pool)."""
+    global _worker_converter
+    _worker_converter = RelationalAlgebraConverter(cache_size=cache_size, catalog=catalog, schema=schema)
+
+
+def _process_chunk(queries, optimize):
+    return [_worker_converter.process_query(q, optimize=optimize) for q in queries]
+
+
+def _chunked(iterable, size):
+    """Agrupa um iterável em listas de até `size` elementos."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
 
 
 # Código de teste opcional
@@ -0,0 +1,664 @@
+"""
+Modelo de custo do otimizador.
+
+Estima a cardinalidade de cada subárvore a partir do catálogo de estatísticas
+(stats_catalog) e o custo de execução em páginas lidas/gravadas, somado a um
+custo de CPU por tupla. As estimativas são memorizadas por nó: como os nós
+do plano são imutáveis e comparados estruturalmente, subárvores repetidas
+durante a enumeração de junções são estimadas uma única vez.
+
+Sem estatísticas, tabelas têm DEFAULT_ROW_COUNT linhas e os predicados usam
+seletividades padrão, o que reproduz aproximadamente a heurística antiga.
+"""
+import math
+
+from plan_nodes import Scan, Rename, Select, Project, Join, Empty
+from predicates import split_conjuncts, equi_join_columns, column_constant, FLIPPED_OPS as _FLIPPED
+from sql_parser import (
+    ColumnRef, Literal, Comparison, InList, IsNull, And, Or, Not, Star,
+)
+from stats_catalog import StatisticsCatalog
+
+PAGE_BYTES = 8192
+# Páginas de memória disponíveis para uma junção (blocos do nested loop,
+# tabela de hash, ordenação)
+MEMORY_PAGES = 100
+# Custo de CPU por tupla processada, em unidades de "uma página lida"
+CPU_TUPLE_COST = 0.01
+# Páginas lidas para descer a árvore B+ de um índice a cada busca (a raiz
+# costuma estar em memória)
+INDEX_PROBE_PAGES = 2
+
+DEFAULT_EQ_SELECTIVITY = 0.1
+DEFAULT_RANGE_SELECTIVITY = 1 / 3
+DEFAULT_LIKE_SELECTIVITY = 0.1
+DEFAULT_NULL_FRACTION = 0.05
+
+# Em caso de empate, vale a ordem desta tupla
+JOIN_ALGORITHMS = ('hash_join', 'sort_merge', 'index_nested_loop', 'nested_loop')
+
+
+class Estimate:
+    """Estimativa de uma subárvore: linhas, bytes por linha e custo acumulado."""
+    __slots__ = ('rows', 'row_bytes', 'cost')
+
+    def __init__(self, rows, row_bytes, cost):
+        self.rows = rows
+        self.row_bytes = row_bytes
+        self.cost = cost
+
+    @property
+    def pages(self):
+        return pages(self.rows, self.row_bytes)
+
+    def __repr__(self):
+        return f"Estimate(rows={self.rows:.1f}, row_bytes={self.row_bytes}, cost={self.cost:.1f})"
+
+
+def pages(rows, row_bytes):
+    """Número de páginas ocupadas por `rows` linhas de `row_bytes` bytes."""
+    return max(1, math.ceil(rows * row_bytes / PAGE_BYTES))
+
+
+class CostModel:
+    """Estimativas de cardinalidade e custo sobre um StatisticsCatalog."""
+
+    def __init__(self, catalog=None, memory_pages=MEMORY_PAGES, schema=None):
+        self.catalog = catalog if catalog is not None else StatisticsCatalog()
+        self.memory_pages = memory_pages
+        # {tabela: frozenset(colunas)} em minúsculas (ver normalize_schema)
+        self.schema = normalize_schema(schema)
+        self._estimates = {}
+        self._relations = {}
+        self._fixed = {}
+        self._orders = {}
+
+    def clear(self):
+        """Descarta as estimativas memorizadas (ex.: após alterar o catálogo)."""
+        self._estimates.clear()
+        self._relations.clear()
+        self._fixed.clear()
+        self._orders.clear()
+
+    # --- Relações e colunas ---
+
+    def relations(self, node):
+        """
+        Mapeia cada nome visível na subárvore (tabela ou alias, em minúsculas)
+        para o nome da tabela base.
+        """
+        cached = self._relations.get(node)
+        if cached is not None:
+            return cached
+        if isinstance(node, Scan):
+            mapping = {node.table.lower(): node.table}
+        elif isinstance(node, Rename):
+            mapping = dict(self.relations(node.child))
+            base_tables = set(mapping.values())
+            if len(base_tables) == 1:
+                mapping[node.alias.lower()] = base_tables.pop()
+        else:
+            mapping = {}
+            for child in node.children:
+                mapping.update(self.relations(child))
+        self._relations[node] = mapping
+        return mapping
+
+    def _resolve_table(self, column, node):
+        """Tabela base de uma coluna qualificada, ou None."""
+        if not column.table:
+            return None
+        relations = self.relations(node)
+        table = relations.get(column.table.lower())
+        if table is None:
+            # Seleções empurradas para baixo do ρ usam o alias sobre a tabela base
+            base_tables = set(relations.values())
+            if len(base_tables) == 1:
+                table = base_tables.pop()
+        return table
+
+    def table_columns(self, table):
+        """Colunas da tabela segundo o esquema (frozenset em minúsculas), ou None se desconhecidas."""
+        return self.schema.get(table.lower()) if table else None
+
+    def column_owner(self, column, node):
+        """
+        Tabela base de uma coluna no contexto da subárvore: pelo qualificador
+        ou, sem ele, pela única tabela do esquema que tem a coluna.
+        """
+        if column.table:
+            return self._resolve_table(column, node)
+        owners = [table for table in set(self.relations(node).values())
+                  if column.name.lower() in (self.table_columns(table) or ())]
+        return owners[0] if len(owners) == 1 else None
+
+    def project_width(self, node):
+        """
+        Bytes por linha na saída de uma projeção: a largura média de cada
+        coluna mantida (tamanho da linha / número de colunas da tabela). Sem
+        o esquema da tabela, a largura da entrada é mantida.
+        """
+        width = self.estimate(node.child).row_bytes
+        if any(isinstance(item.expr, Star) for item in node.columns_list):
+            return width
+        total = 0.0
+        for column in {column for item in node.columns_list for column in item.columns}:
+            table = self.column_owner(column, node.child)
+            columns = self.table_columns(table)
+            if not columns:
+                return width
+            total += self.catalog.row_bytes(table) / len(columns)
+        return min(width, max(1, round(total)))
+
+    def column_stats(self, column, node):
+        """ColumnStats da coluna no contexto da subárvore `node`, ou None."""
+        if column.table:
+            table = self._resolve_table(column, node)
+            return self.catalog.column(table, column.name) if table else None
+        for table in set(self.relations(node).values()):
+            stats = self.catalog.column(table, column.name)
+            if stats is not None:
+                return stats
+        return None
+
+    def _table_rows(self, column, node):
+        table = self._resolve_table(column, node)
+        return self.catalog.row_count(table) if table else None
+
+    def distinct_values(self, column, node):
+        """Valores distintos estimados da coluna (None se desconhecido)."""
+        stats = self.column_stats(column, node)
+        if stats is not None and stats.distinct:
+            return stats.distinct
+        return None
+
+    # --- Seletividade ---
+
+    def selectivity(self, condition, node):
+        """
+        Fração estimada de linhas de `node` que satisfazem a condição.
+
+        Args:
+            condition: Expression (None = sem filtro)
+            node: Subárvore que fornece as colunas (resolve aliases)
+
+        Returns:
+            float: Seletividade entre 0 e 1
+        """
+        if condition is None:
+            return 1.0
+        return min(1.0, max(0.0, self._selectivity(condition, node)))
+
+    def _selectivity(self, expr, node):
+        if isinstance(expr, And):
+            return self._and_selectivity(expr.terms, node)
+        if isinstance(expr, Or):
+            miss = 1.0
+            for term in expr.terms:
+                miss *= 1.0 - self._selectivity(term, node)
+            return 1.0 - miss
+        if isinstance(expr, Not):
+            return 1.0 - self._selectivity(expr.term, node)
+        if isinstance(expr, Comparison):
+            return self._comparison_selectivity(expr, node)
+        if isinstance(expr, InList):
+            if isinstance(expr.expr, ColumnRef):
+                selectivity = sum(self._equality_selectivity(expr.expr, node, value)
+                                  for value in expr.values)
+            else:
+                selectivity = len(expr.values) * DEFAULT_EQ_SELECTIVITY
+            selectivity = min(1.0, selectivity)
+            return 1.0 - selectivity if expr.negated else selectivity
+        if isinstance(expr, IsNull):
+            null_fraction = DEFAULT_NULL_FRACTION
+            if isinstance(expr.expr, ColumnRef):
+                stats = self.column_stats(expr.expr, node)
+                if stats is not None:
+                    null_fraction = stats.null_fraction
+            return 1.0 - null_fraction if expr.negated else null_fraction
+        return DEFAULT_RANGE_SELECTIVITY
+
+    def _and_selectivity(self, terms, node):
+        # Limites inferior e superior sobre a mesma coluna formam um intervalo:
+        # P(a < x < b) é estimado pelo histograma, não por P(x > a)·P(x < b)
+        result = 1.0
+        intervals = {}
+        for term in terms:
+            bound = _range_bound(term)
+            if bound is None:
+                result *= self._selectivity(term, node)
+                continue
+            column, op, _ = bound
+            side = 'lower' if op in ('>', '>=') else 'upper'
+            intervals.setdefault(column, {'lower': [], 'upper': []})[side].append((bound, term))
+
+        for column, sides in intervals.items():
+            selectivity = None
+            if len(sides['lower']) == 1 and len(sides['upper']) == 1:
+                stats = self.column_stats(column, node)
+                (_, low_op, low), _ = sides['lower'][0]
+                (_, high_op, high), _ = sides['upper'][0]
+                if stats is not None:
+                    below_high = stats.less_fraction(high, inclusive=high_op == '<=')
+                    below_low = stats.less_fraction(low, inclusive=low_op == '>')
+                    if below_high is not None and below_low is not None:
+                        selectivity = max(0.0, below_high - below_low)
+            if selectivity is None:
+                selectivity = 1.0
+                for _, term in sides['lower'] + sides['upper']:
+                    selectivity *= self._selectivity(term, node)
+            result *= selectivity
+        return result
+
+    def _comparison_selectivity(self, expr, node):
+        left, right, op = expr.left, expr.right, expr.op
+        if not isinstance(left, ColumnRef) and isinstance(right, ColumnRef):
+            left, right, op = right, left, _FLIPPED.get(op, op)
+
+        if isinstance(left, ColumnRef) and isinstance(right, ColumnRef):
+            if op == '=':
+                return self.join_selectivity(left, right, node)
+            return DEFAULT_RANGE_SELECTIVITY
+
+        if not isinstance(left, ColumnRef):
+            return DEFAULT_RANGE_SELECTIVITY
+
+        not_null = 1.0
+        stats = self.column_stats(left, node)
+        if stats is not None:
+            not_null = 1.0 - stats.null_fraction
+
+        if op == '=':
+            return self._equality_selectivity(left, node, right)
+        if op in ('<>', '!='):
+            return not_null - self._equality_selectivity(left, node, right)
+        if op in ('LIKE', 'NOT LIKE'):
+            pattern = right.value if isinstance(right, Literal) else None
+            if isinstance(pattern, str) and '%' not in pattern and '_' not in pattern:
+                selectivity = self._equality_selectivity(left, node, right)
+            else:
+                selectivity = DEFAULT_LIKE_SELECTIVITY
+            return selectivity if op == 'LIKE' else not_null - selectivity
+
+        if stats is not None and isinstance(right, Literal):
+            selectivity = _range_fraction(stats, op, right.value)
+            if selectivity is not None:
+                return selectivity
+        return DEFAULT_RANGE_SELECTIVITY * not_null
+
+    def _equality_selectivity(self, column, node, value=None):
+        """
+        Seletividade de `coluna = valor`: frequência do valor na lista de MCV
+        ou, fora dela, a fração restante dividida pelos demais valores distintos.
+        Sem valor conhecido (ex.: parâmetro de um plano em cache), 1 / distintos.
+        """
+        stats = self.column_stats(column, node)
+        if stats is not None and isinstance(value, Literal) and value.value is not None:
+            fraction = stats.equal_fraction(value.value)
+            if fraction is not None:
+                return fraction
+        distinct = self.distinct_values(column, node)
+        if distinct:
+            return (1.0 - stats.null_fraction) / distinct
+        return DEFAULT_EQ_SELECTIVITY
+
+    def fixed_columns(self, node):
+        """
+        Colunas que as seleções da subárvore igualam a uma constante.
+
+        Returns:
+            dict: {ColumnRef: Literal/Parameter}
+        """
+        cached = self._fixed.get(node)
+        if cached is not None:
+            return cached
+        fixed = {}
+        for child in node.children:
+            fixed.update(self.fixed_columns(child))
+        if isinstance(node, Select):
+            for term in split_conjuncts(node.condition):
+                bound = column_constant(term)
+                if bound is not None and bound[1] == '=':
+                    fixed[bound[0]] = bound[2]
+        self._fixed[node] = fixed
+        return fixed
+
+    def join_selectivity(self, left, right, node):
+        """
+        Seletividade de `left = right`: 1 / max(distintos dos dois lados).
+
+        Se as duas colunas já foram igualadas à mesma constante abaixo da
+        junção (ex.: pelo fecho transitivo), a igualdade não filtra mais nada.
+        """
+        fixed = self.fixed_columns(node)
+        if left in fixed and fixed[left] == fixed.get(right):
+            return 1.0
+        distinct = [self.distinct_values(c, node) or self._table_rows(c, node) for c in (left, right)]
+        distinct = [d for d in distinct if d]
+        if not distinct:
+            return DEFAULT_EQ_SELECTIVITY
+        return 1.0 / max(distinct)
+
+    # --- Cardinalidade e custo ---
+
+    def estimate(self, node):
+        """Estimate (linhas, bytes por linha, custo) da subárvore, memorizada por nó."""
+        cached = self._estimates.get(node)
+        if cached is not None:
+            return cached
+
+        if isinstance(node, Scan):
+            rows = self.catalog.row_count(node.table)
+            row_bytes = self.catalog.row_bytes(node.table)
+            result = Estimate(rows, row_bytes, pages(rows, row_bytes) + rows * CPU_TUPLE_COST)
+        elif isinstance(node, Empty):
+            # Predicado contraditório: nada é lido nem produzido
+            result = Estimate(0.0, 0, 0.0)
+        elif isinstance(node, Rename):
+            child = self.estimate(node.child)
+            result = Estimate(child.rows, child.row_bytes, child.cost)
+        elif isinstance(node, Project):
+            child = self.estimate(node.child)
+            result = Estimate(child.rows, self.project_width(node), child.cost)
+        elif isinstance(node, Select):
+            child = self.estimate(node.child)
+            rows = max(1.0, child.rows * self.selectivity(node.condition, node.child))
+            access = self.index_scan(node)
+            cost = access[2] if access else child.cost + child.rows * CPU_TUPLE_COST
+            result = Estimate(rows, child.row_bytes, cost)
+        elif isinstance(node, Join):
+            left, right = self.estimate(node.left), self.estimate(node.right)
+            rows = self.join_rows(node)
+            algorithm = node.algorithm or self.best_join_algorithm(node)[0]
+            cost = self.join_cost(algorithm, node, rows)
+            result = Estimate(rows, left.row_bytes + right.row_bytes, cost)
+        else:
+            raise TypeError(f"Nó sem estimativa de custo: {type(node).__name__}")
+
+        self._estimates[node] = result
+        return result
+
+    def rows(self, node):
+        """Cardinalidade estimada da subárvore."""
+        return self.estimate(node).rows
+
+    def join_rows(self, join):
+        """Cardinalidade estimada do resultado de uma junção."""
+        left, right = self.estimate(join.left), self.estimate(join.right)
+        return max(1.0, left.rows * right.rows * self.selectivity(join.condition, join))
+
+    def join_cost(self, algorithm, join, out_rows=None):
+        """
+        Custo de uma junção (E/S em páginas + CPU), incluindo o custo das entradas.
+
+        Args:
+            algorithm: Um de JOIN_ALGORITHMS
+            join: Nó Join (a orientação importa: no nested loop com índice,
+                  a direita é a relação consultada pelo índice)
+            out_rows: Cardinalidade do resultado (padrão: join_rows)
+
+        Returns:
+            float: Custo, ou None se o algoritmo não se aplica à junção
+        """
+        left, right = self.estimate(join.left), self.estimate(join.right)
+        if out_rows is None:
+            out_rows = self.join_rows(join)
+        output = out_rows * CPU_TUPLE_COST
+        keys = self.join_keys(join)
+
+        if algorithm == 'hash_join':
+            if not keys:
+                return None
+            build = min(left.pages, right.pages)
+            # Sem memória para a tabela de hash: particiona as duas entradas em
+            # disco (grava e relê cada página uma vez)
+            io = 0 if build <= self.memory_pages else 2 * (left.pages + right.pages)
+            return left.cost + right.cost + output + io + (left.rows + right.rows) * CPU_TUPLE_COST
+
+        if algorithm == 'sort_merge':
+            if not keys:
+                return None
+            left_key, right_key = keys[0]
+            cost = left.cost + right.cost + output + (left.rows + right.rows) * CPU_TUPLE_COST
+            # Entradas que já chegam ordenadas pela chave não são ordenadas de novo
+            if not self.sorted_by(join.left, left_key):
+                cost += self.sort_cost(left)
+            if not self.sorted_by(join.right, right_key):
+                cost += self.sort_cost(right)
+            return cost
+
+        if algorithm == 'index_nested_loop':
+            probe = self.index_probe(join)
+            if probe is None:
+                return None
+            # A entrada interna não é lida inteira: cada linha externa faz uma
+            # busca no índice e lê só as linhas correspondentes
+            return left.cost + left.rows * probe[3] + output
+
+        # Nested loop em blocos: a entrada interna é relida para cada bloco da externa
+        blocks = math.ceil(left.pages / max(1, self.memory_pages - 2))
+        return (left.cost + right.cost + output + (blocks - 1) * right.pages
+                + left.rows * right.rows * CPU_TUPLE_COST)
+
+    def sort_cost(self, estimate):
+        """
+        Custo de ordenar uma entrada: em memória só CPU; acima de
+        `memory_pages`, ordenação externa com uma passada de E/S (gravar e
+        ler) para gerar as sequências e mais uma por nível de intercalação.
+        """
+        cpu = estimate.rows * math.log2(max(2.0, estimate.rows)) * CPU_TUPLE_COST
+        if estimate.pages <= self.memory_pages:
+            return cpu
+        runs = math.ceil(estimate.pages / self.memory_pages)
+        merge_passes = math.ceil(math.log(runs, max(2, self.memory_pages - 1)))
+        return cpu + 2 * estimate.pages * (1 + merge_passes)
+
+    def join_keys(self, join):
+        """Pares (coluna da esquerda, coluna da direita) das igualdades da junção."""
+        keys = []
+        for a, b in equi_join_columns(join.condition):
+            if a.tables <= join.left.tables and b.tables <= join.right.tables:
+                keys.append((a, b))
+            elif b.tables <= join.left.tables and a.tables <= join.right.tables:
+                keys.append((b, a))
+        return keys
+
+    def hash_build_side(self, join):
+        """Lado usado para montar a tabela de hash: o de menos páginas ('left' ou 'right')."""
+        left, right = self.estimate(join.left), self.estimate(join.right)
+        return 'right' if right.pages <= left.pages else 'left'
+
+    def index_lookup(self, join):
+        """
+        Índice usado pelo nested loop com índice: a direita precisa ser uma
+        tabela base (sob ρ/σ) com índice começando pela coluna de junção.
+
+        Returns:
+            tuple: (tabela, ColumnRef da direita), ou None
+        """
+        inner = join.right
+        while isinstance(inner, (Select, Rename, Project)):
+            inner = inner.child
+        if not isinstance(inner, Scan):
+            return None
+        for _, column in self.join_keys(join):
+            if self.catalog.has_index(inner.table, column.name):
+                return inner.table, column
+        return None
+
+    def index_fetch_pages(self, table, column, rows):
+        """
+        Páginas lidas para buscar `rows` linhas pelo índice de `column`: na
+        chave primária as linhas estão contíguas; nos demais índices cada
+        linha pode estar em uma página diferente (limitado ao tamanho da tabela).
+        """
+        row_bytes = self.catalog.row_bytes(table)
+        primary_key = self.catalog.primary_key(table)
+        if primary_key and primary_key[0] == column.lower():
+            return pages(rows, row_bytes)
+        return min(math.ceil(rows), pages(self.catalog.row_count(table), row_bytes))
+
+    def index_probe(self, join):
+        """
+        Busca no índice feita pelo nested loop com índice para cada linha externa.
+
+        Returns:
+            tuple: (tabela, ColumnRef da direita, linhas por busca, custo por
+                   busca), ou None se não houver índice utilizável
+        """
+        lookup = self.index_lookup(join)
+        if lookup is None:
+            return None
+        table, column = lookup
+        table_rows = self.catalog.row_count(table)
+        distinct = self.distinct_values(column, join.right) or table_rows * DEFAULT_EQ_SELECTIVITY
+        matches = table_rows / max(1.0, distinct)
+        cost = (INDEX_PROBE_PAGES + self.index_fetch_pages(table, column.name, matches)
+                + matches * CPU_TUPLE_COST)
+        return table, column, matches, cost
+
+    def index_scan(self, node):
+        """
+        Acesso por índice para uma seleção sobre tabela base (σ sobre a
+        tabela ou sobre seu ρ), quando é mais barato que a leitura sequencial.
+
+        Returns:
+            tuple: (termo usado no índice, linhas lidas pelo índice, custo),
+                   ou None se nenhum índice compensar
+        """
+        if not isinstance(node, Select):
+            return None
+        base = node.child.child if isinstance(node.child, Rename) else node.child
+        if not isinstance(base, Scan):
+            return None
+        terms = split_conjuncts(node.condition)
+        best = None
+        for term in terms:
+            parts = column_constant(term)
+            if parts is None or parts[1] == '<>' or not self.catalog.has_index(base.table, parts[0].name):
+                continue
+            rows = max(1.0, self.rows(node.child) * self.selectivity(term, node.child))
+            cost = (INDEX_PROBE_PAGES + self.index_fetch_pages(base.table, parts[0].name, rows)
+                    + rows * CPU_TUPLE_COST * (2 if len(terms) > 1 else 1))
+            if best is None or cost < best[2]:
+                best = (term, rows, cost)
+        child = self.estimate(node.child)
+        if best is None or best[2] >= child.cost + child.rows * CPU_TUPLE_COST:
+            return None
+        return best
+
+    def output_order(self, node):
+        """
+        Colunas pelas quais a saída da subárvore sai ordenada, como pares
+        (tabela ou alias, coluna) em minúsculas.
+
+        Uma leitura sequencial segue a chave primária (índice clusterizado);
+        σ, π e ρ preservam a ordem; o sort-merge ordena pela chave de junção;
+        nested loops e o hash join sem partições preservam a ordem da entrada
+        que percorrem (a externa e a de sondagem, respectivamente).
+        """
+        cached = self._orders.get(node)
+        if cached is not None:
+            return cached
+        order = frozenset()
+        if isinstance(node, Scan):
+            primary_key = self.catalog.primary_key(node.table)
+            if primary_key:
+                order = frozenset(((node.table.lower(), primary_key[0]),))
+        elif isinstance(node, Rename):
+            child = self.output_order(node.child)
+            order = child | {(node.alias.lower(), column) for _, column in child}
+        elif isinstance(node, (Select, Project)):
+            order = self.output_order(node.child)
+        elif isinstance(node, Join):
+            algorithm = node.algorithm or self.best_join_algorithm(node)[0]
+            if algorithm == 'sort_merge':
+                order = frozenset(_order_key(column) for column in self.join_keys(node)[0])
+            elif algorithm == 'hash_join':
+                build = self.hash_build_side(node)
+                if min(self.estimate(node.left).pages, self.estimate(node.right).pages) <= self.memory_pages:
+                    order = self.output_order(node.left if build == 'right' else node.right)
+            else:
+                order = self.output_order(node.left)
+        self._orders[node] = order
+        return order
+
+    def sorted_by(self, node, column):
+        """True se a saída da subárvore já sai ordenada pela coluna (ver output_order)."""
+        return _order_key(column) in self.output_order(node)
+
+    def best_join_algorithm(self, join):
+        """
+        Escolhe o algoritmo de menor custo estimado para a junção, entre os
+        que se aplicam a ela (hash e sort-merge exigem igualdade entre
+        colunas; o nested loop com índice, um índice na relação da direita).
+
+        Returns:
+            tuple: (algoritmo, {algoritmo: custo})
+        """
+        rows = self.join_rows(join)
+        costs = {}
+        for algorithm in JOIN_ALGORITHMS:
+            cost = self.join_cost(algorithm, join, rows)
+            if cost is not None:
+                costs[algorithm] = cost
+        return min(costs, key=costs.get), costs
+
+    def describe_join(self, join):
+        """
+        Rótulo do algoritmo de uma junção para o plano e o log, com o detalhe
+        que decide a execução (lado da tabela de hash, índice consultado ou
+        entradas que já chegam ordenadas).
+        """
+        algorithm = join.algorithm or self.best_join_algorithm(join)[0]
+        if algorithm == 'hash_join':
+            side = 'direita' if self.hash_build_side(join) == 'right' else 'esquerda'
+            return f"Hash Join (tabela de hash sobre a entrada da {side})"
+        if algorithm == 'sort_merge':
+            left_key, right_key = self.join_keys(join)[0]
+            presorted = [str(key) for node, key in ((join.left, left_key), (join.right, right_key))
+                         if self.sorted_by(node, key)]
+            detail = f"já ordenado por {', '.join(presorted)}" if presorted else "ordena as duas entradas"
+            return f"Sort-Merge Join ({detail})"
+        if algorithm == 'index_nested_loop':
+            table, column = self.index_lookup(join)
+            return f"Index Nested-Loop (índice em {table}.{column.name})"
+        return "Block Nested-Loop"
+
+
+def normalize_schema(schema):
+    """
+    Normaliza um esquema {tabela: [coluna ou (coluna, tipo), ...]} (formato
+    de db.get_schema) para {tabela: frozenset(colunas)}, em minúsculas.
+    """
+    normalized = {}
+    for table, columns in (schema or {}).items():
+        names = (column[0] if isinstance(column, (tuple, list)) else column for column in columns)
+        normalized[table.lower()] = frozenset(name.lower() for name in names)
+    return normalized
+
+
+def _order_key(column):
+    return ((column.table or '').lower(), column.name.lower())
+
+
+def _range_bound(expr):
+    """(coluna, operador, valor) de uma comparação `coluna op literal` de intervalo, ou None."""
+    if not isinstance(expr, Comparison) or expr.op not in ('<', '<=', '>', '>='):
+        return None
+    left, right, op = expr.left, expr.right, expr.op
+    if isinstance(right, ColumnRef) and isinstance(left, Literal):
+        left, right, op = right, left, _FLIPPED[op]
+    if isinstance(left, ColumnRef) and isinstance(right, Literal) and right.value is not None:
+        return left, op, right.value
+    return None
+
+
+def _range_fraction(stats, op, value):
+    """Fração das linhas com `coluna op valor` segundo as estatísticas, ou None."""
+    if op in ('<', '<='):
+        return stats.less_fraction(value, inclusive=op == '<=')
+    if op in ('>', '>='):
+        below = stats.less_fraction(value, inclusive=op == '>')
+        return None if below is None else max(0.0, 1.0 - stats.null_fraction - below)
+    return None
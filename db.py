@@ -1,11 +1,14 @@
-import mysql.connector
 import os
 
-from dotenv import load_dotenv
-load_dotenv()
-
 
 def get_db_schema(config):
+    # Importado aqui: o driver só é carregado quando o esquema é realmente pedido
+    try:
+        import mysql.connector
+    except ImportError:
+        print("Aviso: mysql-connector-python não está instalado; esquema indisponível.")
+        return None
+
     schema = {}
     try:
         cnx = mysql.connector.connect(**config)
@@ -42,19 +45,168 @@ def get_db_schema(config):
             cnx.close()
 
 
-db_config = {
-    'user': os.getenv('DB_USER'),
-    'password': os.getenv('DB_PASSWORD'),
-    'host': os.getenv('DB_HOST'),
-    'port': int(os.getenv('DB_PORT')),
-    'database': os.getenv('DB_DATABASE')
-}
+def get_db_statistics(config, sample_rows=10_000):
+    """
+    Coleta estatísticas para o modelo de custo: número de linhas e tamanho médio
+    das linhas (information_schema), chave primária e índices e, por coluna,
+    valores distintos, fração de nulos, mínimo/máximo e uma amostra aleatória
+    de até `sample_rows` valores (usada para montar histogramas e a lista de
+    valores mais comuns).
+
+    Returns:
+        dict: {tabela: {'row_count', 'row_bytes', 'primary_key', 'indexes',
+                        'columns': {coluna: {..., 'sample'}}}},
+              ou None se o banco estiver indisponível
+    """
+    try:
+        import mysql.connector
+    except ImportError:
+        print("Aviso: mysql-connector-python não está instalado; estatísticas indisponíveis.")
+        return None
+
+    statistics = {}
+    try:
+        cnx = mysql.connector.connect(**config)
+        cursor = cnx.cursor()
+        db_name = config.get('database')
+
+        cursor.execute(
+            "SELECT TABLE_NAME, TABLE_ROWS, AVG_ROW_LENGTH FROM information_schema.tables "
+            "WHERE table_schema = %s", (db_name,))
+        tables = cursor.fetchall()
+
+        for table_name, _, avg_row_length in tables:
+            cursor.execute(
+                "SELECT COLUMN_NAME FROM information_schema.columns "
+                "WHERE table_schema = %s AND table_name = %s", (db_name, table_name))
+            columns = [row[0] for row in cursor.fetchall()]
+
+            # TABLE_ROWS é apenas uma estimativa no InnoDB: conta as linhas junto
+            # com as estatísticas das colunas
+            aggregates = ["COUNT(*)"]
+            for column in columns:
+                quoted = f"`{column}`"
+                aggregates += [f"COUNT(DISTINCT {quoted})", f"SUM({quoted} IS NULL)",
+                               f"MIN({quoted})", f"MAX({quoted})"]
+            cursor.execute(f"SELECT {', '.join(aggregates)} FROM `{table_name}`")
+            row = cursor.fetchone()
+            row_count = row[0] or 0
+
+            sample = []
+            if row_count and columns:
+                fraction = min(1.0, sample_rows / row_count)
+                cursor.execute(f"SELECT {', '.join(f'`{c}`' for c in columns)} FROM `{table_name}` "
+                               f"WHERE RAND() < {fraction} LIMIT {int(sample_rows)}")
+                sample = cursor.fetchall()
+
+            cursor.execute(
+                "SELECT INDEX_NAME, COLUMN_NAME FROM information_schema.statistics "
+                "WHERE table_schema = %s AND table_name = %s "
+                "ORDER BY INDEX_NAME, SEQ_IN_INDEX", (db_name, table_name))
+            indexes = {}
+            for index_name, column in cursor.fetchall():
+                indexes.setdefault(index_name, []).append(column)
+            primary_key = indexes.pop('PRIMARY', None)
+
+            column_stats = {}
+            for i, column in enumerate(columns):
+                distinct, nulls, min_value, max_value = row[1 + 4 * i: 5 + 4 * i]
+                column_stats[column] = {
+                    'distinct': distinct,
+                    'null_fraction': float(nulls or 0) / row_count if row_count else 0.0,
+                    'min': _plain_value(min_value),
+                    'max': _plain_value(max_value),
+                    'sample': [_plain_value(values[i]) for values in sample],
+                }
+            statistics[table_name] = {
+                'row_count': row_count,
+                'row_bytes': avg_row_length or 100,
+                'primary_key': primary_key,
+                'indexes': list(indexes.values()),
+                'columns': column_stats,
+            }
+
+        return statistics
+
+    except mysql.connector.Error as err:
+        print(f"Error: {err}")
+        return None
+    finally:
+        if 'cnx' in locals() and cnx.is_connected():
+            cursor.close()
+            cnx.close()
+
+
+def _plain_value(value):
+    """Converte valores do driver (Decimal, datas) em tipos simples serializáveis."""
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def _port(value, default=3306):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+_config = None
+
+
+def get_db_config():
+    """
+    Configuração de conexão lida das variáveis de ambiente (e do arquivo .env).
+
+    O .env só é lido na primeira chamada, para não pesar na importação.
+    """
+    global _config
+    if _config is None:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _config = {
+            'user': os.getenv('DB_USER'),
+            'password': os.getenv('DB_PASSWORD'),
+            'host': os.getenv('DB_HOST'),
+            'port': _port(os.getenv('DB_PORT')),
+            'database': os.getenv('DB_DATABASE')
+        }
+    return _config
+
+
+_schema_loaded = False
+_schema = None
+
+
+def get_schema():
+    """
+    Retorna o esquema do banco, conectando-se apenas na primeira chamada.
+
+    Importar este módulo não abre conexão; o resultado (inclusive a falha,
+    representada por None) é memorizado para as chamadas seguintes.
+    """
+    global _schema_loaded, _schema
+    if not _schema_loaded:
+        db_config = get_db_config()
+        _schema = get_db_schema(db_config)
+        _schema_loaded = True
+        if _schema:
+            print("Database schema retrieved successfully.")
+        else:
+            print("Failed to retrieve database schema.")
+            print(f"Configuração de conexão: {db_config}")
+            print("Verifique se o MySQL está rodando e as credenciais estão corretas.")
+    return _schema
 
 
-DB_SCHEMA = get_db_schema(db_config)
-if DB_SCHEMA:
-    print("Database schema retrieved successfully.")
-else:
-    print("Failed to retrieve database schema.")
-    print(f"Configuração de conexão: {db_config}")
-    print("Verifique se o MySQL está rodando e as credenciais estão corretas.")
+def __getattr__(name):
+    # Compatibilidade: `db.db_config` e `db.DB_SCHEMA` continuam disponíveis,
+    # mas carregados sob demanda
+    if name == 'db_config':
+        return get_db_config()
+    if name == 'DB_SCHEMA':
+        return get_schema()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
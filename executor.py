@@ -0,0 +1,1319 @@
+"""
+Execução vetorizada, em memória, das árvores de álgebra relacional sobre
+tabelas carregadas localmente.
+
+As tabelas ficam em colunas NumPy e cada operador processa colunas inteiras
+de uma vez (um lote por operador): a seleção avalia o predicado como uma
+máscara booleana, a projeção só escolhe ou calcula colunas, o ρ troca o nome
+da relação e as junções por igualdade casam chaves ordenando o lado menor e
+fazendo busca binária com o maior. Cada operador registra as linhas que
+produziu e o tempo gasto, para comparar o trabalho do plano otimizado com o
+da árvore original.
+
+StreamingExecutor executa a mesma árvore por iteradores: cada operador é
+um gerador que entrega lotes de tamanho fixo, e pipelines sem operador
+bloqueante não materializam resultados intermediários. Com
+`memory_budget`, as junções por igualdade particionam em disco o que não
+couber na memória (GraceHashJoin).
+
+NULL é representado por None (colunas de objetos) ou NaN (colunas
+numéricas); predicados seguem a lógica de três valores do SQL e só as
+linhas verdadeiras passam por σ e junções.
+
+Uso:
+    db = Database()
+    db.add_table('cliente', {'id': [1, 2], 'nome': ['Ana', 'Rui']})
+    _, tree = converter.convert_to_optimized_tree(sql)
+    result = Executor(db).execute(tree)
+    result.rows(); print(result.format_stats())
+
+    for batch in StreamingExecutor(db, batch_size=1024).iter_batches(tree):
+        ...
+"""
+import csv
+import os
+import pickle
+import re
+import shutil
+import tempfile
+import time
+from itertools import chain
+
+import numpy as np
+
+from plan_nodes import Scan, Rename, Select, Project, Join, Empty
+from predicates import split_conjuncts, conjoin, equi_join_columns
+from sql_parser import (
+    ColumnRef, Literal, Parameter, Star, FunctionCall, Arithmetic, Comparison, InList, IsNull, And, Or, Not,
+)
+from stats_catalog import StatisticsCatalog
+
+# Pares avaliados por bloco no nested loop (junções sem igualdade entre colunas)
+NESTED_LOOP_BLOCK = 1 << 20
+# Linhas por lote no modo por iteradores (StreamingExecutor)
+DEFAULT_BATCH_SIZE = 4096
+# Partições por nível quando a junção hash excede o orçamento de memória
+SPILL_PARTITIONS = 16
+# Níveis de particionamento antes de juntar uma partição mesmo acima do orçamento
+MAX_SPILL_DEPTH = 4
+# Valores por coluna usados para montar histogramas e MCV em Database.statistics
+STATISTICS_SAMPLE = 10_000
+
+AGGREGATES = ('COUNT', 'SUM', 'AVG', 'MIN', 'MAX')
+
+_clock = time.perf_counter
+
+
+class ExecutionError(ValueError):
+    """Erro ao executar um plano (tabela ou coluna inexistente, construção não suportada)."""
+
+
+# =============================================================================
+# Tabelas
+# =============================================================================
+
+class Table:
+    """Tabela carregada em memória, uma coluna NumPy por atributo."""
+
+    def __init__(self, name, columns):
+        """
+        Args:
+            name: Nome da tabela
+            columns: {coluna: valores} (listas ou arrays de mesmo tamanho)
+        """
+        self.name = name
+        self.column_names = list(columns)
+        self.columns = {}
+        lengths = set()
+        for column, values in columns.items():
+            array = _as_column(values)
+            self.columns[column.lower()] = array
+            lengths.add(len(array))
+        if len(lengths) > 1:
+            raise ExecutionError(f"Colunas de tamanhos diferentes na tabela '{name}'.")
+        self.row_count = lengths.pop() if lengths else 0
+
+    @classmethod
+    def from_rows(cls, name, column_names, rows):
+        """Tabela a partir de linhas (sequências na ordem de `column_names`)."""
+        rows = list(rows)
+        return cls(name, {column: [row[i] for row in rows] for i, column in enumerate(column_names)})
+
+    @classmethod
+    def from_csv(cls, name, path, delimiter=','):
+        """
+        Tabela a partir de um CSV com cabeçalho. Números são convertidos e
+        campos vazios viram NULL.
+        """
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f, delimiter=delimiter)
+            header = next(reader)
+            rows = [[_parse_field(value) for value in row] for row in reader]
+        return cls.from_rows(name, header, rows)
+
+    @property
+    def row_bytes(self):
+        """Bytes por linha (itemsize de cada coluna; objetos contam como ponteiros)."""
+        return sum(array.itemsize for array in self.columns.values())
+
+    def __repr__(self):
+        return f"Table({self.name!r}, rows={self.row_count}, columns={self.column_names})"
+
+
+class Database:
+    """Conjunto de tabelas em memória consultadas pelo Executor (nomes sem distinção de caixa)."""
+
+    def __init__(self, tables=None):
+        self.tables = {}
+        for table in tables or ():
+            self.add_table(table)
+
+    def add_table(self, table, columns=None):
+        """Registra uma Table, ou cria uma a partir de `add_table(nome, {coluna: valores})`."""
+        if not isinstance(table, Table):
+            table = Table(table, columns or {})
+        self.tables[table.name.lower()] = table
+        return table
+
+    def load_csv(self, name, path, delimiter=','):
+        return self.add_table(Table.from_csv(name, path, delimiter))
+
+    def table(self, name):
+        table = self.tables.get(name.lower())
+        if table is None:
+            raise ExecutionError(f"Tabela '{name}' não carregada.")
+        return table
+
+    def schema(self):
+        """Esquema {tabela: [colunas]} (ver RelationalAlgebraConverter.set_schema)."""
+        return {table.name: list(table.column_names) for table in self.tables.values()}
+
+    def statistics(self, sample_rows=STATISTICS_SAMPLE, seed=0):
+        """
+        StatisticsCatalog com os dados carregados: linhas, bytes por linha,
+        valores distintos, nulos e mínimo/máximo exatos, e histograma/MCV de
+        uma amostra de até `sample_rows` valores por coluna.
+        """
+        rng = np.random.default_rng(seed)
+        tables = {}
+        for table in self.tables.values():
+            columns = {}
+            for name in table.column_names:
+                values = table.columns[name.lower()]
+                nulls = _null_mask(values)
+                present = values[~nulls]
+                sample = present if len(present) <= sample_rows else rng.choice(present, sample_rows, replace=False)
+                columns[name] = {
+                    'distinct': int(len(_unique(present))),
+                    'null_fraction': float(nulls.mean()) if len(values) else 0.0,
+                    'sample': sample.tolist(),
+                }
+                if len(present):
+                    try:
+                        columns[name]['min'] = _scalar(present.min())
+                        columns[name]['max'] = _scalar(present.max())
+                    except TypeError:
+                        pass
+            tables[table.name] = {'row_count': table.row_count, 'row_bytes': table.row_bytes, 'columns': columns}
+        return StatisticsCatalog.from_dict(tables)
+
+
+# =============================================================================
+# Lotes de colunas
+# =============================================================================
+
+class Batch:
+    """
+    Lote de linhas em colunas: `keys` identifica cada coluna como
+    (relação, coluna) em minúsculas e `labels` guarda o nome para exibição.
+    """
+    __slots__ = ('keys', 'labels', 'arrays', 'length', '_positions')
+
+    def __init__(self, keys, labels, arrays, length):
+        self.keys = list(keys)
+        self.labels = list(labels)
+        self.arrays = list(arrays)
+        self.length = length
+        self._positions = None
+
+    @classmethod
+    def from_table(cls, table):
+        relation = table.name.lower()
+        keys = [(relation, name.lower()) for name in table.column_names]
+        labels = [f"{table.name}.{name}" for name in table.column_names]
+        return cls(keys, labels, [table.columns[key[1]] for key in keys], table.row_count)
+
+    def position(self, ref):
+        """Índice da coluna referenciada por um ColumnRef."""
+        if self._positions is None:
+            by_key, by_name = {}, {}
+            for i, (relation, name) in enumerate(self.keys):
+                by_key.setdefault((relation, name), i)
+                by_name.setdefault(name, []).append(i)
+            self._positions = (by_key, by_name)
+        by_key, by_name = self._positions
+        name = ref.name.lower()
+        if ref.table:
+            position = by_key.get((ref.table.lower(), name))
+            if position is not None:
+                return position
+            # Seleções empurradas para baixo do ρ usam o alias sobre a tabela base
+            if len({relation for relation, _ in self.keys}) > 1:
+                raise ExecutionError(f"Coluna '{ref}' não encontrada.")
+        candidates = by_name.get(name, [])
+        if len(candidates) != 1:
+            problem = "ambígua" if candidates else "não encontrada"
+            raise ExecutionError(f"Coluna '{ref}' {problem}.")
+        return candidates[0]
+
+    def column(self, ref):
+        return self.arrays[self.position(ref)]
+
+    def take(self, index):
+        """Linhas nas posições (ou máscara booleana) `index`."""
+        arrays = [array[index] for array in self.arrays]
+        length = len(arrays[0]) if arrays else int(np.count_nonzero(index) if _is_mask(index) else len(index))
+        return Batch(self.keys, self.labels, arrays, length)
+
+    def slice(self, start, stop):
+        """Linhas [start, stop) sem copiar as colunas."""
+        arrays = [array[start:stop] for array in self.arrays]
+        return Batch(self.keys, self.labels, arrays, max(0, min(stop, self.length) - start))
+
+    @staticmethod
+    def concat(batches):
+        """Lote com as linhas de vários lotes de mesmas colunas, em ordem."""
+        if len(batches) == 1:
+            return batches[0]
+        first = batches[0]
+        arrays = [np.concatenate([batch.arrays[i] for batch in batches]) for i in range(len(first.arrays))]
+        return Batch(first.keys, first.labels, arrays, sum(batch.length for batch in batches))
+
+    def renamed(self, alias):
+        keys = [(alias.lower(), name) for _, name in self.keys]
+        labels = [f"{alias}.{label.rsplit('.', 1)[-1]}" for label in self.labels]
+        return Batch(keys, labels, self.arrays, self.length)
+
+    @staticmethod
+    def joined(left, right, left_index, right_index):
+        """Lote com as colunas dos dois lados para os pares de linhas (left_index[i], right_index[i])."""
+        arrays = [a[left_index] for a in left.arrays] + [a[right_index] for a in right.arrays]
+        return Batch(left.keys + right.keys, left.labels + right.labels, arrays, len(left_index))
+
+
+# =============================================================================
+# Resultado e medidas
+# =============================================================================
+
+class OperatorStats:
+    """
+    Linhas e colunas produzidas e tempo próprio (sem os filhos) de um
+    operador executado; `op` é o símbolo do nó lógico (ex.: 'σ'),
+    `batches` o número de lotes entregues e `spill` as medidas (SpillStats)
+    de uma junção hash que particionou as entradas em disco.
+    """
+    __slots__ = ('op', 'label', 'rows', 'columns', 'elapsed', 'depth', 'batches', 'spill')
+
+    def __init__(self, op, label, rows, columns, elapsed, depth, batches=1, spill=None):
+        self.op = op
+        self.label = label
+        self.rows = rows
+        self.columns = columns
+        self.elapsed = elapsed
+        self.depth = depth
+        self.batches = batches
+        self.spill = spill
+
+    def __repr__(self):
+        return f"OperatorStats({self.label!r}, rows={self.rows}, elapsed={self.elapsed:.6f})"
+
+
+class ExecutionResult:
+    """Colunas do resultado e as medidas de cada operador executado."""
+
+    def __init__(self, labels, arrays, row_count, stats, elapsed):
+        self.labels = labels
+        self.arrays = arrays
+        self.row_count = row_count
+        self.stats = stats
+        self.elapsed = elapsed
+
+    def column(self, label):
+        return self.arrays[self.labels.index(label)]
+
+    def rows(self):
+        """Linhas do resultado como tuplas de valores Python."""
+        return list(zip(*(array.tolist() for array in self.arrays))) if self.arrays else []
+
+    @property
+    def rows_processed(self):
+        """
+        Linhas produzidas pelos operadores (medida do trabalho do plano). ρ
+        não conta: só troca o nome da relação, sem copiar dados.
+        """
+        return sum(stat.rows for stat in self.stats if stat.op != 'ρ')
+
+    @property
+    def values_processed(self):
+        """Valores (linhas × colunas) produzidos pelos operadores, exceto ρ; reflete também as projeções."""
+        return sum(stat.rows * stat.columns for stat in self.stats if stat.op != 'ρ')
+
+    @property
+    def spill_bytes(self):
+        """Bytes gravados em disco pelas junções hash que excederam o orçamento de memória."""
+        return sum(stat.spill.spill_bytes for stat in self.stats if stat.spill is not None)
+
+    def format_stats(self):
+        """Tabela textual com linhas e tempo de cada operador, em pré-ordem."""
+        lines = [f"{'operador':<60} {'linhas':>12} {'tempo':>11}"]
+        for stat in self.stats:
+            label = ('  ' * stat.depth + stat.label)[:60]
+            lines.append(f"{label:<60} {stat.rows:>12} {stat.elapsed * 1000:9.3f}ms")
+            if stat.spill is not None and stat.spill.partitions:
+                lines.append('  ' * (stat.depth + 1) + '↳ ' + stat.spill.summary())
+        lines.append(f"{'total':<60} {self.rows_processed:>12} {self.elapsed * 1000:9.3f}ms")
+        return '\n'.join(lines)
+
+
+# =============================================================================
+# Executor
+# =============================================================================
+
+class Executor:
+    """
+    Executa árvores (PlanNode) sobre um Database, um operador por vez, com
+    cada operador processando colunas inteiras.
+
+    Junções por igualdade (hash_join, sort_merge e index_nested_loop) usam o
+    mesmo núcleo vetorizado: o lado menor é ordenado pela chave e cada chave
+    do lado maior é localizada por busca binária. Com `memory_budget`, elas
+    passam a ser junções hash com particionamento em disco (GraceHashJoin).
+    Junções sem igualdade entre colunas (nested_loop) avaliam a condição
+    sobre blocos do produto cartesiano.
+    """
+
+    def __init__(self, database, nested_loop_block=NESTED_LOOP_BLOCK, memory_budget=None, model=None,
+                 spill_partitions=SPILL_PARTITIONS, spill_dir=None):
+        """
+        Args:
+            database: Database com as tabelas
+            nested_loop_block: Pares avaliados por bloco em junções sem igualdade
+            memory_budget: Bytes para o lado de construção de cada junção por igualdade (None = sem limite)
+            model: CostModel para escolher o lado de construção pelo tamanho estimado
+                   (padrão: o lado menor de fato)
+            spill_partitions: Partições por nível ao exceder o orçamento
+            spill_dir: Diretório dos arquivos temporários (padrão: o do sistema)
+        """
+        self.database = database
+        self.nested_loop_block = nested_loop_block
+        self.memory_budget = memory_budget
+        self.model = model
+        self.spill_partitions = spill_partitions
+        self.spill_dir = spill_dir
+
+    def execute(self, tree):
+        """
+        Executa a árvore (com os literais já ligados, ex.: a árvore otimizada
+        de process_query ou de QueryOptimizer.optimize_tree).
+
+        Returns:
+            ExecutionResult
+        """
+        self._stats = []
+        self._child_time = [0.0]
+        self._spill = None
+        start = _clock()
+        batch = self._run(tree)
+        elapsed = _clock() - start
+        stats, self._stats = self._stats, None
+        # Pré-ordem: a raiz foi registrada por último
+        stats.sort(key=lambda stat: stat[0])
+        return ExecutionResult(batch.labels, batch.arrays, batch.length,
+                               [stat for _, stat in stats], elapsed)
+
+    def _run(self, node):
+        order = len(self._stats)
+        self._stats.append(None)
+        depth = len(self._child_time) - 1
+        self._child_time.append(0.0)
+        start = _clock()
+        batch = self._dispatch(node)
+        elapsed = _clock() - start
+        children = self._child_time.pop()
+        self._child_time[-1] += elapsed
+        # Medidas de disco da junção recém-executada (os filhos já levaram as suas)
+        spill, self._spill = self._spill, None
+        self._stats[order] = (order, OperatorStats(node.op, _label(node), batch.length, len(batch.arrays),
+                                                   elapsed - children, depth, spill=spill))
+        return batch
+
+    def _dispatch(self, node):
+        if isinstance(node, Scan):
+            return Batch.from_table(self.database.table(node.table))
+        if isinstance(node, Rename):
+            return self._run(node.child).renamed(node.alias)
+        if isinstance(node, Select):
+            batch = self._run(node.child)
+            return batch.take(_mask(evaluate(node.condition, batch), batch.length))
+        if isinstance(node, Project):
+            return project(node.columns_list, self._run(node.child))
+        if isinstance(node, Join):
+            return self._join(node, self._run(node.left), self._run(node.right))
+        if isinstance(node, Empty):
+            return Batch([], [], [], 0)
+        raise ExecutionError(f"Operador não suportado na execução: {type(node).__name__}")
+
+    def _join(self, node, left, right):
+        keys, residual = join_keys(node)
+        if not keys:
+            return nested_loop_join(node.condition, left, right, self.nested_loop_block)
+        if self.memory_budget is not None:
+            if self.model is not None:
+                build_side = self.model.hash_build_side(node)
+            else:
+                build_side = 'right' if _nbytes(right) <= _nbytes(left) else 'left'
+            grace = GraceHashJoin(keys, residual, build_side, self.memory_budget,
+                                  partitions=self.spill_partitions, spill_dir=self.spill_dir)
+            batch = Batch.concat(list(grace.join((left,), (right,))))
+            self._spill = grace.stats
+            return batch
+        left_index, right_index = equi_join_indices([left.column(a) for a, _ in keys],
+                                                    [right.column(b) for _, b in keys])
+        batch = Batch.joined(left, right, left_index, right_index)
+        if residual is not None:
+            batch = batch.take(_mask(evaluate(residual, batch), batch.length))
+        return batch
+
+
+class StreamingExecutor:
+    """
+    Execução por iteradores (modelo Volcano): cada operador é um gerador que
+    puxa lotes do filho e entrega lotes de até `batch_size` linhas.
+
+    Cadeias de σ, π e ρ sobre uma leitura não materializam resultados
+    intermediários: a leitura entrega fatias das colunas da tabela e cada
+    operador só guarda o lote corrente, então a memória é proporcional ao
+    tamanho do lote. Os pontos de bloqueio são o lado de construção das
+    junções (o direito, ou o de menor tamanho estimado com `model`; o outro
+    é percorrido em lotes), limitado por `memory_budget` com
+    particionamento em disco (GraceHashJoin), e as agregações, que guardam
+    só o estado parcial. Lotes menores dão a primeira linha mais cedo;
+    maiores diluem o custo por lote.
+    """
+
+    def __init__(self, database, batch_size=DEFAULT_BATCH_SIZE, nested_loop_block=NESTED_LOOP_BLOCK,
+                 memory_budget=None, model=None, spill_partitions=SPILL_PARTITIONS, spill_dir=None):
+        """
+        Args:
+            database: Database com as tabelas
+            batch_size: Linhas por lote entregue por operador
+            nested_loop_block: Pares avaliados por bloco em junções sem igualdade
+            memory_budget: Bytes para o lado de construção de cada junção por igualdade (None = sem limite)
+            model: CostModel para escolher o lado de construção pelo tamanho estimado (padrão: o direito)
+            spill_partitions: Partições por nível ao exceder o orçamento
+            spill_dir: Diretório dos arquivos temporários (padrão: o do sistema)
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size deve ser positivo.")
+        self.database = database
+        self.batch_size = batch_size
+        self.nested_loop_block = nested_loop_block
+        self.memory_budget = memory_budget
+        self.model = model
+        self.spill_partitions = spill_partitions
+        self.spill_dir = spill_dir
+        self.stats = []
+
+    def iter_batches(self, tree):
+        """
+        Gera os lotes do resultado sob demanda. Ao final, `self.stats` tem as
+        medidas de cada operador, em pré-ordem.
+        """
+        self.stats = []
+        self._child_time = [0.0]
+        yield from self._stream(tree, 0)
+
+    def iter_rows(self, tree):
+        """Gera as linhas do resultado como tuplas, lote a lote."""
+        for batch in self.iter_batches(tree):
+            yield from zip(*(array.tolist() for array in batch.arrays))
+
+    def execute(self, tree):
+        """
+        Executa a árvore e junta os lotes do resultado.
+
+        Returns:
+            ExecutionResult
+        """
+        start = _clock()
+        batch = Batch.concat(list(self.iter_batches(tree)))
+        return ExecutionResult(batch.labels, batch.arrays, batch.length, self.stats, _clock() - start)
+
+    def _stream(self, node, depth):
+        stat = OperatorStats(node.op, _label(node), 0, 0, 0.0, depth, batches=0)
+        self.stats.append(stat)
+        return self._measure(self._operator(node, depth, stat), stat)
+
+    def _measure(self, batches, stat):
+        # Tempo próprio: o gasto em next() menos o gasto pelos filhos dentro dele
+        times = self._child_time
+        while True:
+            times.append(0.0)
+            start = _clock()
+            batch = next(batches, None)
+            elapsed = _clock() - start
+            children = times.pop()
+            times[-1] += elapsed
+            stat.elapsed += elapsed - children
+            if batch is None:
+                return
+            stat.rows += batch.length
+            stat.columns = len(batch.arrays)
+            stat.batches += 1
+            yield batch
+
+    def _operator(self, node, depth, stat):
+        # Os filhos são criados aqui (e não dentro dos geradores) para manter as medidas em pré-ordem
+        if isinstance(node, Scan):
+            return self._scan(self.database.table(node.table))
+        if isinstance(node, Empty):
+            return iter((Batch([], [], [], 0),))
+        children = [self._stream(child, depth + 1) for child in node.children]
+        if isinstance(node, Rename):
+            return (batch.renamed(node.alias) for batch in children[0])
+        if isinstance(node, Select):
+            return self._rebatch(batch.take(_mask(evaluate(node.condition, batch), batch.length))
+                                 for batch in children[0])
+        if isinstance(node, Project):
+            if aggregates_only(node.columns_list):
+                return iter((aggregate(node.columns_list, children[0]),))
+            return (project(node.columns_list, batch) for batch in children[0])
+        if isinstance(node, Join):
+            return self._rebatch(self._join(node, stat, *children))
+        raise ExecutionError(f"Operador não suportado na execução: {type(node).__name__}")
+
+    def _scan(self, table):
+        batch = Batch.from_table(table)
+        for start in range(0, max(1, batch.length), self.batch_size):
+            yield batch.slice(start, start + self.batch_size)
+
+    def _join(self, node, stat, left, right):
+        keys, residual = join_keys(node)
+        if not keys:
+            return self._nested_loop(node, left, right)
+        build_side = self.model.hash_build_side(node) if self.model is not None else 'right'
+        grace = GraceHashJoin(keys, residual, build_side, self.memory_budget, partitions=self.spill_partitions,
+                              batch_size=self.batch_size, spill_dir=self.spill_dir)
+        stat.spill = grace.stats
+        return grace.join(left, right)
+
+    def _nested_loop(self, node, left, right):
+        # Bloqueia no lado direito: materializado uma vez, percorrido por lote do esquerdo
+        inner = Batch.concat(list(right))
+        for batch in left:
+            yield nested_loop_join(node.condition, batch, inner, self.nested_loop_block)
+
+    def _rebatch(self, batches):
+        """Junta lotes pequenos (ex.: após um filtro seletivo) e fatia os grandes em lotes de `batch_size`."""
+        size = self.batch_size
+        pending, pending_rows, last, emitted = [], 0, None, False
+        for batch in batches:
+            last = batch
+            if not batch.length:
+                continue
+            pending.append(batch)
+            pending_rows += batch.length
+            if pending_rows < size:
+                continue
+            merged = Batch.concat(pending)
+            start = 0
+            while merged.length - start >= size:
+                yield merged.slice(start, start + size)
+                start += size
+            emitted = True
+            rest = merged.slice(start, merged.length)
+            pending, pending_rows = ([rest], rest.length) if rest.length else ([], 0)
+        if pending:
+            yield Batch.concat(pending)
+        elif not emitted and last is not None:
+            # Resultado vazio: um lote sem linhas ainda leva as colunas para cima
+            yield last
+
+
+# =============================================================================
+# Junção hash com particionamento em disco (Grace)
+# =============================================================================
+
+class SpillStats:
+    """Medidas de disco de uma junção hash: bytes e linhas gravados, partições criadas e níveis usados."""
+    __slots__ = ('spill_bytes', 'spilled_rows', 'partitions', 'depth', 'oversized')
+
+    def __init__(self):
+        self.spill_bytes = 0
+        self.spilled_rows = 0
+        # Pares de partições (construção, consulta) criados, somando todos os níveis
+        self.partitions = 0
+        self.depth = 0
+        # Partições juntadas acima do orçamento por terem atingido o nível máximo
+        self.oversized = 0
+
+    def summary(self):
+        text = (f"{self.partitions} partições em {self.depth} nível(is), "
+                f"{_format_bytes(self.spill_bytes)} em disco ({self.spilled_rows} linhas)")
+        if self.oversized:
+            text += f", {self.oversized} acima do orçamento"
+        return text
+
+    def __repr__(self):
+        return (f"SpillStats(spill_bytes={self.spill_bytes}, partitions={self.partitions}, "
+                f"depth={self.depth}, oversized={self.oversized})")
+
+
+class GraceHashJoin:
+    """
+    Junção por igualdade com orçamento de memória (Grace hash join).
+
+    O lado de construção é acumulado em memória e, enquanto couber em
+    `memory_budget` bytes, vira um JoinIndex consultado lote a lote pelo
+    outro lado. Se o orçamento é excedido, as duas entradas são divididas
+    pelo hash da chave em `partitions` arquivos temporários cada, e cada par
+    de partições é juntado em seguida; a partição de construção que ainda
+    não couber é particionada de novo, com outra função de hash, até
+    `max_depth` níveis (depois disso, chaves repetidas demais são juntadas
+    em memória mesmo acima do orçamento). O tamanho de um lote é o das
+    colunas NumPy; em colunas de objetos (texto) só os ponteiros contam.
+    """
+
+    def __init__(self, keys, residual, build_side='right', memory_budget=None, partitions=SPILL_PARTITIONS,
+                 max_depth=MAX_SPILL_DEPTH, batch_size=DEFAULT_BATCH_SIZE, spill_dir=None):
+        """
+        Args:
+            keys: Pares (coluna da esquerda, coluna da direita) das igualdades (ver join_keys)
+            residual: Restante da condição, avaliado sobre os pares (ou None)
+            build_side: Entrada usada para construir: 'left' ou 'right'
+            memory_budget: Bytes do lado de construção mantidos em memória (None = sem limite)
+            partitions: Partições por nível ao exceder o orçamento
+            max_depth: Níveis máximos de particionamento
+            batch_size: Linhas por lote de saída
+            spill_dir: Diretório dos arquivos temporários (padrão: o do sistema)
+        """
+        if partitions < 2:
+            raise ValueError("São necessárias ao menos 2 partições.")
+        self.residual = residual
+        self.build_side = build_side
+        self.memory_budget = memory_budget
+        self.partitions = partitions
+        self.max_depth = max_depth
+        self.batch_size = batch_size
+        self.spill_dir = spill_dir
+        left_keys, right_keys = [a for a, _ in keys], [b for _, b in keys]
+        if build_side == 'right':
+            self.build_keys, self.probe_keys = right_keys, left_keys
+        else:
+            self.build_keys, self.probe_keys = left_keys, right_keys
+        self.stats = SpillStats()
+        self._directory = None
+
+    def join(self, left, right):
+        """Gera os lotes da junção de `left` e `right` (iteráveis de Batch), com as colunas da esquerda primeiro."""
+        build, probe = (right, left) if self.build_side == 'right' else (left, right)
+        templates = {}
+        emitted = False
+        try:
+            for batch in self._join(_remember_first(build, templates, 'build'),
+                                    _remember_first(probe, templates, 'probe'), 0):
+                emitted = True
+                yield batch
+            if not emitted:
+                # Resultado vazio: um lote sem linhas ainda leva as colunas para cima
+                if 'probe' not in templates:
+                    next(_remember_first(probe, templates, 'probe'), None)
+                empty = np.empty(0, dtype=np.intp)
+                yield self._output(templates['build'], templates['probe'], empty, empty)
+        finally:
+            if self._directory is not None:
+                shutil.rmtree(self._directory, ignore_errors=True)
+                self._directory = None
+
+    def _join(self, build, probe, level):
+        buffered, size = [], 0
+        build = iter(build)
+        for batch in build:
+            buffered.append(batch)
+            size += _nbytes(batch)
+            if self.memory_budget is not None and size > self.memory_budget and level < self.max_depth:
+                yield from self._partitioned(buffered, build, probe, level)
+                return
+        if not buffered:
+            return
+        if self.memory_budget is not None and size > self.memory_budget:
+            self.stats.oversized += 1
+        yield from self._in_memory(Batch.concat(buffered), probe)
+
+    def _in_memory(self, build, probe):
+        index = JoinIndex([build.column(ref) for ref in self.build_keys])
+        if not len(index):
+            return
+        for batch in probe:
+            build_index, probe_index = index.probe([batch.column(ref) for ref in self.probe_keys])
+            for start in range(0, len(probe_index), self.batch_size):
+                stop = start + self.batch_size
+                output = self._output(build, batch, build_index[start:stop], probe_index[start:stop])
+                if output.length:
+                    yield output
+
+    def _partitioned(self, buffered, rest, probe, level):
+        """Particiona as duas entradas em disco e junta partição por partição (nível seguinte)."""
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix='grace_', dir=self.spill_dir)
+        seed = level + 1
+        build_files = _PartitionFiles(self._directory, self.partitions, self.stats)
+        probe_files = _PartitionFiles(self._directory, self.partitions, self.stats)
+        try:
+            for batch in chain(buffered, rest):
+                build_files.write(batch, self._partition_of(batch, self.build_keys, seed))
+            # O lado de construção já está em disco: libera a memória acumulada
+            buffered.clear()
+            build_files.close()
+            if any(build_files.rows):
+                for batch in probe:
+                    probe_files.write(batch, self._partition_of(batch, self.probe_keys, seed))
+            probe_files.close()
+            self.stats.partitions += self.partitions
+            self.stats.depth = max(self.stats.depth, level + 1)
+            for partition in range(self.partitions):
+                if build_files.rows[partition] and probe_files.rows[partition]:
+                    yield from self._join(build_files.read(partition), probe_files.read(partition), level + 1)
+                build_files.remove(partition)
+                probe_files.remove(partition)
+        finally:
+            build_files.remove_all()
+            probe_files.remove_all()
+
+    def _partition_of(self, batch, keys, seed):
+        """Partição de cada linha pelo hash da chave; -1 para chave NULL (não casa)."""
+        hashes = np.zeros(batch.length, dtype=np.uint64)
+        nulls = np.zeros(batch.length, dtype=bool)
+        for ref in keys:
+            values = batch.column(ref)
+            nulls |= _null_mask(values)
+            hashes = hashes * np.uint64(0x100000001B3) ^ _hash_column(values)
+        partition = (_mix(hashes, seed) % np.uint64(self.partitions)).astype(np.int64)
+        partition[nulls] = -1
+        return partition
+
+    def _output(self, build, probe, build_index, probe_index):
+        if self.build_side == 'right':
+            batch = Batch.joined(probe, build, probe_index, build_index)
+        else:
+            batch = Batch.joined(build, probe, build_index, probe_index)
+        if self.residual is not None and batch.length:
+            batch = batch.take(_mask(evaluate(self.residual, batch), batch.length))
+        return batch
+
+
+class _PartitionFiles:
+    """Um arquivo temporário por partição, com os lotes gravados em sequência."""
+
+    def __init__(self, directory, count, stats):
+        self.stats = stats
+        self.rows = [0] * count
+        self.template = None
+        self.paths = []
+        self.files = []
+        for _ in range(count):
+            fd, path = tempfile.mkstemp(dir=directory, suffix='.part')
+            self.paths.append(path)
+            self.files.append(os.fdopen(fd, 'wb'))
+
+    def write(self, batch, partition):
+        if self.template is None:
+            self.template = batch.slice(0, 0)
+        valid = np.flatnonzero(partition >= 0)
+        order = valid[np.argsort(partition[valid], kind='stable')]
+        bounds = np.searchsorted(partition[order], np.arange(len(self.files) + 1))
+        for index, f in enumerate(self.files):
+            rows = order[bounds[index]:bounds[index + 1]]
+            if not len(rows):
+                continue
+            before = f.tell()
+            pickle.dump([array[rows] for array in batch.arrays], f, protocol=pickle.HIGHEST_PROTOCOL)
+            self.stats.spill_bytes += f.tell() - before
+            self.stats.spilled_rows += len(rows)
+            self.rows[index] += len(rows)
+
+    def close(self):
+        for f in self.files:
+            f.close()
+
+    def read(self, partition):
+        """Lotes gravados na partição, lidos sob demanda."""
+        with open(self.paths[partition], 'rb') as f:
+            while True:
+                try:
+                    arrays = pickle.load(f)
+                except EOFError:
+                    return
+                yield Batch(self.template.keys, self.template.labels, arrays, len(arrays[0]))
+
+    def remove(self, partition):
+        path = self.paths[partition]
+        if path is not None:
+            os.remove(path)
+            self.paths[partition] = None
+
+    def remove_all(self):
+        self.close()
+        for partition in range(len(self.paths)):
+            self.remove(partition)
+
+
+def _remember_first(batches, templates, name):
+    """Repassa os lotes guardando em `templates[name]` um lote vazio com as colunas do primeiro."""
+    for batch in batches:
+        if name not in templates:
+            templates[name] = batch.slice(0, 0)
+        yield batch
+
+
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+def _hash_column(values):
+    """
+    Hash (uint64) de cada valor. Números usam os bits do float64, para que
+    3 e 3.0 caiam na mesma partição em colunas numéricas e de objetos.
+    """
+    if values.dtype.kind in 'iuf':
+        return (values.astype(np.float64) + 0.0).view(np.uint64)
+    numbers = _as_numeric(values)
+    hashes = (numbers + 0.0).view(np.uint64)
+    other = np.flatnonzero(np.isnan(numbers))
+    if len(other):
+        hashes[other] = np.fromiter((hash(v) & _MASK64 for v in values[other].tolist()),
+                                    dtype=np.uint64, count=len(other))
+    return hashes
+
+
+def _mix(hashes, seed):
+    """Embaralha os bits (splitmix64), com `seed` diferente a cada nível de particionamento."""
+    x = hashes ^ np.uint64((seed * 0x9E3779B97F4A7C15) & _MASK64)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def join_keys(join):
+    """
+    Separa a condição de uma junção em pares de colunas (esquerda, direita)
+    das igualdades e no restante da condição (ou None).
+    """
+    keys, used = [], set()
+    for a, b in equi_join_columns(join.condition):
+        if a.tables <= join.left.tables and b.tables <= join.right.tables:
+            keys.append((a, b))
+        elif b.tables <= join.left.tables and a.tables <= join.right.tables:
+            keys.append((b, a))
+        else:
+            continue
+        used.add((a, b))
+    residual = [term for term in split_conjuncts(join.condition)
+                if not (isinstance(term, Comparison) and (term.left, term.right) in used)]
+    return keys, conjoin(residual) if residual else None
+
+
+def equi_join_indices(left_keys, right_keys):
+    """
+    Pares de linhas (índices da esquerda, índices da direita) com chaves iguais.
+
+    Linhas com chave NULL não casam. O lado menor vira um JoinIndex e o
+    maior o consulta por busca binária.
+    """
+    if len(right_keys[0]) <= len(left_keys[0]):
+        right_index, left_index = JoinIndex(right_keys).probe(left_keys)
+    else:
+        left_index, right_index = JoinIndex(left_keys).probe(right_keys)
+    return left_index, right_index
+
+
+def nested_loop_join(condition, left, right, block=NESTED_LOOP_BLOCK):
+    """Junção por blocos do produto cartesiano, avaliando a condição (None = produto) em cada bloco."""
+    if condition is None:
+        left_index = np.repeat(np.arange(left.length), right.length)
+        right_index = np.tile(np.arange(right.length), left.length)
+        return Batch.joined(left, right, left_index, right_index)
+    step = max(1, block // max(1, right.length))
+    left_parts, right_parts = [], []
+    for start in range(0, left.length, step):
+        stop = min(left.length, start + step)
+        left_index = np.repeat(np.arange(start, stop), right.length)
+        right_index = np.tile(np.arange(right.length), stop - start)
+        pairs = Batch.joined(left, right, left_index, right_index)
+        keep = _mask(evaluate(condition, pairs), pairs.length)
+        left_parts.append(left_index[keep])
+        right_parts.append(right_index[keep])
+    empty = np.empty(0, dtype=np.intp)
+    return Batch.joined(left, right,
+                        np.concatenate(left_parts) if left_parts else empty,
+                        np.concatenate(right_parts) if right_parts else empty)
+
+
+class JoinIndex:
+    """
+    Lado de construção de uma junção por igualdade: as chaves ordenadas uma
+    vez e consultadas por busca binária, de uma vez ou lote a lote.
+
+    Uma chave numérica simples é usada como está; chaves compostas ou de
+    texto recebem um código inteiro por combinação distinta (dicionário
+    montado com o lado de construção).
+    """
+    __slots__ = ('rows', 'order', 'ordered', 'codes')
+
+    def __init__(self, keys):
+        """
+        Args:
+            keys: Colunas da chave no lado de construção (arrays de mesmo tamanho)
+        """
+        valid = np.ones(len(keys[0]), dtype=bool)
+        for key in keys:
+            valid &= ~_null_mask(key)
+        self.rows = np.flatnonzero(valid)
+        keys = [key[self.rows] for key in keys]
+        if _plain_key(keys):
+            self.codes = None
+            values = keys[0]
+        else:
+            self.codes = {}
+            values = np.fromiter((self.codes.setdefault(key, len(self.codes)) for key in _key_tuples(keys)),
+                                 dtype=np.int64, count=len(self.rows))
+        self.order = np.argsort(values, kind='stable')
+        self.ordered = values[self.order]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def probe(self, keys):
+        """
+        Pares (índices no lado de construção, índices em `keys`) com chaves iguais.
+
+        Args:
+            keys: Colunas da chave do lado que consulta, na mesma ordem do construtor
+        """
+        if self.codes is None:
+            values = keys[0] if _plain_key(keys) else _as_numeric(keys[0])
+        else:
+            values = np.fromiter((-1 if None in key else self.codes.get(key, -1) for key in _key_tuples(keys)),
+                                 dtype=np.int64, count=len(keys[0]))
+        # NULL (NaN) não é encontrado na busca, pois foi retirado do lado de construção
+        low = np.searchsorted(self.ordered, values, side='left')
+        counts = np.searchsorted(self.ordered, values, side='right') - low
+        probe_index = np.repeat(np.arange(len(values)), counts)
+        # Posição de cada par dentro da faixa [low, low + count) da sua chave
+        offsets = np.repeat(low - (np.cumsum(counts) - counts), counts)
+        build_index = self.rows[self.order[offsets + np.arange(len(probe_index))]]
+        return build_index, probe_index
+
+
+def _plain_key(keys):
+    return len(keys) == 1 and keys[0].dtype != object
+
+
+def _as_numeric(values):
+    """Coluna de objetos como float, para buscar em chaves numéricas; o que não é número vira NaN (não casa)."""
+    return np.fromiter((v if isinstance(v, (int, float)) and not isinstance(v, bool) else np.nan
+                        for v in values.tolist()), dtype=float, count=len(values))
+
+
+def _key_tuples(keys):
+    """Chave de cada linha: o valor (uma coluna) ou a tupla de valores (chave composta); NaN vira None."""
+    columns = [np.where(_null_mask(key), None, key.astype(object)) if key.dtype.kind == 'f' else key
+               for key in keys]
+    if len(columns) == 1:
+        return ((value,) for value in columns[0].tolist())
+    return zip(*(column.tolist() for column in columns))
+
+
+# =============================================================================
+# Projeção e expressões
+# =============================================================================
+
+def project(items, batch):
+    """
+    Aplica a lista de itens do SELECT ao lote. Colunas mantêm a identidade
+    (relação, coluna), para que operadores acima continuem encontrando-as;
+    expressões recebem o alias ou o próprio texto como nome. Uma lista só de
+    agregações (COUNT, SUM, AVG, MIN, MAX) produz uma linha.
+    """
+    if aggregates_only(items):
+        return aggregate(items, (batch,))
+
+    keys, labels, arrays = [], [], []
+    for item in items:
+        expr = item.expr
+        if isinstance(expr, Star):
+            for key, label, array in zip(batch.keys, batch.labels, batch.arrays):
+                if expr.table is None or key[0] == expr.table.lower():
+                    keys.append(key)
+                    labels.append(label)
+                    arrays.append(array)
+            continue
+        if isinstance(expr, ColumnRef) and batch.length == 0 and not batch.keys:
+            # Relação vazia (∅): não há colunas de onde tirar o tipo
+            array = np.empty(0, dtype=object)
+        else:
+            array = _broadcast(evaluate(expr, batch), batch.length)
+        if isinstance(expr, ColumnRef) and batch.keys:
+            position = batch.position(expr)
+            keys.append(batch.keys[position])
+            labels.append(item.alias or batch.labels[position])
+        else:
+            label = item.alias or str(expr)
+            keys.append(('', label.lower()))
+            labels.append(label)
+        arrays.append(array)
+    return Batch(keys, labels, arrays, batch.length)
+
+
+def aggregates_only(items):
+    """True se a lista do SELECT só tem agregações; agregações misturadas a colunas são um erro."""
+    aggregates = [isinstance(item.expr, FunctionCall) and item.expr.name.upper() in AGGREGATES
+                  for item in items]
+    if any(aggregates) and not all(aggregates):
+        raise ExecutionError("Agregações misturadas a colunas exigem GROUP BY, que não é suportado.")
+    return bool(aggregates) and all(aggregates)
+
+
+def aggregate(items, batches):
+    """Lote de uma linha com as agregações da lista do SELECT, acumuladas lote a lote."""
+    states = [None] * len(items)
+    for batch in batches:
+        states = [_accumulate(item.expr, state, batch) for item, state in zip(items, states)]
+    labels = [item.alias or str(item.expr) for item in items]
+    return Batch([('', label.lower()) for label in labels], labels,
+                 [np.array([_finalize(item.expr, state)]) for item, state in zip(items, states)], 1)
+
+
+def evaluate(expr, batch):
+    """Valor vetorizado da expressão sobre o lote: array do tamanho do lote ou escalar."""
+    if isinstance(expr, ColumnRef):
+        return batch.column(expr)
+    if isinstance(expr, Literal):
+        return expr.value
+    if isinstance(expr, (Comparison, And, Or, Not, InList, IsNull)):
+        return truth(expr, batch)[0]
+    if isinstance(expr, Arithmetic):
+        left, right = evaluate(expr.left, batch), evaluate(expr.right, batch)
+        if left is None or right is None:
+            return None
+        return _ARITHMETIC[expr.op](np.asarray(left) if np.ndim(left) else left, right)
+    if isinstance(expr, FunctionCall):
+        return _function(expr, batch)
+    if isinstance(expr, Parameter):
+        raise ExecutionError(f"Marcador {expr} sem valor: execute a árvore com os literais ligados.")
+    raise ExecutionError(f"Expressão não suportada na execução: {expr}")
+
+
+def truth(expr, batch):
+    """
+    Valor lógico de um predicado sobre o lote, em três valores: máscaras
+    (verdadeiro, desconhecido). Operandos NULL tornam comparações, LIKE e
+    IN desconhecidos; NOT de desconhecido continua desconhecido, e AND/OR
+    seguem as tabelas do SQL. σ e junções mantêm só as linhas verdadeiras.
+    """
+    length = batch.length
+    if isinstance(expr, Comparison):
+        left, right = evaluate(expr.left, batch), evaluate(expr.right, batch)
+        unknown = _full_mask(_null_mask(left), length) | _full_mask(_null_mask(right), length)
+        if expr.op in ('LIKE', 'NOT LIKE'):
+            matches = _mask(_like(left, right), length) if right is not None else np.zeros(length, dtype=bool)
+            return (matches if expr.op == 'LIKE' else ~matches) & ~unknown, unknown
+        return _mask(_compare(expr.op, left, right), length) & ~unknown, unknown
+    if isinstance(expr, And):
+        true, unknown = np.ones(length, dtype=bool), np.zeros(length, dtype=bool)
+        false = np.zeros(length, dtype=bool)
+        for term in expr.terms:
+            term_true, term_unknown = truth(term, batch)
+            true &= term_true
+            unknown |= term_unknown
+            false |= ~term_true & ~term_unknown
+        return true, unknown & ~false
+    if isinstance(expr, Or):
+        true, unknown = np.zeros(length, dtype=bool), np.zeros(length, dtype=bool)
+        for term in expr.terms:
+            term_true, term_unknown = truth(term, batch)
+            true |= term_true
+            unknown |= term_unknown
+        return true, unknown & ~true
+    if isinstance(expr, Not):
+        true, unknown = truth(expr.term, batch)
+        return ~true & ~unknown, unknown
+    if isinstance(expr, InList):
+        values = evaluate(expr.expr, batch)
+        options = [evaluate(v, batch) for v in expr.values]
+        value_nulls = _full_mask(_null_mask(values), length)
+        constants = [o for o in options if not np.ndim(o)]
+        present = [o for o in constants if not _null_mask(o)]
+        found = _full_mask(np.isin(values, present) if np.ndim(values) else values in present, length)
+        found &= ~value_nulls
+        # Sem correspondência e com NULL na lista (ou valor NULL): desconhecido
+        unknown = value_nulls | (len(present) < len(constants))
+        for option in options:
+            if np.ndim(option):
+                nulls = _null_mask(option)
+                found |= _mask(_compare('=', values, option), length) & ~nulls & ~value_nulls
+                unknown |= nulls
+        unknown &= ~found
+        return (~found & ~unknown if expr.negated else found), unknown
+    if isinstance(expr, IsNull):
+        nulls = _full_mask(_null_mask(evaluate(expr.expr, batch)), length)
+        return (~nulls if expr.negated else nulls), np.zeros(length, dtype=bool)
+    value = evaluate(expr, batch)
+    unknown = _full_mask(_null_mask(value), length)
+    return _mask(value, length) & ~unknown, unknown
+
+
+_ARITHMETIC = {
+    '+': np.add,
+    '-': np.subtract,
+    '*': np.multiply,
+    '/': np.true_divide,
+}
+
+_COMPARISONS = {
+    '=': np.equal,
+    '<>': np.not_equal,
+    '!=': np.not_equal,
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+}
+
+
+def _compare(op, left, right):
+    if left is None or right is None:
+        return False
+    nulls = _null_mask(left) | _null_mask(right)
+    compare = _COMPARISONS[op]
+    if not np.any(nulls):
+        return compare(left, right)
+    # Só compara as posições sem NULL (None não é ordenável)
+    result = np.zeros(len(nulls), dtype=bool)
+    keep = ~nulls
+    result[keep] = compare(left[keep] if np.ndim(left) else left, right[keep] if np.ndim(right) else right)
+    return result
+
+
+def _like(values, pattern):
+    regex = re.compile(''.join('.*' if c == '%' else '.' if c == '_' else re.escape(c) for c in pattern),
+                       re.DOTALL)
+    test = np.frompyfunc(lambda v: v is not None and regex.fullmatch(str(v)) is not None, 1, 1)
+    return test(values).astype(bool) if np.ndim(values) else bool(test(values))
+
+
+def _function(expr, batch):
+    name = expr.name.upper()
+    if name in AGGREGATES:
+        raise ExecutionError(f"Agregação {expr} fora da lista do SELECT.")
+    args = [evaluate(arg, batch) for arg in expr.args]
+    if name in ('UPPER', 'LOWER', 'LENGTH') and len(args) == 1:
+        function = {'UPPER': str.upper, 'LOWER': str.lower, 'LENGTH': len}[name]
+        apply = np.frompyfunc(lambda v: None if v is None else function(v), 1, 1)
+        return apply(args[0])
+    if name == 'ABS' and len(args) == 1:
+        return np.abs(args[0])
+    raise ExecutionError(f"Função não suportada na execução: {expr.name}")
+
+
+def _accumulate(expr, state, batch):
+    """Soma um lote ao estado (linhas contadas, valor parcial) de uma agregação."""
+    count, value = state or (0, None)
+    name = expr.name.upper()
+    if name == 'COUNT' and (not expr.args or isinstance(expr.args[0], Star)):
+        return count + batch.length, None
+    if len(expr.args) != 1:
+        raise ExecutionError(f"Agregação com argumentos inválidos: {expr}")
+    if not batch.keys:
+        # Relação vazia (∅): nada a somar
+        return count, value
+    values = _broadcast(evaluate(expr.args[0], batch), batch.length)
+    values = values[~_null_mask(values)]
+    if not len(values) or name == 'COUNT':
+        return count + len(values), value
+    part = _scalar({'SUM': np.sum, 'AVG': np.sum, 'MIN': np.min, 'MAX': np.max}[name](values))
+    if value is not None:
+        part = {'SUM': value + part, 'AVG': value + part, 'MIN': min(value, part), 'MAX': max(value, part)}[name]
+    return count + len(values), part
+
+
+def _finalize(expr, state):
+    count, value = state or (0, None)
+    name = expr.name.upper()
+    if name == 'COUNT':
+        return count
+    if not count:
+        return None
+    return value / count if name == 'AVG' else value
+
+
+# =============================================================================
+# Auxiliares
+# =============================================================================
+
+def _label(node):
+    """Rótulo curto de um nó para as medidas de execução."""
+    if isinstance(node, Scan):
+        return node.table
+    if isinstance(node, Rename):
+        return f"ρ {node.alias}"
+    if isinstance(node, Select):
+        return f"σ {node.condition}"
+    if isinstance(node, Project):
+        return f"π {node.columns_text}"
+    if isinstance(node, Join):
+        condition = node.condition if node.condition is not None else '×'
+        return f"⨝ {condition}" + (f" [{node.algorithm}]" if node.algorithm else "")
+    return '∅'
+
+
+def _as_column(values):
+    """Array NumPy para uma coluna; NULL em colunas numéricas vira NaN."""
+    if isinstance(values, np.ndarray):
+        return values
+    values = list(values)
+    if any(v is None for v in values):
+        present = [v for v in values if v is not None]
+        if present and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+            return np.array([np.nan if v is None else v for v in values], dtype=float)
+        return np.array(values, dtype=object)
+    if values and all(isinstance(v, str) for v in values):
+        return np.array(values, dtype=object)
+    return np.array(values) if values else np.empty(0, dtype=object)
+
+
+def _parse_field(value):
+    if value == '':
+        return None
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    return value
+
+
+def _null_mask(values):
+    """Máscara de NULLs (None ou NaN); escalares viram bool."""
+    if not np.ndim(values):
+        return values is None or (isinstance(values, float) and values != values)
+    if values.dtype == object:
+        return np.equal(values, None)
+    if values.dtype.kind == 'f':
+        return np.isnan(values)
+    return np.zeros(len(values), dtype=bool)
+
+
+def _mask(value, length):
+    """Máscara booleana do tamanho do lote para o resultado de um predicado."""
+    if np.ndim(value):
+        return np.asarray(value, dtype=bool)
+    return np.full(length, bool(value) if value is not None else False)
+
+
+def _full_mask(value, length):
+    """Máscara do tamanho do lote para um bool escalar ou array."""
+    return np.asarray(value, dtype=bool) if np.ndim(value) else np.full(length, bool(value))
+
+
+def _is_mask(index):
+    return isinstance(index, np.ndarray) and index.dtype == bool
+
+
+def _broadcast(value, length):
+    if np.ndim(value):
+        return value
+    return np.full(length, value, dtype=object if value is None or isinstance(value, str) else None)
+
+
+def _nbytes(batch):
+    return sum(array.nbytes for array in batch.arrays)
+
+
+def _format_bytes(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def _unique(values):
+    try:
+        return np.unique(values)
+    except TypeError:
+        # Tipos não comparáveis entre si
+        return set(values.tolist())
+
+
+def _scalar(value):
+    return value.item() if isinstance(value, np.generic) else value
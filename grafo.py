@@ -0,0 +1,203 @@
+"""
+Construção e layout do grafo de operadores (networkx) a partir das árvores
+de álgebra relacional.
+
+Separado do conversor para que o caminho de parsing/conversão não importe
+networkx nem numpy: este módulo só é carregado quando um grafo é desenhado.
+"""
+import networkx as nx
+import numpy as np
+
+from plan_nodes import Scan, Rename, Select, Project, Join, Empty
+
+
+def build_graph(tree, next_id):
+    """
+    Cria o grafo direcionado de operadores de uma árvore.
+
+    Args:
+        tree: Raiz da árvore (PlanNode)
+        next_id: Função que gera um ID único para cada nó do grafo
+
+    Returns:
+        tuple: (G, root_id, pos_dict, node_colors, node_labels, node_shapes)
+    """
+    G = nx.DiGraph()
+    pos_dict, colors, labels, shapes = {}, {}, {}, {}
+    root_id = add_nodes_to_graph(tree, G, pos_dict, colors, labels, shapes, next_id)
+    return G, root_id, pos_dict, colors, labels, shapes
+
+
+def calculate_improved_positions(G, root_id):
+    """
+    Calcula posições dos nós no grafo usando layout hierárquico melhorado.
+
+    Args:
+        G: Grafo NetworkX
+        root_id: ID do nó raiz
+
+    Returns:
+        dict: Dicionário com posições {node_id: (x, y)}
+    """
+    pos = {}
+    levels = {}
+    queue = [(root_id, 0)]
+    visited = set()
+
+    # BFS para determinar níveis
+    while queue:
+        node, level = queue.pop(0)
+        if node in visited:
+            continue
+        visited.add(node)
+        levels[node] = level
+
+        for child in G.successors(node):
+            queue.append((child, level + 1))
+
+    # Agrupar nós por nível
+    level_nodes = {}
+    for node, level in levels.items():
+        if level not in level_nodes:
+            level_nodes[level] = []
+        level_nodes[level].append(node)
+
+    max_level = max(levels.values()) if levels else 0
+
+    # Posicionar nós em cada nível
+    for level, nodes in level_nodes.items():
+        y = max_level - level
+        if len(nodes) == 1:
+            x_positions = [0]
+        else:
+            width = max(4, len(nodes) * 2)
+            x_positions = np.linspace(-width/2, width/2, len(nodes))
+
+        for i, node in enumerate(nodes):
+            pos[node] = (x_positions[i], y * 2)
+
+    return pos
+
+
+def add_nodes_to_graph(tree_node, G, pos_dict, node_colors, node_labels, node_shapes, next_id, level=0,
+                       node_refs=None):
+    """
+    Adiciona nós recursivamente ao grafo a partir da árvore de álgebra relacional.
+
+    Args:
+        tree_node: Nó da árvore (PlanNode)
+        G: Grafo NetworkX
+        pos_dict: Dicionário de posições
+        node_colors: Dicionário de cores dos nós
+        node_labels: Dicionário de rótulos dos nós
+        node_shapes: Dicionário de formas dos nós
+        next_id: Função que gera um ID único para cada nó do grafo
+        level: Nível atual na hierarquia
+        node_refs: Dicionário opcional preenchido com {node_id: nó da árvore}
+
+    Returns:
+        str: ID do nó atual
+    """
+    current_id = next_id()
+    G.add_node(current_id)
+    pos_dict[current_id] = level
+    if node_refs is not None:
+        node_refs[current_id] = tree_node
+
+    # Caso base: nó folha (tabela ou mensagem de erro)
+    if isinstance(tree_node, (Scan, str)):
+        node_colors[current_id] = 'table'
+        node_labels[current_id] = tree_node.table if isinstance(tree_node, Scan) else tree_node
+        node_shapes[current_id] = 'rect'
+        return current_id
+
+    # Relação vazia (predicado contraditório)
+    if isinstance(tree_node, Empty):
+        node_colors[current_id] = 'table'
+        node_labels[current_id] = '∅'
+        node_shapes[current_id] = 'rect'
+        return current_id
+
+    # Operador de Projeção (π)
+    if isinstance(tree_node, Project):
+        node_colors[current_id] = 'projection'
+        node_labels[current_id] = f'π\n{tree_node.columns_text}'
+        node_shapes[current_id] = 'circle'
+
+    # Operador de Seleção (σ)
+    elif isinstance(tree_node, Select):
+        node_colors[current_id] = 'selection'
+        node_labels[current_id] = f'σ\n{tree_node.condition}'
+        node_shapes[current_id] = 'rect'
+
+    # Operador de Renomeação (ρ)
+    elif isinstance(tree_node, Rename):
+        node_colors[current_id] = 'rename'
+        node_labels[current_id] = f'ρ\nalias: {tree_node.alias}'
+        node_shapes[current_id] = 'rect'
+
+    # Operador de JOIN (⨝)
+    elif isinstance(tree_node, Join):
+        node_colors[current_id] = 'join'
+        node_labels[current_id] = f'JOIN\n{tree_node.condition or ""}'
+        node_shapes[current_id] = 'diamond'
+
+    # Processar subárvores (esquerda e direita, no caso do JOIN)
+    for child in tree_node.children:
+        child_id = add_nodes_to_graph(
+            child, G, pos_dict, node_colors,
+            node_labels, node_shapes, next_id, level + 1, node_refs
+        )
+        G.add_edge(current_id, child_id)
+
+    return current_id
+
+
+def calculate_hierarchical_positions(G, root_id):
+    """
+    Calcula posições hierárquicas alternativas para o grafo.
+
+    Args:
+        G: Grafo NetworkX
+        root_id: ID do nó raiz
+
+    Returns:
+        dict: Dicionário com posições {node_id: (x, y)}
+    """
+    pos = {}
+    levels = {}
+    queue = [(root_id, 0)]
+    visited = set()
+
+    # BFS para determinar níveis
+    while queue:
+        node, level = queue.pop(0)
+        if node in visited:
+            continue
+        visited.add(node)
+        levels[node] = level
+
+        for successor in G.successors(node):
+            if successor not in visited:
+                queue.append((successor, level + 1))
+
+    # Agrupar nós por nível
+    level_nodes = {}
+    for node, level in levels.items():
+        if level not in level_nodes:
+            level_nodes[level] = []
+        level_nodes[level].append(node)
+
+    # Posicionar nós
+    for level, nodes in level_nodes.items():
+        y = -level * 2
+        if len(nodes) == 1:
+            pos[nodes[0]] = (0, y)
+        else:
+            x_spacing = 4
+            total_width = (len(nodes) - 1) * x_spacing
+            start_x = -total_width / 2
+            for i, node in enumerate(nodes):
+                pos[node] = (start_x + i * x_spacing, y)
+
+    return pos
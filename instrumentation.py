@@ -0,0 +1,119 @@
+"""
+Instrumentação leve do pipeline: tempo (relógio monotônico), número de
+chamadas, nós produzidos e avaliações de expressões regulares por etapa.
+
+Cada requisição acumula suas medidas em um Metrics próprio, devolvido junto
+com o resultado; o conversor soma todos eles em um Metrics agregado, que
+pode ser exportado em JSON.
+
+Uso:
+    metrics = Metrics()
+    with metrics.stage('parse') as stage:
+        tokens = tokenize(sql)
+        stage.regex += len(tokens)
+"""
+import json
+import time
+
+_clock = time.perf_counter
+
+
+class StageMetrics:
+    """Totais de uma etapa."""
+    __slots__ = ('calls', 'elapsed', 'nodes', 'regex')
+
+    def __init__(self, calls=0, elapsed=0.0, nodes=0, regex=0):
+        self.calls = calls
+        self.elapsed = elapsed
+        self.nodes = nodes
+        self.regex = regex
+
+    def to_dict(self):
+        return {'calls': self.calls, 'elapsed': self.elapsed, 'nodes': self.nodes, 'regex': self.regex}
+
+
+class _StageTimer:
+    """Contexto devolvido por Metrics.stage; `nodes` e `regex` podem ser incrementados dentro do bloco."""
+    __slots__ = ('_metrics', '_name', '_start', 'nodes', 'regex')
+
+    def __init__(self, metrics, name):
+        self._metrics = metrics
+        self._name = name
+        self.nodes = 0
+        self.regex = 0
+
+    def __enter__(self):
+        self._start = _clock()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._metrics.add(self._name, _clock() - self._start, nodes=self.nodes, regex=self.regex)
+        return False
+
+
+class Metrics:
+    """Medidas por etapa, na ordem em que as etapas aparecem."""
+
+    def __init__(self):
+        self.stages = {}
+
+    def stage(self, name):
+        """Mede o bloco `with` como uma chamada da etapa `name`."""
+        return _StageTimer(self, name)
+
+    def add(self, name, elapsed=0.0, calls=1, nodes=0, regex=0):
+        """Soma uma medida já obtida à etapa `name`."""
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageMetrics()
+        stats.calls += calls
+        stats.elapsed += elapsed
+        stats.nodes += nodes
+        stats.regex += regex
+
+    def merge(self, other):
+        """Acumula as medidas de outro Metrics (ou de seu dicionário, ver to_dict)."""
+        stages = other['stages'] if isinstance(other, dict) else {
+            name: stats.to_dict() for name, stats in other.stages.items()}
+        for name, data in stages.items():
+            self.add(name, data['elapsed'], calls=data['calls'], nodes=data['nodes'], regex=data['regex'])
+
+    def reset(self):
+        self.stages.clear()
+
+    @property
+    def total_elapsed(self):
+        # Etapas "rule:*" são subdivisões de "optimize" e não entram na soma
+        return sum(s.elapsed for name, s in self.stages.items() if ':' not in name)
+
+    def to_dict(self):
+        """Dicionário serializável: {'total_elapsed', 'stages': {etapa: {...}}}."""
+        return {
+            'total_elapsed': self.total_elapsed,
+            'stages': {name: stats.to_dict() for name, stats in self.stages.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        metrics = cls()
+        metrics.merge(data)
+        return metrics
+
+    def to_json(self, indent=2):
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=indent)
+
+    def save_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_json())
+
+    def rows(self):
+        """Linhas (etapa, chamadas, ms, nós, regex) para exibição."""
+        return [(name, s.calls, s.elapsed * 1000, s.nodes, s.regex) for name, s in self.stages.items()]
+
+    def format_summary(self):
+        """Tabela textual com as etapas medidas."""
+        lines = [f"{'etapa':<28} {'chamadas':>8} {'tempo':>11} {'nós':>7} {'regex':>7}"]
+        for name, calls, ms, nodes, regex in self.rows():
+            lines.append(f"{name:<28} {calls:>8} {ms:9.3f}ms {nodes:>7} {regex:>7}")
+        lines.append(f"{'total':<28} {'':>8} {self.total_elapsed * 1000:9.3f}ms")
+        return '\n'.join(lines)
@@ -1,5 +1,5 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
+from tkinter import ttk, scrolledtext, messagebox, filedialog
 import threading
 import sys
 import matplotlib
@@ -10,6 +10,8 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import networkx as nx
 import re
 from conversor import RelationalAlgebraConverter
+from instrumentation import Metrics
+from physical_plan import SeqScan, IndexScan, Filter, Project as PhysicalProject, EmptyResult
 
 # --- Verificação de Dependências ---
 try:
@@ -35,6 +37,7 @@ class ProcessadorConsultasGUI:
         self.converter = RelationalAlgebraConverter()
         self.current_unoptimized_tree = None
         self.current_optimized_tree = None
+        self.current_result = None
         self.current_sql = None
         
         self.node_styles = {
@@ -78,6 +81,28 @@ class ProcessadorConsultasGUI:
                 text_widget = scrolledtext.ScrolledText(frame, height=15, font=('Courier New', 10), relief=tk.SOLID, borderwidth=1)
                 text_widget.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(5, 0))
                 setattr(self, f"{name.lower().replace(' ', '_')}_text", text_widget)
+                if name == "Plano de Execução": self.setup_metrics_panel(frame)
+
+    def setup_metrics_panel(self, plan_frame):
+        """Painel com o tempo e os contadores por etapa (consulta atual e acumulado)."""
+        metrics_frame = ttk.LabelFrame(plan_frame, text="Desempenho", padding="5")
+        metrics_frame.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=(10, 0)); metrics_frame.columnconfigure(0, weight=1)
+        self.metrics_text = scrolledtext.ScrolledText(metrics_frame, height=10, font=('Courier New', 9), relief=tk.SOLID, borderwidth=1)
+        self.metrics_text.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        ttk.Button(metrics_frame, text="Exportar JSON", command=self.exportar_metricas).grid(row=1, column=0, sticky=tk.E, pady=(5, 0))
+
+    def atualizar_painel_metricas(self):
+        self.metrics_text.delete("1.0", tk.END)
+        if self.current_result and self.current_result.get('metrics'):
+            self.metrics_text.insert(tk.END, f"CONSULTA ATUAL:\n{Metrics.from_dict(self.current_result['metrics']).format_summary()}\n\n")
+        self.metrics_text.insert(tk.END, f"ACUMULADO DA SESSÃO:\n{self.converter.metrics.format_summary()}")
+
+    def exportar_metricas(self):
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json")], title="Exportar métricas")
+        if not path: return
+        try:
+            self.converter.metrics.save_json(path)
+        except OSError as e: messagebox.showerror("Erro", f"Falha ao exportar as métricas:\n{e}")
 
     def setup_graph_tab(self, graph_frame):
         graph_frame.columnconfigure(0, weight=1); graph_frame.rowconfigure(1, weight=1)
@@ -172,22 +197,32 @@ class ProcessadorConsultasGUI:
     def processar_consulta(self):
         sql_query = self.sql_entry.get("1.0", tk.END).strip()
         if not sql_query: messagebox.showwarning("Aviso", "Digite uma consulta SQL."); return
-        is_valid, msg = self.query_processor.validate_query(sql_query) if self.query_processor else self.converter.validate_sql_syntax(sql_query)
+        # A sintaxe é verificada pelo conversor, que memoriza a AST; o validador
+        # com esquema reaproveita essa AST em vez de analisar a consulta de novo
+        is_valid, msg = self.converter.validate_sql_syntax(sql_query)
+        if is_valid and self.query_processor:
+            is_valid, msg = self.query_processor.validate_statement(self.converter.get_statement(sql_query))
+            # O esquema do banco resolve colunas sem qualificador nas projeções intermediárias
+            if self.converter.schema is None and self.query_processor.schema:
+                self.converter.set_schema(self.query_processor.schema)
         if not is_valid: messagebox.showerror("Consulta Inválida", f"A consulta não pode ser processada.\n\nMotivo: {msg}"); return
         self.limpar_resultados(); self.álgebra_relacional_text.insert(tk.END, "Processando...")
         threading.Thread(target=self._processar_consulta_thread, args=(sql_query,), daemon=True).start()
 
     def _processar_consulta_thread(self, sql_query):
         try:
-            self.current_unoptimized_tree, self.current_optimized_tree = self.converter.convert_to_optimized_tree(sql_query)
+            result = self.converter.process_query(sql_query)
+            if not result['valid']: raise ValueError(result['error'])
+            self.current_unoptimized_tree, self.current_optimized_tree = result['tree'], result['optimized_tree']
+            self.current_result = result
             self.current_sql = sql_query; self.root.after(0, self.update_ui_after_processing)
         except Exception as e: self.root.after(0, lambda: messagebox.showerror("Erro", f"Falha ao processar a consulta:\n{e}"))
 
     def update_ui_after_processing(self):
         self.álgebra_relacional_text.delete("1.0", tk.END)
-        self.álgebra_relacional_text.insert(tk.END, f"SQL Original:\n{self.current_sql}\n\nExpressão (Não Otimizada):\n{self.converter.convert(self.current_sql)}\n\n{'='*70}\nOTIMIZAÇÕES:\n{self.converter.get_optimization_log()}")
+        self.álgebra_relacional_text.insert(tk.END, f"SQL Original:\n{self.current_sql}\n\nExpressão (Não Otimizada):\n{self.current_result['algebra']}\n\n{'='*70}\nOTIMIZAÇÕES:\n{self.current_result['optimization_log']}")
         self.plano_de_execução_text.delete("1.0", tk.END); self.plano_de_execução_text.insert(tk.END, self._generate_optimized_execution_plan())
-        self.atualizar_grafo_visual(); self.notebook.select(2)
+        self.atualizar_grafo_visual(); self.atualizar_painel_metricas(); self.notebook.select(2)
 
     def atualizar_grafo_visual(self):
         if not self.current_sql: return
@@ -204,10 +239,14 @@ class ProcessadorConsultasGUI:
             G = nx.DiGraph()
             self.converter.node_counter = 0
             pos_dict, colors, labels, shapes = {}, {}, {}, {}
-            root_id = self.converter._add_nodes_to_graph(tree, G, pos_dict, colors, labels, shapes)
+            refs = {}
+            root_id = self.converter._add_nodes_to_graph(tree, G, pos_dict, colors, labels, shapes,
+                                                         node_refs=refs)
             
             # Calcular posições melhoradas com mais espaçamento
-            pos = self._calculate_hierarchical_layout(G, root_id)
+            with self.converter.metrics.stage('graph_layout') as stage:
+                stage.nodes = G.number_of_nodes()
+                pos = self._calculate_hierarchical_layout(G, root_id)
             
             # Armazenar dados do grafo para interatividade
             self.current_graph_data = {
@@ -215,16 +254,20 @@ class ProcessadorConsultasGUI:
                 'pos': pos,
                 'colors': colors,
                 'labels': labels,
-                'shapes': shapes
+                'shapes': shapes,
+                'refs': refs,
+                'physical': self.converter.physical_plan(tree)
             }
             
             # Desenhar grafo
-            self._desenhar_grafo_integrado(G, pos, colors, labels, self.current_sql, title_suffix, badge_color)
-            
-            # Resetar zoom
-            self._reset_zoom()
-            
-            self.graph_canvas.draw()
+            with self.converter.metrics.stage('graph_draw') as stage:
+                stage.nodes = G.number_of_nodes()
+                self._desenhar_grafo_integrado(G, pos, colors, labels, self.current_sql, title_suffix, badge_color)
+                
+                # Resetar zoom
+                self._reset_zoom()
+                
+                self.graph_canvas.draw()
         except Exception as e:
             self.graph_ax.clear()
             self.graph_ax.text(0.5, 0.5, f'Erro ao gerar grafo:\n{str(e)}', 
@@ -688,8 +731,11 @@ class ProcessadorConsultasGUI:
         x, y = pos
         style = self.node_styles.get(node_type, self.node_styles['table'])
         
-        # Criar tooltip estilizado
+        # Criar tooltip estilizado, com o operador físico e suas estimativas
         tooltip_text = f"{style['label']}\n{label}"
+        op = self.current_graph_data['physical'].operator_for(self.current_graph_data['refs'].get(node))
+        if op is not None:
+            tooltip_text += f"\n{self._wrap_label(op.label(), 50)}\n{op.summary()}"
         
         bbox_props = dict(
             boxstyle='round,pad=0.5',
@@ -732,7 +778,7 @@ class ProcessadorConsultasGUI:
         self.limpar_resultados()
     
     def limpar_resultados(self):
-        for widget in [self.validação_sql_text, self.álgebra_relacional_text, self.plano_de_execução_text]:
+        for widget in [self.validação_sql_text, self.álgebra_relacional_text, self.plano_de_execução_text, self.metrics_text]:
             widget.delete("1.0", tk.END)
         self.current_sql = None
         self.current_graph_data = None
@@ -744,60 +790,56 @@ class ProcessadorConsultasGUI:
         
     def _generate_optimized_execution_plan(self):
         """
-        Gera um plano de execução textual FIEL à árvore otimizada,
-        percorrendo-a em pós-ordem.
+        Gera um plano de execução textual FIEL ao plano físico da árvore
+        otimizada, percorrendo seus operadores em pós-ordem.
         """
         plan = f"PLANO DE EXECUÇÃO OTIMIZADO PARA:\n{self.current_sql}\n{'='*80}\n\n"
         
         steps = []
         node_results = {}
+        # Linhas, largura e custo acumulado de cada operador, estimados pelo
+        # catálogo de estatísticas com os literais da consulta
+        physical = self.converter.physical_plan(self.current_optimized_tree)
         
-        def post_order_traversal(tree_node):
-            if isinstance(tree_node, str):
-                node_id = f"Tabela_{tree_node}"
-                steps.append(f"Acessar a tabela base '{tree_node}'.")
-                node_results[id(tree_node)] = node_id
-                return node_id
-            
-            op = tree_node[0]
-            
-            if op in ['π', 'σ', 'ρ']:
-                child_result = post_order_traversal(tree_node[2])
-                step_num = len(steps) + 1
-                
-                if op == 'π':
-                    desc = f"PROJEÇÃO (π): Selecionar as colunas: {self._wrap_label(tree_node[1], 50)}"
-                    steps.append(f"{step_num}. {desc} do resultado de [{child_result}].")
-                elif op == 'σ':
-                    desc = f"SELEÇÃO (σ): Aplicar o filtro: {self._wrap_label(tree_node[1], 50)}"
-                    steps.append(f"{step_num}. {desc} sobre o resultado de [{child_result}].")
-                elif op == 'ρ':
-                    desc = f"RENOMEAR (ρ): Acessar '{tree_node[2]}' e apelidar como '{tree_node[1]}'"
-                    steps.append(f"{step_num}. {desc}.")
-                    child_result = f"Tabela_{tree_node[2]}"
-                
-                result_id = f"Passo_{step_num}"
-                node_results[id(tree_node)] = result_id
-                return result_id
+        def estimate(op):
+            return f"   - Estimativa: {op.summary()}"
+        
+        def table(op):
+            return f"'{op.table}'" + (f" como '{op.alias}'" if op.alias else "")
+        
+        for op in physical.operators():
+            step_num = len(steps) + 1
+            inputs = [node_results[id(child)] for child in op.children]
             
-            elif op == '⨝':
-                left_result = post_order_traversal(tree_node[2])
-                right_result = post_order_traversal(tree_node[3])
-                step_num = len(steps) + 1
-                
-                desc = f"JUNÇÃO (JOIN): Unir os resultados de [{left_result}] e [{right_result}]"
-                cond = f"   - Condição: {tree_node[1]}"
-                algo = "   - Algoritmo: Hash Join (preferencial)"
-                steps.append(f"{step_num}. {desc}\n{cond}\n{algo}")
-
-                result_id = f"Passo_{step_num}"
-                node_results[id(tree_node)] = result_id
-                return result_id
-            return "Nó desconhecido"
+            if isinstance(op, EmptyResult):
+                desc = (f"RELAÇÃO VAZIA (∅): O filtro sobre [{', '.join(sorted(op.relations))}] "
+                        f"é contraditório; nenhuma tabela é lida.")
+            elif isinstance(op, SeqScan):
+                desc = f"LEITURA SEQUENCIAL: Acessar a tabela base {table(op)}."
+            elif isinstance(op, IndexScan):
+                when = " para cada linha da entrada externa" if op.loops > 1 else ""
+                desc = f"LEITURA POR ÍNDICE: Acessar a tabela {table(op)}{when} buscando {op.index_condition}."
+            elif isinstance(op, Filter):
+                desc = (f"SELEÇÃO (σ): Aplicar o filtro: {self._wrap_label(str(op.condition), 50)} "
+                        f"sobre o resultado de [{inputs[0]}].")
+            elif isinstance(op, PhysicalProject):
+                desc = (f"PROJEÇÃO (π): Selecionar as colunas: {self._wrap_label(op.columns, 50)} "
+                        f"do resultado de [{inputs[0]}].")
+            else:
+                desc = (f"JUNÇÃO (JOIN): Unir os resultados de [{inputs[0]}] e [{inputs[1]}]\n"
+                        f"   - Condição: {op.condition or ''}\n"
+                        f"   - Algoritmo: {op.label()}")
+            steps.append(f"{step_num}. {desc}\n{estimate(op)}")
+            node_results[id(op)] = f"Passo_{step_num}"
 
-        post_order_traversal(self.current_optimized_tree)
         plan += "\n".join(steps)
-        plan += f"\n\n{len(steps) + 1}. RESULTADO FINAL: Retornar o resultado do último passo."
+        plan += (f"\n\n{len(steps) + 1}. RESULTADO FINAL: Retornar o resultado do último passo "
+                 f"(~{physical.rows:.0f} linhas, custo total estimado {physical.cost:.1f}).")
+        # Comparação pelo custo estimado, não pelo número de heurísticas aplicadas
+        original = self.converter.physical_plan(self.current_unoptimized_tree)
+        if original.cost > 0:
+            plan += (f"\n\nCusto estimado do plano sem otimização: {original.cost:.1f} "
+                     f"({physical.cost / original.cost:.1%} do original com a otimização).")
         return plan
 
 def main():
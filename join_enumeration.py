@@ -0,0 +1,162 @@
+"""
+Enumeração de ordens de junção por programação dinâmica (DPccp).
+
+As relações de um bloco de junções recebem um bit local cada (0..n-1);
+conjuntos de relações são inteiros. O grafo de junção liga duas relações
+quando alguma condição referencia as duas. A enumeração segue o algoritmo DPccp de
+Moerkotte e Neumann: gera apenas pares (S1, S2) de subgrafos conexos,
+disjuntos e ligados por uma aresta, de modo que nenhum produto cartesiano é
+considerado e árvores "bushy" (os dois lados sendo junções) são permitidas.
+
+A tabela de memorização guarda, para cada conjunto de relações, o plano de
+menor custo segundo o CostModel.
+"""
+from plan_nodes import Join
+from predicates import conjoin
+from relation_sets import RelationBits, iter_bits, bit_count
+
+
+def iter_subsets(mask):
+    """Subconjuntos não vazios de `mask`."""
+    subset = mask
+    while subset:
+        yield subset
+        subset = (subset - 1) & mask
+
+
+def neighborhood(mask, neighbors):
+    """União dos vizinhos das relações em `mask`, sem as próprias relações."""
+    result = 0
+    for i in iter_bits(mask):
+        result |= neighbors[i]
+    return result & ~mask
+
+
+def connected_components(mask, neighbors):
+    """Componentes conexos do subgrafo induzido por `mask`."""
+    components = []
+    while mask:
+        component = mask & -mask
+        frontier = component
+        while frontier:
+            frontier = neighborhood(component, neighbors) & mask & ~component
+            component |= frontier
+        components.append(component)
+        mask &= ~component
+    return components
+
+
+def csg_cmp_pairs(neighbors, mask):
+    """
+    Pares (S1, S2) de subgrafos conexos complementares do grafo restrito a
+    `mask` (que deve ser conexo). Cada par é gerado uma única vez; a ordem
+    S2 ⨝ S1 fica a cargo de quem consome os pares.
+    """
+    order = list(iter_bits(mask))
+    pairs = []
+
+    def below(i):
+        # Relações de `mask` com índice <= i
+        return mask & ((1 << (i + 1)) - 1)
+
+    def emit_csg(s1):
+        x = s1 | below((s1 & -s1).bit_length() - 1)
+        n = neighborhood(s1, neighbors) & mask & ~x
+        for i in reversed(list(iter_bits(n))):
+            s2 = 1 << i
+            pairs.append((s1, s2))
+            enumerate_cmp_rec(s1, s2, x | (below(i) & n))
+
+    def enumerate_csg_rec(s, x):
+        n = neighborhood(s, neighbors) & mask & ~x
+        for subset in iter_subsets(n):
+            emit_csg(s | subset)
+        for subset in iter_subsets(n):
+            enumerate_csg_rec(s | subset, x | n)
+
+    def enumerate_cmp_rec(s1, s2, x):
+        n = neighborhood(s2, neighbors) & mask & ~x
+        for subset in iter_subsets(n):
+            pairs.append((s1, s2 | subset))
+        for subset in iter_subsets(n):
+            enumerate_cmp_rec(s1, s2 | subset, x | n)
+
+    for i in reversed(order):
+        start = 1 << i
+        emit_csg(start)
+        enumerate_csg_rec(start, below(i))
+    return pairs
+
+
+def dp_join_order(relations, conditions, cost_model, relation_bits=None):
+    """
+    Melhor árvore de junções (possivelmente bushy) para as relações dadas.
+
+    Args:
+        relations: Lista de subárvores-relação do bloco
+        conditions: Condições de junção (duas ou mais tabelas)
+        cost_model: CostModel usado para comparar os planos
+        relation_bits: RelationBits da consulta (padrão: bits só das relações do bloco)
+
+    Returns:
+        tuple: (plano, condições não aplicadas, número de pares avaliados)
+    """
+    n = len(relations)
+    if relation_bits is None:
+        relation_bits = RelationBits(frozenset().union(*(rel.tables for rel in relations)))
+    table_masks = [relation_bits.mask(rel.tables) for rel in relations]
+
+    # Máscara de relações (bits locais 0..n-1) referenciadas por cada condição,
+    # a partir dos bitsets de tabelas de cada relação e da condição
+    cond_masks = []
+    for cond in conditions:
+        mask = 0
+        for i, table_mask in enumerate(table_masks):
+            if relation_bits.mask(cond.tables) & table_mask:
+                mask |= 1 << i
+        cond_masks.append(mask)
+
+    neighbors = [0] * n
+    for mask in cond_masks:
+        if mask & (mask - 1):
+            # A condição liga entre si todas as relações que referencia
+            for i in iter_bits(mask):
+                neighbors[i] |= mask & ~(1 << i)
+
+    memo = {1 << i: (cost_model.estimate(rel).cost, rel) for i, rel in enumerate(relations)}
+    evaluated = 0
+
+    def join_conditions(s1, s2):
+        union = s1 | s2
+        return [cond for cond, mask in zip(conditions, cond_masks)
+                if mask & s1 and mask & s2 and not mask & ~union]
+
+    components = connected_components((1 << n) - 1, neighbors)
+    plans = []
+    for component in components:
+        pairs = csg_cmp_pairs(neighbors, component)
+        # Conjuntos menores primeiro: os planos das duas metades já são ótimos
+        pairs.sort(key=lambda pair: bit_count(pair[0] | pair[1]))
+        for s1, s2 in pairs:
+            condition = conjoin(join_conditions(s1, s2))
+            for left, right in ((s1, s2), (s2, s1)):
+                plan = Join(condition, memo[left][1], memo[right][1])
+                cost = cost_model.estimate(plan).cost
+                evaluated += 1
+                best = memo.get(s1 | s2)
+                if best is None or cost < best[0]:
+                    memo[s1 | s2] = (cost, plan)
+        plans.append(memo[component][1])
+
+    # Componentes sem condições entre si: produto cartesiano, menores primeiro
+    plans.sort(key=cost_model.rows)
+    plan = plans[0]
+    for other in plans[1:]:
+        plan = Join(None, plan, other)
+
+    applied = set()
+    for cond, mask in zip(conditions, cond_masks):
+        if mask & (mask - 1) and any(not mask & ~component for component in components):
+            applied.add(cond)
+    unapplied = [cond for cond in conditions if cond not in applied]
+    return plan, unapplied, evaluated
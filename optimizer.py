@@ -1,31 +1,98 @@
-import re
-import copy
+from plan_nodes import Scan, Rename, Select, Project, Join, Empty, from_tuple
+from predicates import (
+    split_conjuncts, conjoin, transitive_predicates, disjunction_predicates, simplify_condition,
+)
+from sql_parser import Star
+from cost_model import CostModel
+from join_enumeration import dp_join_order
+from relation_sets import RelationBits, is_subset, bit_count
+from rule_engine import Rule, RuleEngine, DEFAULT_MAX_ITERATIONS
+
+# Acima deste número de relações em um bloco de junções, a enumeração por
+# programação dinâmica dá lugar à heurística gulosa
+MAX_DP_RELATIONS = 10
 
 class QueryOptimizer:
-    def __init__(self):
+    def __init__(self, catalog=None, max_dp_relations=MAX_DP_RELATIONS, max_iterations=DEFAULT_MAX_ITERATIONS,
+                 schema=None):
         self.optimization_log = []
+        # Bits das relações da consulta em otimização (ver relation_sets)
+        self.relation_bits = RelationBits()
+        # Cardinalidades e custos vêm do catálogo de estatísticas (vazio = valores padrão);
+        # o esquema atribui colunas sem qualificador às tabelas
+        self.cost_model = CostModel(catalog, schema=schema)
+        # Blocos com mais relações que isso usam a reordenação gulosa
+        self.max_dp_relations = max_dp_relations
+        # Cada heurística é uma regra; o motor as aplica até o ponto fixo
+        self.engine = RuleEngine(self._default_rules(), max_iterations=max_iterations)
+    
+    def _default_rules(self):
+        return [
+            Rule('selection_pushdown', "Push-down de Seleções (σ)",
+                 apply=lambda tree, _: self._apply_selection_pushdown(tree)),
+            Rule('projection_pushdown', "Push-down de Projeções (π)",
+                 apply=lambda tree, _: self._apply_projection_pushdown(tree)),
+            Rule('predicate_simplification', "Simplificação de Predicados",
+                 apply=lambda tree, _: self._apply_predicate_simplification(tree)),
+            Rule('predicate_closure', "Fecho Transitivo de Predicados",
+                 apply=lambda tree, _: self._apply_predicate_closure(tree),
+                 match=lambda tree, _: self._has_join(tree),
+                 skip_message="Nenhum JOIN para derivar predicados."),
+            Rule('or_pushdown', "Predicados Implicados por Disjunções (OR)",
+                 apply=lambda tree, _: self._apply_or_pushdown(tree),
+                 match=lambda tree, _: self._has_join(tree),
+                 skip_message="Nenhum JOIN para derivar predicados."),
+            Rule('join_reordering', "Reordenação de JOINs",
+                 apply=lambda tree, _: self._apply_join_reordering(tree),
+                 match=lambda tree, _: self._has_unordered_join_block(tree),
+                 skip_message="Nenhum JOIN encontrado para reordenar."),
+            Rule('join_algorithms', "Seleção de Algoritmos Eficientes",
+                 apply=lambda tree, _: self._select_efficient_algorithms(tree),
+                 match=lambda tree, _: self._has_unannotated_join(tree),
+                 skip_message="Nenhuma junção para escolher o algoritmo."),
+        ]
+    
+    @property
+    def rules(self):
+        """Regras registradas, na ordem de aplicação."""
+        return self.engine.rules
+    
+    def register_rule(self, rule, before=None, after=None):
+        """Registra uma nova regra de reescrita (ver rule_engine.Rule)."""
+        return self.engine.register(rule, before=before, after=after)
+    
+    def set_statistics(self, catalog):
+        """Troca o catálogo de estatísticas usado nas estimativas."""
+        self.cost_model = CostModel(catalog, schema=self.cost_model.schema)
+    
+    def set_schema(self, schema):
+        """Troca o esquema ({tabela: [colunas]}) usado pelas projeções intermediárias."""
+        self.cost_model = CostModel(self.cost_model.catalog, schema=schema)
     
     def optimize_tree(self, tree):
         """
-        Aplica todas as heurísticas de otimização na árvore.
+        Aplica as regras de otimização na árvore até o ponto fixo.
         """
         self.optimization_log = []
+        self.cost_model.clear()
         self.optimization_log.append("=== INICIANDO OTIMIZAÇÃO DA CONSULTA ===")
         
-        optimized_tree = copy.deepcopy(tree)
-        
-        # Cada função agora é responsável pelo seu próprio log, de forma controlada.
-        optimized_tree = self._apply_selection_pushdown(optimized_tree)
-        optimized_tree = self._apply_projection_pushdown(optimized_tree)
-        optimized_tree = self._apply_join_reordering(optimized_tree)
-        optimized_tree = self._select_efficient_algorithms(optimized_tree)
+        # Os nós são imutáveis: as regras constroem novas árvores sem
+        # precisar copiar a original.
+        tree = from_tuple(tree)
+        # Um bit por relação desta consulta, sem estado compartilhado entre otimizações
+        self.relation_bits = RelationBits.of(tree)
+        optimized_tree = self.engine.run(tree, self)
         
         self.optimization_log.append("\n=== OTIMIZAÇÃO CONCLUÍDA ===")
         return optimized_tree
+    
+    def get_rule_trace(self):
+        """Execuções de regras da última otimização (lista de RuleFiring)."""
+        return list(self.engine.trace)
 
     def _apply_selection_pushdown(self, tree):
         """HEURÍSTICA 1: Push-down de seleções (σ)"""
-        self.optimization_log.append("\n[HEURÍSTICA 1] Push-down de Seleções (σ):")
         # A função _recursive_selection_pushdown fará o trabalho e retornará a árvore modificada
         # e um booleano indicando se alguma otimização foi realmente aplicada.
         optimized_tree, was_optimized = self._recursive_selection_pushdown(tree)
@@ -39,346 +106,524 @@ class QueryOptimizer:
         return optimized_tree
 
     def _recursive_selection_pushdown(self, tree):
-        if isinstance(tree, str):
+        if isinstance(tree, Scan):
             return tree, False # Retorna a árvore e um flag "não otimizado"
         
-        operator = tree[0]
-        
-        if operator == 'σ':
-            condition = tree[1]
-            subtree = tree[2]
+        if isinstance(tree, Select):
             # O trabalho real de empurrar a seleção acontece aqui
-            pushed_tree = self._push_selection_down(condition, subtree)
+            pushed_tree = self._push_selection_down(tree.condition, tree.child)
             return pushed_tree, True # Foi otimizado
         
         # Chamadas recursivas
-        if operator in ['π', 'ρ']:
-            optimized_subtree, was_opt = self._recursive_selection_pushdown(tree[2])
-            return (operator, tree[1], optimized_subtree), was_opt
-        elif operator == '⨝':
-            left, left_opt = self._recursive_selection_pushdown(tree[2])
-            right, right_opt = self._recursive_selection_pushdown(tree[3])
-            return ('⨝', tree[1], left, right), left_opt or right_opt
+        if isinstance(tree, (Project, Rename)):
+            optimized_subtree, was_opt = self._recursive_selection_pushdown(tree.child)
+            return tree.with_children(optimized_subtree), was_opt
+        elif isinstance(tree, Join):
+            left, left_opt = self._recursive_selection_pushdown(tree.left)
+            right, right_opt = self._recursive_selection_pushdown(tree.right)
+            return tree.with_children(left, right), left_opt or right_opt
             
         return tree, False
 
     def _push_selection_down(self, condition, tree):
-        if isinstance(tree, str):
-            return ('σ', condition, tree)
-        
-        operator = tree[0]
+        if isinstance(tree, Scan):
+            return Select(condition, tree)
         
-        if operator == '⨝':
-            join_condition, left_tree, right_tree = tree[1], tree[2], tree[3]
+        if isinstance(tree, Join):
+            left_tree, right_tree = tree.left, tree.right
             conditions = self._split_conditions(condition)
             left_conditions, right_conditions, join_conditions = [], [], []
+            # Bitsets de tabelas relativos às relações da consulta
+            left_mask = self._mask(left_tree)
+            right_mask = self._mask(right_tree)
             
             for cond in conditions:
-                tables_in_cond = self._get_tables_in_condition(cond)
-                left_tables = self._get_all_tables(left_tree)
-                right_tables = self._get_all_tables(right_tree)
+                cond_mask = self._mask(cond)
                 
-                if tables_in_cond and tables_in_cond.issubset(left_tables):
+                if cond_mask and is_subset(cond_mask, left_mask):
                     left_conditions.append(cond)
-                elif tables_in_cond and tables_in_cond.issubset(right_tables):
+                elif cond_mask and is_subset(cond_mask, right_mask):
                     right_conditions.append(cond)
                 else:
                     join_conditions.append(cond)
             
             if left_conditions:
-                left_tree = self._push_selection_down(' ∧ '.join(left_conditions), left_tree)
+                left_tree = self._push_selection_down(conjoin(left_conditions), left_tree)
             if right_conditions:
-                right_tree = self._push_selection_down(' ∧ '.join(right_conditions), right_tree)
+                right_tree = self._push_selection_down(conjoin(right_conditions), right_tree)
             
-            result = ('⨝', join_condition, left_tree, right_tree)
+            result = tree.with_children(left_tree, right_tree)
             if join_conditions:
-                result = ('σ', ' ∧ '.join(join_conditions), result)
+                result = Select(conjoin(join_conditions), result)
             return result
         
-        if operator in ['π', 'ρ']:
-            return (operator, tree[1], self._push_selection_down(condition, tree[2]))
+        if isinstance(tree, (Project, Rename)):
+            return tree.with_children(self._push_selection_down(condition, tree.child))
         
-        if operator == 'σ': # Combina condições se encontrar outra seleção
-            return self._push_selection_down(f"{condition} ∧ {tree[1]}", tree[2])
+        if isinstance(tree, Select): # Combina condições se encontrar outra seleção
+            return self._push_selection_down(conjoin([condition, tree.condition]), tree.child)
             
-        return ('σ', condition, tree)
+        return Select(condition, tree)
 
     def _apply_projection_pushdown(self, tree):
         """HEURÍSTICA 2: Push-down de projeções (π)"""
-        self.optimization_log.append("\n[HEURÍSTICA 2] Push-down de Projeções (π):")
         
-        optimized_tree, was_optimized = self._recursive_projection_pushdown(tree, [])
+        optimized_tree, pruned, blocked = self._recursive_projection_pushdown(tree)
         
-        if was_optimized:
+        if optimized_tree != tree:
+            for relation, columns, before, after in pruned:
+                width = f" (~{before:.0f} B → ~{after:.0f} B por linha)" if after < before else ""
+                self.optimization_log.append(f"  • π sobre {relation}: {columns}{width}")
             self.optimization_log.append("  ✓ Projeções intermediárias inseridas para eliminar colunas desnecessárias.")
             self.optimization_log.append("    → Benefício: Reduz a largura das tuplas e o uso de memória.")
+        elif pruned:
+            self.optimization_log.append("  - Projeções intermediárias já mantêm só as colunas necessárias.")
         else:
-             self.optimization_log.append("  - Nenhuma projeção (cláusula SELECT) para otimizar ou SELECT * foi usado.")
+            self.optimization_log.append("  - Nenhuma projeção (cláusula SELECT) para otimizar ou SELECT * foi usado.")
+        if blocked:
+            self.optimization_log.append(f"  - Sem projeção em {', '.join(sorted(blocked))}: coluna sem qualificador "
+                                         f"não encontrada no esquema.")
         
         return optimized_tree
 
-    def _recursive_projection_pushdown(self, tree, required_cols):
-        if isinstance(tree, str):
-            return tree, False
+    def _recursive_projection_pushdown(self, tree):
+        """
+        Insere um π acima de cada relação base (tabela com seus ρ e σ) que
+        mantém só as colunas usadas acima dela: as da projeção final e as das
+        condições de seleção e junção. Colunas sem qualificador são atribuídas
+        pelo esquema; se uma delas não puder ser atribuída, as relações que
+        poderiam tê-la ficam sem π.
 
-        operator = tree[0]
-
-        if operator == 'π':
-            current_cols = self._parse_columns(tree[1])
-            # Coleta todas as colunas necessárias abaixo desta projeção
-            all_required = self._collect_required_columns(tree[2], current_cols)
-            # Empurra as projeções para baixo
-            new_subtree, _ = self._recursive_projection_pushdown(tree[2], all_required)
-            return ('π', tree[1], new_subtree), True
-
-        # Para outros operadores, continua a busca por uma projeção
-        if operator in ['σ', 'ρ']:
-            new_subtree, was_opt = self._recursive_projection_pushdown(tree[2], required_cols)
-            return (operator, tree[1], new_subtree), was_opt
-        elif operator == '⨝':
-            join_cols = self._get_columns_in_condition(tree[1])
-            all_cols = list(set(required_cols) | set(join_cols))
-            left, left_opt = self._recursive_projection_pushdown(tree[2], all_cols)
-            right, right_opt = self._recursive_projection_pushdown(tree[3], all_cols)
-            return ('⨝', tree[1], left, right), left_opt or right_opt
+        As projeções intermediárias existentes são recalculadas, então aplicar
+        a regra de novo não empilha projeções.
 
-        return tree, False
+        Returns:
+            tuple: (nova árvore, [(relação, colunas, largura antes, largura depois)],
+                    relações sem π por colunas não resolvidas)
+        """
+        pruned, blocked = [], set()
+        if not isinstance(tree, Project) or any(isinstance(item.expr, Star) and item.expr.table is None
+                                                 for item in tree.columns_list):
+            return tree, pruned, blocked
+
+        relations = self._base_relations(tree.child)
+        owners = {}
+        for column in self._unqualified_columns(tree):
+            tables = [name for name, table in relations
+                      if column.name.lower() in (self.cost_model.table_columns(table) or ())]
+            unknown = [name for name, table in relations if self.cost_model.table_columns(table) is None]
+            if len(tables) == 1 and not unknown:
+                owners[column] = tables[0]
+            else:
+                blocked.update(tables + unknown)
+        # `t.*` mantém todas as colunas de t
+        blocked.update(item.expr.table.lower() for item in tree.columns_list if isinstance(item.expr, Star))
+
+        def owned(columns, name):
+            kept = {}
+            for column in columns:
+                owner = column.table.lower() if column.table else owners.get(column)
+                if owner == name:
+                    kept.setdefault(column.name.lower(), column)
+            return sorted(kept.values(), key=str)
+
+        def prune(node, required, below_root=False):
+            if isinstance(node, Project):
+                # Projeção intermediária de uma aplicação anterior: recalculada
+                return prune(node.child, required, below_root)
+            relation = self._base_relation(node)
+            if relation is not None:
+                if below_root:
+                    # A projeção final já fica logo acima: outro π só copiaria as colunas
+                    return node
+                name, table = relation
+                columns = owned(required, name)
+                schema_columns = self.cost_model.table_columns(table)
+                if name in blocked or not columns or (
+                        schema_columns and {c.name.lower() for c in columns} >= schema_columns):
+                    return node
+                projection = Project(columns, node)
+                pruned.append((name, ', '.join(str(c) for c in columns),
+                               self.cost_model.estimate(node).row_bytes,
+                               self.cost_model.estimate(projection).row_bytes))
+                return projection
+            if isinstance(node, (Select, Join)) and node.condition is not None:
+                required = required | node.condition.columns
+            if not node.children:
+                return node
+            return node.with_children(*[prune(child, required) for child in node.children])
+
+        required = frozenset(column for item in tree.columns_list for column in item.columns)
+        return tree.with_children(prune(tree.child, required, below_root=True)), pruned, blocked
+
+    def _base_relation(self, node):
+        """(nome visível em minúsculas, tabela) se `node` for uma tabela sob ρ/σ, senão None."""
+        name = None
+        while isinstance(node, (Select, Rename)):
+            if isinstance(node, Rename) and name is None:
+                name = node.alias
+            node = node.child
+        if not isinstance(node, Scan):
+            return None
+        return (name or node.table).lower(), node.table
+
+    def _base_relations(self, tree):
+        relation = self._base_relation(tree)
+        if relation is not None:
+            return [relation]
+        return [r for child in tree.children for r in self._base_relations(child)]
+
+    def _unqualified_columns(self, tree):
+        """Colunas sem qualificador usadas em projeções e condições da árvore."""
+        columns = set()
+        if isinstance(tree, Project):
+            columns.update(c for item in tree.columns_list for c in item.columns)
+        elif isinstance(tree, (Select, Join)) and tree.condition is not None:
+            columns.update(tree.condition.columns)
+        for child in tree.children:
+            columns.update(self._unqualified_columns(child))
+        return {column for column in columns if not column.table}
     
+    def _apply_predicate_simplification(self, tree):
+        """HEURÍSTICA 3: Avaliação de constantes, remoção de redundâncias e contradições"""
+        new_tree, notes = self.simplify_predicates(tree)
+        if not notes:
+            self.optimization_log.append("  - Nenhum predicado redundante ou contraditório.")
+            return new_tree
+        self.optimization_log.extend(notes)
+        self.optimization_log.append("  ✓ Predicados normalizados; subárvores contraditórias trocadas pela relação vazia (∅).")
+        self.optimization_log.append("    → Benefício: Menos comparações por tupla e nenhuma leitura sob um filtro impossível.")
+        return new_tree
+
+    def simplify_predicates(self, tree):
+        """
+        Simplifica as condições de todas as seleções e junções da árvore
+        (ver predicates.simplify_condition). Uma condição contraditória troca
+        a subárvore por Empty, que se propaga por ρ, σ, ⨝ e projeções
+        intermediárias até a projeção final.
+
+        Usada como regra e, pelo conversor, depois de ligar os literais a um
+        plano em cache, quando os valores passam a ser conhecidos.
+
+        Returns:
+            tuple: (nova árvore, linhas de log descrevendo cada alteração)
+        """
+        notes = []
+
+        def simplify(node):
+            if not node.children:
+                return node
+            children = [simplify(child) for child in node.children]
+            if isinstance(node, (Select, Join)):
+                condition, contradictory = simplify_condition(node.condition)
+                if contradictory:
+                    notes.append(f"  • Contradição: {node.condition} ⇒ ∅")
+                    return Empty(node.tables)
+                if condition != node.condition:
+                    notes.append(f"  • {node.condition}  →  {condition if condition is not None else 'sem condição'}")
+            # Só a projeção final permanece sobre ∅: as intermediárias (ver
+            # _apply_projection_pushdown) somem junto com a relação vazia
+            if not any(isinstance(child, Empty) for child in children) or (isinstance(node, Project) and node is tree):
+                if isinstance(node, Select):
+                    return Select(condition, children[0]) if condition is not None else children[0]
+                if isinstance(node, Join):
+                    if condition != node.condition:
+                        # Os filtros empurrados se juntam aos dos filhos: simplifica de novo
+                        joined, nested = self.simplify_predicates(
+                            self._join_with_local_filters(condition, *children, node.algorithm))
+                        notes.extend(note for note in nested if "⇒ ∅" in note)
+                        return joined
+                    return Join(condition, *children, node.algorithm)
+                return node.with_children(*children)
+            # Seleção, renomeação ou junção sobre uma relação vazia também é vazia
+            return Empty(node.tables)
+
+        return simplify(tree), notes
+
+    def _join_with_local_filters(self, condition, left, right, algorithm):
+        """
+        JOIN com a condição dada, empurrando para cada lado os termos que só
+        referenciam aquele lado (ex.: um termo comum fatorado de um OR).
+        """
+        local = {'left': [], 'right': []}
+        join_terms = []
+        left_mask, right_mask = self._mask(left), self._mask(right)
+        for term in self._split_conditions(condition):
+            term_mask = self._mask(term)
+            if term_mask and is_subset(term_mask, left_mask):
+                local['left'].append(term)
+            elif term_mask and is_subset(term_mask, right_mask):
+                local['right'].append(term)
+            else:
+                join_terms.append(term)
+        if local['left']:
+            left = self._push_selection_down(conjoin(local['left']), left)
+        if local['right']:
+            right = self._push_selection_down(conjoin(local['right']), right)
+        return Join(conjoin(join_terms), left, right, algorithm)
+
+    def _apply_predicate_closure(self, tree):
+        """HEURÍSTICA 4: Fecho transitivo das igualdades entre colunas"""
+        new_tree, derived = self._close_join_blocks(tree, transitive_predicates)
+        if not derived:
+            self.optimization_log.append("  - Nenhum predicado novo implicado pelas igualdades entre colunas.")
+            return new_tree
+        for term in derived:
+            self.optimization_log.append(f"  • Predicado derivado: {term}")
+        self.optimization_log.append("  ✓ Filtros replicados para todas as colunas de cada classe de equivalência.")
+        self.optimization_log.append("    → Benefício: Os dois lados são filtrados antes do JOIN (tabelas de hash menores).")
+        return new_tree
+
+    def _apply_or_pushdown(self, tree):
+        """HEURÍSTICA 5: Predicados por relação implicados por ORs entre relações"""
+        new_tree, derived = self._close_join_blocks(
+            tree, lambda conditions: disjunction_predicates(conditions, self.relation_bits))
+        if not derived:
+            self.optimization_log.append("  - Nenhuma disjunção (OR) entre relações com filtro em todos os ramos.")
+            return new_tree
+        for term in derived:
+            self.optimization_log.append(f"  • Predicado implicado: {term}")
+        self.optimization_log.append("  ✓ Filtros por relação extraídos dos ORs; o OR original continua acima do JOIN.")
+        self.optimization_log.append("    → Benefício: Cada relação é filtrada antes do JOIN, mesmo com condições em OR.")
+        return new_tree
+
+    def _close_join_blocks(self, tree, derive):
+        """
+        Em cada bloco de junções, deriva predicados implicados pelas condições
+        do bloco com `derive` (ex.: predicates.transitive_predicates) e os
+        empurra até as relações que eles referenciam.
+
+        Returns:
+            tuple: (nova árvore, lista de predicados derivados)
+        """
+        if self._is_join_block(tree):
+            derived = derive(self._collect_conditions(tree))
+            if derived:
+                return self._push_selection_down(conjoin(derived), tree), derived
+            return tree, []
+        if not tree.children:
+            return tree, []
+        results = [self._close_join_blocks(child, derive) for child in tree.children]
+        return tree.with_children(*[r[0] for r in results]), [t for r in results for t in r[1]]
+
+    def _collect_conditions(self, tree):
+        """Termos conjuntivos de todas as seleções e junções da subárvore."""
+        terms = []
+        if isinstance(tree, (Select, Join)):
+            terms.extend(self._split_conditions(tree.condition))
+        for child in tree.children:
+            terms.extend(self._collect_conditions(child))
+        return terms
+
     def _apply_join_reordering(self, tree):
-        """HEURÍSTICA 3: Reordenação de JOINs (implementação simples e segura)"""
-        self.optimization_log.append("\n[HEURÍSTICA 3] Reordenação de JOINs:")
-        # Funções auxiliares locais
-        def is_join_node(n):
-            return not isinstance(n, str) and n and n[0] == '⨝'
-
-        def collect_join_info(node):
-            """
-            Flatten join tree into a list of relation-subtrees and coletar todas as condições de join.
-            Retorna (rel_list, join_conditions) onde:
-            - rel_list: lista de subtrees (cada subtree = relação ou operador aplicado sobre relação)
-            - join_conditions: lista de strings de condições que envolvem >=2 tabelas
-            """
-            rels = []
-            join_conds = []
-
-            def recurse(n):
-                if isinstance(n, str):
-                    rels.append(n)
-                    return
-                op = n[0]
-                if op == 'σ':
-                    # Se a seleção envolve múltiplas tabelas, pode conter condição de join aplicada acima
-                    cond = n[1]
-                    subt = n[2]
-                    subt_tables = self._get_all_tables(subt)
-                    conds = self._split_conditions(cond)
-                    for c in conds:
-                        if len(self._get_tables_in_condition(c)) >= 2:
-                            join_conds.append(c)
-                        # Não separa aqui; seleção fica junto com sua subtree
-                    recurse(subt if isinstance(subt, str) else (subt))
-                    # mantemos a seleção envolta como parte do subtree correspondente,
-                    # mas já contabilizamos condições de join se existirem.
-                    return
-                if op == '⨝':
-                    # coletar condição do próprio nó
-                    if n[1]:
-                        join_conds.extend([c for c in self._split_conditions(n[1]) if len(self._get_tables_in_condition(c)) >= 2])
-                    # flatten both lados
-                    recurse(n[2])
-                    recurse(n[3])
-                    return
-                # π, ρ ou outros: considerar como operador aplicado sobre uma relação
-                if op in ['π', 'ρ']:
-                    # Representar o subtree inteiro como uma unidade (mantemos operadores aplicados)
-                    # para evitar perder projeções/renames
-                    rels.append(n)
-                    return
-                # Qualquer outro nó: recursão segura
-                try:
-                    for child in n[2:]:
-                        recurse(child)
-                except Exception:
-                    pass
-
-            recurse(node)
-            return rels, join_conds
-
-        def estimate_size(subtree, join_conditions):
-            """
-            Estimativa muito simples de cardinalidade:
-            - base size 1000 por tabela
-            - reduz por cada seleção condicional sobre a tabela (fator 0.1)
-            - reduz um pouco se houver muitas colunas de join (sugere seletividade)
-            """
-            tables = self._get_all_tables(subtree)
-            base = 1000 * max(1, len(tables))
-            # contar quantas condições de seleção (σ) existem aplicadas dentro do subtree
-            sel_count = 0
-            def count_sel(n):
-                nonlocal sel_count
-                if isinstance(n, str): return
-                if n[0] == 'σ':
-                    sel_count += len(self._split_conditions(n[1]))
-                    count_sel(n[2])
-                elif n[0] in ['π', 'ρ']:
-                    count_sel(n[2])
-                elif n[0] == '⨝':
-                    count_sel(n[2]); count_sel(n[3])
-            count_sel(subtree)
-            size = base * (0.1 ** sel_count)
-            # se existirem join conditions que tocam essas tabelas, reduz um pouco mais
-            for c in join_conditions:
-                involved = self._get_tables_in_condition(c)
-                if involved and involved.issubset(tables):
-                    size *= 0.5
-            return max(1, size)
-
-        # Se não há joins, nada a fazer
-        if not is_join_node(tree):
+        """HEURÍSTICA 6: Reordenação de JOINs guiada pelo modelo de custo"""
+        new_tree, reordered = self._reorder_join_blocks(tree)
+        if not reordered:
             self.optimization_log.append("  - Nenhum JOIN encontrado para reordenar.")
-            return tree
+            return new_tree
+        if new_tree == tree:
+            self.optimization_log.append("  - A ordem atual dos JOINs já é a de menor custo estimado.")
+            return new_tree
+        self.optimization_log.append("  ✓ JOINs reordenados pelo modelo de custo.")
+        self.optimization_log.append("    → Benefício: Reduz o tamanho dos resultados intermediários.")
+        return new_tree
+
+    def _reorder_join_blocks(self, tree):
+        """
+        Reordena cada bloco de junções (JOINs consecutivos, com as seleções que
+        os envolvem) onde quer que ele apareça na árvore, não só na raiz.
+        """
+        if self._is_join_block(tree):
+            return self._reorder_block(tree), True
+        if not tree.children:
+            return tree, False
+        results = [self._reorder_join_blocks(child) for child in tree.children]
+        return tree.with_children(*[r[0] for r in results]), any(r[1] for r in results)
+
+    def _has_unordered_join_block(self, tree):
+        """Há JOIN ainda sem algoritmo ou seleção entre tabelas acima de um JOIN?"""
+        if isinstance(tree, Join) and tree.algorithm is None:
+            return True
+        if (isinstance(tree, Select) and self._is_join_block(tree)
+                and any(bit_count(self._mask(c)) >= 2 for c in self._split_conditions(tree.condition))):
+            return True
+        return any(self._has_unordered_join_block(child) for child in tree.children)
+
+    def _mask(self, item):
+        """Bitset das relações de um nó ou expressão, nos bits da consulta atual."""
+        return self.relation_bits.mask(item.tables)
+
+    def _has_join(self, tree):
+        return isinstance(tree, Join) or any(self._has_join(child) for child in tree.children)
+
+    def _has_unannotated_join(self, tree):
+        if isinstance(tree, Join) and tree.algorithm is None:
+            return True
+        return any(self._has_unannotated_join(child) for child in tree.children)
 
-        # Coletar relações e condições
-        rels, join_conds = collect_join_info(tree)
+    def _without_algorithms(self, node):
+        """Cópia da árvore com os JOINs sem algoritmo anotado."""
+        if not node.children:
+            return node
+        children = [self._without_algorithms(child) for child in node.children]
+        if isinstance(node, Join):
+            return Join(node.condition, *children)
+        return node.with_children(*children)
 
-        # Criar lista com estimativas
-        rel_info = []
-        for r in rels:
-            rel_tables = self._get_all_tables(r) if not isinstance(r, str) else {r}
-            est = estimate_size(r, join_conds)
-            rel_info.append({'subtree': r, 'tables': rel_tables, 'est': est})
+    def _is_join_block(self, node):
+        while isinstance(node, Select):
+            node = node.child
+        return isinstance(node, Join)
 
-        # Ordenação inicial por estimativa crescente (menores primeiro)
-        rel_info.sort(key=lambda x: x['est'])
+    def _collect_join_block(self, node):
+        """
+        Achata um bloco de junções em (relações, condições de junção, condições residuais).
+
+        Relações são as subárvores que não são JOIN (ρ, σ sobre tabela, π...),
+        mantidas inteiras. Condições com duas ou mais tabelas viram condições
+        de junção; as demais (ex.: colunas sem qualificador) são reaplicadas
+        como seleção no topo do bloco, para não serem perdidas.
+        """
+        rels, join_conds, residual = [], [], []
+        # Condições vindas de seleções vão depois das condições dos próprios JOINs
+        wrapped_conds = []
 
-        # Reconstruir joins greedy: sempre tentar anexar uma relação que compartilha condição com o conjunto atual
-        used = [rel_info[0]]
-        remaining = rel_info[1:]
-        constructed_tree = used[0]['subtree']
+        def recurse(n):
+            if isinstance(n, Select) and self._is_join_block(n):
+                for c in self._split_conditions(n.condition):
+                    (wrapped_conds if bit_count(self._mask(c)) >= 2 else residual).append(c)
+                recurse(n.child)
+            elif isinstance(n, Join):
+                for c in self._split_conditions(n.condition):
+                    (join_conds if bit_count(self._mask(c)) >= 2 else residual).append(c)
+                recurse(n.left)
+                recurse(n.right)
+            else:
+                # Blocos de junção aninhados (ex.: abaixo de uma projeção) são
+                # reordenados de forma independente
+                rels.append(self._reorder_join_blocks(n)[0])
+
+        recurse(node)
+        return rels, join_conds + wrapped_conds, residual
+
+    def _reorder_block(self, block):
+        """
+        Escolhe a ordem de junção do bloco: programação dinâmica (DPccp, com
+        árvores bushy) até `max_dp_relations` relações; acima disso, a
+        heurística gulosa.
+        """
+        cost_model = self.cost_model
+        rels, pending, residual = self._collect_join_block(block)
+        # Ordem canônica das relações: o resultado não depende da forma atual
+        # do bloco, então reaplicar a regra não alterna entre planos de mesmo custo
+        rels.sort(key=lambda rel: rel.to_algebra())
+
+        if len(rels) <= self.max_dp_relations:
+            constructed, pending, evaluated = dp_join_order(rels, pending, cost_model, self.relation_bits)
+            method = f"Programação dinâmica (DPccp, {len(rels)} relações, {evaluated} planos avaliados)"
+        else:
+            constructed, pending = self._greedy_join_order(rels, pending)
+            method = (f"Heurística gulosa ({len(rels)} relações, acima do limite de "
+                      f"{self.max_dp_relations} para programação dinâmica)")
+
+        # Condições que não ligaram nenhum par de relações ficam no topo
+        residual.extend(pending)
+        if residual:
+            constructed = Select(conjoin(residual), constructed)
+        if constructed == self._without_algorithms(block):
+            # Mesma ordem: mantém os algoritmos já escolhidos
+            constructed = block
+
+        self.optimization_log.append(f"  • {method}:")
+        self.optimization_log.append(f"    {self._join_shape(constructed)} → ~{cost_model.rows(constructed):.0f} linhas")
+        return constructed
+
+    def _greedy_join_order(self, rels, pending):
+        """
+        Ordem left-deep gulosa: começa pela menor relação estimada e anexa, a
+        cada passo, a relação conectada cujo JOIN produz o menor resultado
+        estimado. Sem relação conectada, faz produto cartesiano com a menor
+        restante.
+
+        Returns:
+            tuple: (árvore de junções, condições não aplicadas)
+        """
+        cost_model = self.cost_model
+        remaining = sorted(rels, key=cost_model.rows)
+        constructed = remaining.pop(0)
 
         while remaining:
-            attached = False
-            for i, rinfo in enumerate(remaining):
-                # procurar se existe condição ligando alguma tabela de constructed_tree com rinfo
-                found_conds = []
-                for c in join_conds:
-                    tables_in_c = self._get_tables_in_condition(c)
-                    if tables_in_c & self._get_all_tables(constructed_tree) and tables_in_c & rinfo['tables']:
-                        found_conds.append(c)
-                if found_conds:
-                    # combinar condições que ligam os dois conjuntos
-                    cond_str = ' ∧ '.join(found_conds)
-                    constructed_tree = ('⨝', cond_str, constructed_tree, rinfo['subtree'])
-                    # remover essas condições da lista global para não reaplicar
-                    join_conds = [c for c in join_conds if c not in found_conds]
-                    remaining.pop(i)
-                    attached = True
-                    break
-            if not attached:
-                # Não encontrou condição de ligação — simplesmente anexa a próxima menor
-                rinfo = remaining.pop(0)
-                # sem condição explícita, usar string vazia (cross join) — mantemos consistência
-                constructed_tree = ('⨝', '', constructed_tree, rinfo['subtree'])
-
-        self.optimization_log.append("  ✓ JOINs reordenados usando heurística gulosa baseada em estimativas simples.")
-        self.optimization_log.append("    → Ordem construída (pequenas primeiras) para reduzir intermediários.")
-        return constructed_tree
+            best = None
+            built_mask = self._mask(constructed)
+            for i, rel in enumerate(remaining):
+                rel_mask = self._mask(rel)
+                union = built_mask | rel_mask
+                conds = [c for c in pending
+                         if is_subset(self._mask(c), union) and self._mask(c) & built_mask and self._mask(c) & rel_mask]
+                if not conds:
+                    continue
+                candidate = Join(conjoin(conds), constructed, rel)
+                rows = cost_model.rows(candidate)
+                if best is None or rows < best[0]:
+                    best = (rows, i, candidate, conds)
+            if best is None:
+                constructed = Join(None, constructed, remaining.pop(0))
+            else:
+                _, i, constructed, conds = best
+                remaining.pop(i)
+                pending = [c for c in pending if c not in conds]
+        return constructed, pending
+
+    def _join_shape(self, node):
+        """Forma da árvore de junções para o log, ex.: ((pr ⨝ p) ⨝ (c ⨝ e))."""
+        if isinstance(node, Join):
+            op = '⨝' if node.condition is not None else '×'
+            return f"({self._join_shape(node.left)} {op} {self._join_shape(node.right)})"
+        if isinstance(node, Select) and self._is_join_block(node):
+            return f"σ{self._join_shape(node.child)}"
+        label = self._relation_label(node)
+        return f"{label} (~{self.cost_model.rows(node):.0f})"
+
+    def _relation_label(self, node):
+        """Nome curto de uma relação para o log (alias ou tabela)."""
+        while isinstance(node, (Select, Project)):
+            node = node.child
+        if isinstance(node, Rename):
+            return node.alias
+        if isinstance(node, Scan):
+            return node.table
+        return ', '.join(sorted(node.tables))
 
     def _select_efficient_algorithms(self, tree):
-        """HEURÍSTICA 4: Seleção de Algoritmos Eficientes para operações (marca joins com algoritmo)"""
-        self.optimization_log.append("\n[HEURÍSTICA 4] Seleção de Algoritmos Eficientes:")
-
-        def choose_algo_for_condition(cond):
-            # Detecta igualdade direta entre colunas de tabelas diferentes => Hash Join
-            if not cond or not cond.strip():
-                return 'nested_loop'  # cross-join fallback
-            eqs = re.findall(r'(\w+\.\w+)\s*=\s*(\w+\.\w+)', cond)
-            for left_col, right_col in eqs:
-                left_table = left_col.split('.')[0]
-                right_table = right_col.split('.')[0]
-                if left_table != right_table:
-                    return 'hash_join'
-            # Se não for igualdade entre tabelas diferentes, preferir nested loop
-            return 'nested_loop'
+        """HEURÍSTICA 7: Seleção de algoritmos de junção pelo menor custo estimado"""
 
         def annotate(node):
-            if isinstance(node, str):
-                return node
-            op = node[0]
-            if op in ['π', 'ρ', 'σ']:
-                return (op, node[1], annotate(node[2]))
-            if op == '⨝':
-                # Pode haver um algoritmo já armazenado na posição 4; manter se presente
-                cond = node[1]
-                left = annotate(node[2])
-                right = annotate(node[3])
-                algo = choose_algo_for_condition(cond)
-                # Retornar um nó com 5 posições: ('⨝', cond, left, right, algo)
-                self.optimization_log.append(f"  • Junção entre [{', '.join(sorted(self._get_all_tables(left)))}] "
-                                             f"e [{', '.join(sorted(self._get_all_tables(right)))}] "
-                                             f"=> algoritmo selecionado: {algo}")
-                # Manter possíveis condições já presentes (node[1]) e adicionar algoritmo como elemento extra
-                return ('⨝', cond, left, right, algo)
-            # Qualquer outro nó — aplicar recursão segura para filhos
-            try:
-                # reconstrói genérico: mantém estrutura e aplica annotate a possíveis filhos
-                new_children = []
-                for child in node[1:]:
-                    new_children.append(annotate(child) if not isinstance(child, str) else child)
-                return tuple([node[0]] + new_children)
-            except Exception:
-                return node
+            if isinstance(node, Join):
+                join = Join(node.condition, annotate(node.left), annotate(node.right))
+                algo, costs = self.cost_model.best_join_algorithm(join)
+                alternatives = ', '.join(f"{name}={cost:.1f}" for name, cost in sorted(costs.items()))
+                self.optimization_log.append(f"  • Junção entre [{', '.join(sorted(join.left.tables))}] "
+                                             f"e [{', '.join(sorted(join.right.tables))}] "
+                                             f"=> algoritmo selecionado: {algo} "
+                                             f"(~{self.cost_model.rows(join):.0f} linhas; custo: {alternatives})")
+                # Mantém a condição e registra o algoritmo no próprio nó
+                join = join.with_algorithm(algo)
+                self.optimization_log.append(f"    → {self.cost_model.describe_join(join)}")
+                return join
+            if node.children:
+                return node.with_children(*[annotate(child) for child in node.children])
+            return node
 
         new_tree = annotate(tree)
-        self.optimization_log.append("  ✓ Algoritmos selecionados para junções (hash quando aplicável, nested loop caso contrário).")
+        estimate = self.cost_model.estimate(new_tree)
+        self.optimization_log.append("  ✓ Algoritmos escolhidos pelo menor custo estimado (E/S em páginas + CPU).")
+        self.optimization_log.append(f"    → Estimativa do plano: ~{estimate.rows:.0f} linhas, custo {estimate.cost:.1f}.")
         return new_tree
     
     # --- Métodos Auxiliares ---
     
     def _split_conditions(self, condition):
-        return [c.strip() for c in re.split(r'\s*∧\s*|\s+AND\s+', condition, flags=re.IGNORECASE) if c.strip()]
-    
-    def _get_tables_in_condition(self, condition):
-        return set(re.findall(r'(\w+)\.', condition))
-    
-    def _get_all_tables(self, tree):
-        tables = set()
-        def collect(node):
-            if isinstance(node, str): tables.add(node)
-            elif node[0] == 'ρ':
-                tables.add(node[1])
-                collect(node[2])
-            elif node[0] in ['π', 'σ']: collect(node[2])
-            elif node[0] == '⨝':
-                collect(node[2]); collect(node[3])
-        collect(tree)
-        return tables
-    
-    def _parse_columns(self, columns_str):
-        return ['*'] if columns_str.strip() == '*' else [c.strip() for c in columns_str.split(',')]
-    
-    def _collect_required_columns(self, tree, base_cols):
-        if '*' in base_cols: return ['*']
-        required = set(base_cols)
-        def collect(node):
-            if isinstance(node, str): return
-            op = node[0]
-            if op in ['σ', '⨝']:
-                required.update(self._get_columns_in_condition(node[1]))
-            if op in ['π', 'ρ', 'σ']: collect(node[2])
-            elif op == '⨝':
-                collect(node[2]); collect(node[3])
-        collect(tree)
-        return list(required)
-    
-    def _get_columns_in_condition(self, condition):
-        # Remove literais de string para não capturar palavras dentro deles
-        condition_no_literals = re.sub(r"'[^']*'", '', condition)
-        # Captura colunas (com ou sem alias)
-        matches = re.findall(r'\b(?:\w+\.)?(\w+)\b', condition_no_literals)
-        operators = {'AND', 'OR', 'NOT', 'ON', 'WHERE', 'INNER', 'JOIN', 'LIKE', 'IN'}
-        return [m for m in matches if m.upper() not in operators and not m.isdigit()]
+        return split_conjuncts(condition)
     
     def get_optimization_log(self):
         return '\n'.join(self.optimization_log)
\ No newline at end of file
@@ -0,0 +1,355 @@
+"""
+Plano físico construído a partir da árvore lógica otimizada.
+
+A árvore lógica diz o que calcular; o plano físico diz como. ρ não vira
+operador (o alias fica na leitura da tabela), σ sobre uma tabela base vira
+IndexScan quando um índice compensa, e cada junção vira o operador do
+algoritmo escolhido pelo otimizador. Todo operador carrega as linhas
+estimadas, a largura da linha em bytes e o custo acumulado da subárvore
+(E/S em páginas + CPU), calculados pelo CostModel, para que planos
+alternativos possam ser comparados pelo custo.
+
+Uso:
+    plan = build_physical_plan(arvore_otimizada, CostModel(catalogo))
+    print(plan.explain())
+    plan.operator_for(no_logico).cost
+"""
+from cost_model import CostModel, CPU_TUPLE_COST
+from plan_nodes import Scan, Rename, Select, Project as LogicalProject, Join, Empty
+from predicates import split_conjuncts, conjoin
+
+
+class PhysicalOperator:
+    """
+    Classe base dos operadores físicos.
+
+    `rows` e `width` descrevem a saída de uma execução do operador; `cost` é
+    o custo acumulado da subárvore somando todas as execuções (`loops` > 1
+    só no lado interno de um nested loop com índice).
+    """
+    __slots__ = ('children', 'rows', 'width', 'cost', 'loops')
+
+    name = None
+
+    def __init__(self, children, rows, width, cost, loops=1):
+        self.children = tuple(children)
+        self.rows = rows
+        self.width = width
+        self.cost = cost
+        self.loops = loops
+
+    def detail(self):
+        """Complemento do rótulo (tabela, condição, algoritmo)."""
+        return ''
+
+    def label(self):
+        detail = self.detail()
+        return f"{self.name} ({detail})" if detail else self.name
+
+    def summary(self):
+        """Estimativas do operador em texto, ex.: '~333 linhas × 200 B, custo 72.7'."""
+        text = f"~{self.rows:.0f} linhas × {self.width} B, custo {self.cost:.1f}"
+        if self.loops > 1:
+            text += f", {self.loops:.0f} execuções"
+        return text
+
+    def walk(self):
+        """Operadores da subárvore em pós-ordem (filhos antes do pai)."""
+        for child in self.children:
+            yield from child.walk()
+        yield self
+
+    def explain(self, depth=0):
+        """Subárvore indentada, um operador por linha."""
+        lines = [f"{'  ' * depth}-> {self.label()}  [{self.summary()}]"]
+        for child in self.children:
+            lines.append(child.explain(depth + 1))
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.detail()!r}, rows={self.rows:.1f}, cost={self.cost:.1f})"
+
+
+class SeqScan(PhysicalOperator):
+    """Leitura sequencial de uma tabela base."""
+    __slots__ = ('table', 'alias')
+    name = 'SeqScan'
+
+    def __init__(self, table, alias, rows, width, cost):
+        super().__init__((), rows, width, cost)
+        self.table = table
+        self.alias = alias
+
+    def detail(self):
+        return f"{self.table} AS {self.alias}" if self.alias else self.table
+
+
+class IndexScan(PhysicalOperator):
+    """Leitura de uma tabela base pelas entradas de um índice que satisfazem `index_condition`."""
+    __slots__ = ('table', 'alias', 'index_condition')
+    name = 'IndexScan'
+
+    def __init__(self, table, alias, index_condition, rows, width, cost, loops=1):
+        super().__init__((), rows, width, cost, loops)
+        self.table = table
+        self.alias = alias
+        self.index_condition = index_condition
+
+    def detail(self):
+        table = f"{self.table} AS {self.alias}" if self.alias else self.table
+        return f"{table}; índice: {self.index_condition}"
+
+
+class Filter(PhysicalOperator):
+    """Descarta as linhas que não satisfazem a condição (σ)."""
+    __slots__ = ('condition',)
+    name = 'Filter'
+
+    def __init__(self, condition, child, rows, width, cost, loops=1):
+        super().__init__((child,), rows, width, cost, loops)
+        self.condition = condition
+
+    def detail(self):
+        return str(self.condition)
+
+
+class Project(PhysicalOperator):
+    """Calcula as colunas de saída (π)."""
+    __slots__ = ('columns',)
+    name = 'Project'
+
+    def __init__(self, columns, child, rows, width, cost):
+        super().__init__((child,), rows, width, cost)
+        self.columns = columns
+
+    def detail(self):
+        return self.columns
+
+
+class HashJoin(PhysicalOperator):
+    """Junção por igualdade: monta a tabela de hash com a entrada `build_side` e sonda com a outra."""
+    __slots__ = ('condition', 'build_side')
+    name = 'HashJoin'
+
+    def __init__(self, condition, build_side, left, right, rows, width, cost):
+        super().__init__((left, right), rows, width, cost)
+        self.condition = condition
+        self.build_side = build_side
+
+    def detail(self):
+        side = 'direita' if self.build_side == 'right' else 'esquerda'
+        return f"{self.condition}; tabela de hash: {side}"
+
+
+class MergeJoin(PhysicalOperator):
+    """Junção por igualdade intercalando as entradas ordenadas pela chave; `sorts` são os lados ordenados antes."""
+    __slots__ = ('condition', 'sorts')
+    name = 'MergeJoin'
+
+    def __init__(self, condition, sorts, left, right, rows, width, cost):
+        super().__init__((left, right), rows, width, cost)
+        self.condition = condition
+        self.sorts = tuple(sorts)
+
+    def detail(self):
+        names = {'left': 'esquerda', 'right': 'direita'}
+        sorts = ', '.join(names[side] for side in self.sorts)
+        return f"{self.condition}; ordena: {sorts}" if sorts else f"{self.condition}; entradas já ordenadas"
+
+
+class NestedLoopJoin(PhysicalOperator):
+    """
+    Percorre a entrada interna (direita) para cada bloco da externa ou, com
+    `index`, busca no índice da interna para cada linha externa.
+    """
+    __slots__ = ('condition', 'index')
+    name = 'NestedLoopJoin'
+
+    def __init__(self, condition, index, left, right, rows, width, cost):
+        super().__init__((left, right), rows, width, cost)
+        self.condition = condition
+        self.index = index
+
+    def detail(self):
+        condition = str(self.condition) if self.condition is not None else 'produto cartesiano'
+        return f"{condition}; busca por índice" if self.index else condition
+
+
+class EmptyResult(PhysicalOperator):
+    """Relação vazia: o filtro é contraditório e nenhuma tabela é lida."""
+    __slots__ = ('relations',)
+    name = 'EmptyResult'
+
+    def __init__(self, relations):
+        super().__init__((), 0.0, 0, 0.0)
+        self.relations = relations
+
+    def detail(self):
+        return f"∅ {', '.join(sorted(self.relations))}"
+
+
+class PhysicalPlan:
+    """Raiz do plano físico e a correspondência entre nós lógicos e operadores."""
+
+    def __init__(self, root, operators):
+        self.root = root
+        self._operators = operators
+
+    @property
+    def cost(self):
+        """Custo total estimado do plano."""
+        return self.root.cost
+
+    @property
+    def rows(self):
+        return self.root.rows
+
+    def operator_for(self, node):
+        """
+        Operador que executa um nó lógico. Nós absorvidos (ρ na leitura da
+        tabela, σ na busca pelo índice) apontam para o operador que os absorveu.
+        """
+        return self._operators.get(node)
+
+    def operators(self):
+        """Operadores em ordem de execução (pós-ordem)."""
+        return list(self.root.walk())
+
+    def explain(self):
+        return self.root.explain()
+
+
+def build_physical_plan(tree, model=None):
+    """
+    Constrói o plano físico de uma árvore lógica.
+
+    Junções sem algoritmo anotado (árvore não otimizada) recebem o de menor
+    custo estimado, como o otimizador faria.
+
+    Args:
+        tree: PlanNode (ex.: a árvore otimizada de process_query)
+        model: CostModel usado nas estimativas (padrão: catálogo padrão)
+
+    Returns:
+        PhysicalPlan
+    """
+    builder = _Builder(model if model is not None else CostModel())
+    return PhysicalPlan(builder.build(tree), builder.operators)
+
+
+class _Builder:
+    def __init__(self, model):
+        self.model = model
+        self.operators = {}
+
+    def build(self, node, alias=None):
+        op = self._build(node, alias)
+        self.operators[node] = op
+        return op
+
+    def _build(self, node, alias):
+        # `alias`: nome dado à tabela base por um ρ acima de σ na mesma cadeia
+        model = self.model
+        estimate = model.estimate(node)
+
+        if isinstance(node, Empty):
+            return EmptyResult(node.tables)
+        if isinstance(node, Scan):
+            return SeqScan(node.table, alias, estimate.rows, estimate.row_bytes, estimate.cost)
+        if isinstance(node, Rename):
+            # O alias não muda a execução: fica na leitura da tabela
+            return self.build(node.child, node.alias)
+        if isinstance(node, Select):
+            access = model.index_scan(node)
+            if access is None:
+                return Filter(node.condition, self.build(node.child, alias),
+                              estimate.rows, estimate.row_bytes, estimate.cost)
+            return self._index_scan(node, access, estimate, alias)
+        if isinstance(node, LogicalProject):
+            return Project(node.columns_text, self.build(node.child),
+                           estimate.rows, estimate.row_bytes, estimate.cost)
+        if isinstance(node, Join):
+            return self._join(node, estimate)
+        raise TypeError(f"Nó sem operador físico: {type(node).__name__}")
+
+    def _index_scan(self, node, access, estimate, alias):
+        term, rows, cost = access
+        table, inner_alias = _base_table(node.child)
+        alias = inner_alias or alias
+        remaining = [t for t in split_conjuncts(node.condition) if t is not term]
+        if not remaining:
+            scan = IndexScan(table, alias, term, estimate.rows, estimate.row_bytes, cost)
+            self._map_inner(node.child, scan)
+            return scan
+        # Os demais termos são avaliados sobre as linhas lidas pelo índice
+        scan = IndexScan(table, alias, term, rows, estimate.row_bytes,
+                         cost - rows * CPU_TUPLE_COST)
+        self._map_inner(node.child, scan)
+        return Filter(conjoin(remaining), scan, estimate.rows, estimate.row_bytes, cost)
+
+    def _join(self, node, estimate):
+        model = self.model
+        algorithm = node.algorithm or model.best_join_algorithm(node)[0]
+        left = self.build(node.left)
+        fields = (estimate.rows, estimate.row_bytes, estimate.cost)
+
+        if algorithm == 'index_nested_loop':
+            right = self._index_probe(node, left.rows)
+            return NestedLoopJoin(node.condition, True, left, right, *fields)
+
+        right = self.build(node.right)
+        if algorithm == 'hash_join':
+            return HashJoin(node.condition, model.hash_build_side(node), left, right, *fields)
+        if algorithm == 'sort_merge':
+            left_key, right_key = model.join_keys(node)[0]
+            sorts = [side for side, child, key in (('left', node.left, left_key), ('right', node.right, right_key))
+                     if not model.sorted_by(child, key)]
+            return MergeJoin(node.condition, sorts, left, right, *fields)
+        return NestedLoopJoin(node.condition, False, left, right, *fields)
+
+    def _index_probe(self, join, loops):
+        """Lado interno do nested loop com índice: uma busca no índice por linha externa."""
+        table, column, matches, probe_cost = self.model.index_probe(join)
+        outer_column = next(a for a, b in self.model.join_keys(join) if b == column)
+        _, alias = _base_table(join.right)
+        cost = loops * probe_cost
+        scan = IndexScan(table, alias, f"{column} = {outer_column}", matches,
+                         self.model.estimate(join.right).row_bytes, cost, loops)
+        conditions = _conditions(join.right)
+        if not conditions:
+            self._map_inner(join.right, scan)
+            return scan
+        # Filtros locais da interna são avaliados sobre as linhas buscadas
+        inner = self.model.estimate(join.right)
+        fraction = inner.rows / max(1.0, self.model.catalog.row_count(table))
+        op = Filter(conjoin(conditions), scan, max(1.0, matches * fraction), inner.row_bytes, cost, loops)
+        self._map_inner(join.right, op)
+        return op
+
+    def _map_inner(self, node, op):
+        while True:
+            self.operators[node] = op
+            if not isinstance(node, (Select, Rename, LogicalProject)):
+                return
+            node = node.child
+
+
+def _base_table(node):
+    """(tabela, alias) de uma cadeia de ρ/σ/π sobre uma tabela base."""
+    alias = None
+    while isinstance(node, (Select, Rename, LogicalProject)):
+        if isinstance(node, Rename):
+            alias = node.alias
+        node = node.child
+    return node.table, alias
+
+
+def _conditions(node):
+    """Termos das seleções de uma cadeia de ρ/σ/π sobre uma tabela base."""
+    terms = []
+    while isinstance(node, (Select, Rename, LogicalProject)):
+        if isinstance(node, Select):
+            terms.extend(split_conjuncts(node.condition))
+        node = node.child
+    return terms
+
@@ -0,0 +1,256 @@
+"""
+Cache LRU de planos de consulta.
+
+As entradas são indexadas pela "forma" da consulta (fingerprint): o SQL
+normalizado com os literais numéricos e de texto trocados por marcadores.
+Cada entrada guarda o resultado do parsing, a árvore não otimizada, a árvore
+otimizada e o log de otimização com marcadores `$n`; os literais de cada
+execução são ligados (`bind_tree`) ao plano memorizado.
+"""
+import re
+import threading
+from collections import Counter, OrderedDict
+
+from sql_parser import Parser, tokenize, Token, Literal, SQLSyntaxError
+from plan_nodes import Project, Select, Join
+from predicates import bind_parameters
+
+_PARAMETER_RE = re.compile(r"\$(\d+)")
+
+
+def normalize_sql(query):
+    """
+    Normaliza a consulta preservando os literais (forma exata).
+
+    Espaços e comentários são descartados e as palavras-chave ficam em
+    maiúsculas (o lexer já as normaliza). Identificadores e literais são
+    preservados: eles aparecem na árvore exibida ao usuário.
+
+    Args:
+        query: String contendo a consulta SQL
+
+    Returns:
+        str: Consulta normalizada, ou None se o texto não puder ser tokenizado
+    """
+    try:
+        tokens = tokenize(query)
+    except SQLSyntaxError:
+        return None
+
+    parts = []
+    for token in tokens:
+        if token.kind == 'EOF' or (token.kind == 'PUNCT' and token.value == ';'):
+            continue
+        if token.kind == 'STRING':
+            parts.append("'" + token.value.replace("'", "''") + "'")
+        else:
+            parts.append(token.value)
+    return ' '.join(parts)
+
+
+def fingerprint_sql(query):
+    """
+    Calcula a forma canônica da consulta, independente dos literais.
+
+    Literais numéricos (incluindo o sinal de um número negativo) e de texto
+    são trocados por '?' na chave e por tokens PARAM numerados na lista de
+    tokens devolvida, que pode ser passada diretamente ao Parser.
+
+    Args:
+        query: String contendo a consulta SQL
+
+    Returns:
+        tuple: (fingerprint, literals, tokens)
+
+    Raises:
+        SQLSyntaxError: Se o texto não puder ser tokenizado
+    """
+    tokens = tokenize(query)
+    literals = []
+    shape_tokens = []
+    parts = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        negative = (
+            token.kind == 'OP' and token.value == '-'
+            and tokens[i + 1].kind == 'NUMBER'
+            and _is_unary_context(shape_tokens[-1] if shape_tokens else None)
+        )
+        if negative or token.kind in ('NUMBER', 'STRING'):
+            if negative:
+                i += 1
+                literals.append(-_number_value(tokens[i].value))
+            elif token.kind == 'NUMBER':
+                literals.append(_number_value(token.value))
+            else:
+                literals.append(token.value)
+            shape_tokens.append(Token('PARAM', str(len(literals)), token.pos))
+            parts.append('?')
+        else:
+            shape_tokens.append(token)
+            if token.kind != 'EOF':
+                parts.append(token.value)
+        i += 1
+
+    if parts and parts[-1] == ';':
+        parts.pop()
+    return ' '.join(parts), literals, shape_tokens
+
+
+def _is_unary_context(previous):
+    if previous is None:
+        return True
+    if previous.kind in ('OP', 'KEYWORD'):
+        return True
+    return previous.kind == 'PUNCT' and previous.value in ('(', ',', '*')
+
+
+def _number_value(text):
+    return float(text) if '.' in text else int(text)
+
+
+def bind_text(text, literals):
+    """Substitui os marcadores `$n` de um texto pelos literais correspondentes."""
+    if not literals or '$' not in text:
+        return text
+    return _PARAMETER_RE.sub(lambda m: str(Literal(literals[int(m.group(1)) - 1])), text)
+
+
+def bind_tree(tree, literals):
+    """
+    Liga os literais a uma árvore de álgebra relacional com marcadores.
+
+    Args:
+        tree: PlanNode produzido a partir da forma canônica
+        literals: Valores dos literais na ordem em que aparecem na consulta
+
+    Returns:
+        PlanNode: Nova árvore com os marcadores substituídos
+    """
+    if not literals:
+        return tree
+    if isinstance(tree, Project):
+        return Project([bind_parameters(item, literals) for item in tree.columns_list],
+                       bind_tree(tree.child, literals))
+    if isinstance(tree, Select):
+        return Select(bind_parameters(tree.condition, literals), bind_tree(tree.child, literals))
+    if isinstance(tree, Join):
+        condition = tree.condition
+        if condition is not None:
+            condition = bind_parameters(condition, literals)
+        return Join(condition, bind_tree(tree.left, literals),
+                    bind_tree(tree.right, literals), tree.algorithm)
+    if tree.children:
+        return tree.with_children(*[bind_tree(child, literals) for child in tree.children])
+    return tree
+
+
+def fingerprint_workload(queries):
+    """
+    Resume um conjunto de consultas pelas formas distintas que ele contém.
+
+    Args:
+        queries: Iterável de strings SQL
+
+    Returns:
+        dict: {'queries', 'distinct_queries', 'distinct_shapes', 'invalid', 'shapes'}
+              onde 'shapes' é um Counter {fingerprint: ocorrências}
+    """
+    shapes = Counter()
+    exact = set()
+    shape_is_valid = {}
+    total = invalid = 0
+    for query in queries:
+        total += 1
+        fingerprint = None
+        try:
+            fingerprint, _, tokens = fingerprint_sql(query)
+            # A validade sintática depende só da forma: analisa cada forma uma vez
+            if fingerprint not in shape_is_valid:
+                Parser(tokens).parse_statement()
+                shape_is_valid[fingerprint] = True
+        except SQLSyntaxError:
+            if fingerprint is not None:
+                shape_is_valid[fingerprint] = False
+            invalid += 1
+            continue
+        if not shape_is_valid[fingerprint]:
+            invalid += 1
+            continue
+        shapes[fingerprint] += 1
+        exact.add(normalize_sql(query))
+    return {
+        'queries': total,
+        'distinct_queries': len(exact),
+        'distinct_shapes': len(shapes),
+        'invalid': invalid,
+        'shapes': shapes,
+    }
+
+
+class PlanCache:
+    """Cache LRU de tamanho limitado com contadores de acertos e falhas."""
+
+    def __init__(self, max_size=128):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Retorna a entrada associada à chave (ou None), atualizando a ordem LRU."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        """Armazena uma entrada, descartando a menos usada se o limite for excedido."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def items(self):
+        """Lista de (chave, entrada) da menos para a mais recentemente usada."""
+        with self._lock:
+            return list(self._entries.items())
+
+    def clear(self):
+        """Remove todas as entradas e zera os contadores."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Retorna estatísticas de uso do cache.
+
+        Returns:
+            dict: {'size', 'max_size', 'hits', 'misses', 'hit_rate'}
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
@@ -0,0 +1,326 @@
+"""
+Nós tipados da árvore de álgebra relacional.
+
+Cada nó é imutável, usa __slots__ e calcula na construção um hash estrutural
+e o conjunto de tabelas da subárvore (`tables`), em O(1) a partir dos
+filhos. O conjunto de colunas referenciadas é calculado na primeira consulta
+e memorizado. Com isso, comparações, buscas em dicionários e deduplicação de
+subárvores não precisam percorrer a árvore inteira.
+
+Condições (σ, ⨝) e itens de projeção (π) são expressões já analisadas do
+sql_parser, que trazem suas relações e colunas pré-calculadas. Por
+conveniência, os construtores também aceitam o texto da condição.
+"""
+from sql_parser import Expression, SelectItem, parse_expression, parse_select_list
+
+
+class PlanNode:
+    """Classe base dos nós do plano lógico."""
+    __slots__ = ('_hash', '_tables', '_columns')
+
+    op = None
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} é imutável")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} é imutável")
+
+    def _init(self, **fields):
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, '_columns', None)
+        object.__setattr__(self, '_hash', hash((type(self).__name__,) + self._key()))
+
+    # --- Estrutura ---
+
+    @property
+    def children(self):
+        return ()
+
+    def _key(self):
+        """Campos que definem a identidade estrutural do nó."""
+        raise NotImplementedError
+
+    def with_children(self, *children):
+        """Retorna uma cópia do nó com novos filhos (mesmos atributos próprios)."""
+        raise NotImplementedError
+
+    def __reduce__(self):
+        return (type(self), self._key())
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if type(other) is not type(self) or self._hash != other._hash:
+            return False
+        # Hashes iguais: confirma campo a campo (subárvores compartilhadas
+        # são resolvidas pela identidade acima)
+        return self._key() == other._key()
+
+    def __ne__(self, other):
+        return not self == other
+
+    # --- Propriedades memorizadas ---
+
+    @property
+    def tables(self):
+        """frozenset com tabelas e aliases presentes na subárvore."""
+        return self._tables
+
+    @property
+    def columns(self):
+        """frozenset com as colunas referenciadas (condições e projeções) na subárvore."""
+        if self._columns is None:
+            cols = set(self._own_columns())
+            for child in self.children:
+                cols |= child.columns
+            object.__setattr__(self, '_columns', frozenset(cols))
+        return self._columns
+
+    def _own_columns(self):
+        return ()
+
+    def node_count(self):
+        """Número de nós da subárvore."""
+        return 1 + sum(child.node_count() for child in self.children)
+
+    def to_tuple(self):
+        """Representação em tuplas aninhadas (formato legado, útil para exibição/JSON)."""
+        raise NotImplementedError
+
+    def to_algebra(self):
+        """Expressão de álgebra relacional em texto, ex.: 'π (c.nome) (σ (...) (cliente))'."""
+        raise NotImplementedError
+
+    def __repr__(self):
+        return repr(self.to_tuple())
+
+
+class Scan(PlanNode):
+    """Leitura de uma tabela base."""
+    __slots__ = ('table',)
+
+    def __init__(self, table):
+        self._init(table=table)
+        object.__setattr__(self, '_tables', frozenset((table,)))
+
+    def _key(self):
+        return (self.table,)
+
+    def with_children(self):
+        return self
+
+    def to_tuple(self):
+        return self.table
+
+    def to_algebra(self):
+        return self.table
+
+
+class Rename(PlanNode):
+    """Renomeação (ρ) de uma relação para um alias."""
+    __slots__ = ('alias', 'child')
+    op = 'ρ'
+
+    def __init__(self, alias, child):
+        self._init(alias=alias, child=child)
+        object.__setattr__(self, '_tables', child.tables | {alias})
+
+    @property
+    def children(self):
+        return (self.child,)
+
+    def _key(self):
+        return (self.alias, self.child)
+
+    def with_children(self, child):
+        return Rename(self.alias, child)
+
+    def to_tuple(self):
+        return ('ρ', self.alias, self.child.to_tuple())
+
+    def to_algebra(self):
+        return f"ρ_{self.alias}({self.child.to_algebra()})"
+
+
+class Select(PlanNode):
+    """Seleção (σ) por uma condição."""
+    __slots__ = ('condition', 'child')
+    op = 'σ'
+
+    def __init__(self, condition, child):
+        self._init(condition=_as_condition(condition), child=child)
+        object.__setattr__(self, '_tables', child.tables)
+
+    @property
+    def children(self):
+        return (self.child,)
+
+    def _key(self):
+        return (self.condition, self.child)
+
+    def with_children(self, child):
+        return Select(self.condition, child)
+
+    def _own_columns(self):
+        return _column_names(self.condition)
+
+    def to_tuple(self):
+        return ('σ', str(self.condition), self.child.to_tuple())
+
+    def to_algebra(self):
+        return f"σ ({self.condition}) ({self.child.to_algebra()})"
+
+
+class Project(PlanNode):
+    """Projeção (π) sobre uma lista de itens (SelectItem)."""
+    __slots__ = ('columns_list', 'child')
+    op = 'π'
+
+    def __init__(self, columns_list, child):
+        self._init(columns_list=_as_select_items(columns_list), child=child)
+        object.__setattr__(self, '_tables', child.tables)
+
+    @property
+    def children(self):
+        return (self.child,)
+
+    @property
+    def columns_text(self):
+        return ', '.join(str(item) for item in self.columns_list)
+
+    def _key(self):
+        return (self.columns_list, self.child)
+
+    def with_children(self, child):
+        return Project(self.columns_list, child)
+
+    def _own_columns(self):
+        cols = []
+        for item in self.columns_list:
+            cols.extend(_column_names(item))
+        return cols
+
+    def to_tuple(self):
+        return ('π', self.columns_text, self.child.to_tuple())
+
+    def to_algebra(self):
+        return f"π ({self.columns_text}) ({self.child.to_algebra()})"
+
+
+class Join(PlanNode):
+    """Junção (⨝) com condição (None no produto cartesiano) e, após a otimização, o algoritmo escolhido."""
+    __slots__ = ('condition', 'left', 'right', 'algorithm')
+    op = '⨝'
+
+    def __init__(self, condition, left, right, algorithm=None):
+        self._init(condition=_as_condition(condition), left=left, right=right, algorithm=algorithm)
+        object.__setattr__(self, '_tables', left.tables | right.tables)
+
+    @property
+    def children(self):
+        return (self.left, self.right)
+
+    def _key(self):
+        return (self.condition, self.left, self.right, self.algorithm)
+
+    def with_children(self, left, right):
+        return Join(self.condition, left, right, self.algorithm)
+
+    def with_algorithm(self, algorithm):
+        return Join(self.condition, self.left, self.right, algorithm)
+
+    def _own_columns(self):
+        return _column_names(self.condition)
+
+    def to_tuple(self):
+        condition = str(self.condition) if self.condition is not None else ''
+        base = ('⨝', condition, self.left.to_tuple(), self.right.to_tuple())
+        return base + (self.algorithm,) if self.algorithm else base
+
+    def to_algebra(self):
+        left, right = self.left.to_algebra(), self.right.to_algebra()
+        if self.condition is None:
+            return f"({left} × {right})"
+        return f"({left} ⨝ ({self.condition}) {right})"
+
+
+class Empty(PlanNode):
+    """
+    Relação vazia (∅) no lugar de uma subárvore cujo predicado é uma
+    contradição. Mantém as tabelas/aliases da subárvore substituída, para
+    que as colunas acima dela continuem resolvidas.
+    """
+    __slots__ = ('relations',)
+    op = '∅'
+
+    def __init__(self, relations):
+        relations = frozenset(relations)
+        self._init(relations=relations)
+        object.__setattr__(self, '_tables', relations)
+
+    def _key(self):
+        return (self.relations,)
+
+    def with_children(self):
+        return self
+
+    def to_tuple(self):
+        return ('∅', ', '.join(sorted(self.relations)))
+
+    def to_algebra(self):
+        return '∅'
+
+
+# --- Conversão e utilitários ---
+
+def _as_condition(condition):
+    """Aceita uma Expression, None/'' (sem condição) ou o texto da condição."""
+    if condition is None or isinstance(condition, Expression):
+        return condition
+    return parse_expression(condition) if condition.strip() else None
+
+
+def _as_select_items(columns):
+    """Aceita SelectItem, Expression ou texto para cada item da projeção."""
+    items = []
+    for column in columns:
+        if isinstance(column, SelectItem):
+            items.append(column)
+        elif isinstance(column, Expression):
+            items.append(SelectItem(column))
+        else:
+            items.extend(parse_select_list(column))
+    return tuple(items)
+
+
+def _column_names(expr):
+    """Colunas referenciadas por uma expressão, como escritas (ex.: 'c.nome')."""
+    if expr is None:
+        return ()
+    return [str(column) for column in expr.columns]
+
+
+def from_tuple(tree):
+    """Constrói nós tipados a partir do formato legado de tuplas aninhadas."""
+    if isinstance(tree, PlanNode):
+        return tree
+    if isinstance(tree, str):
+        return Scan(tree)
+    op = tree[0]
+    if op == 'ρ':
+        return Rename(tree[1], from_tuple(tree[2]))
+    if op == 'σ':
+        return Select(tree[1], from_tuple(tree[2]))
+    if op == 'π':
+        return Project(parse_select_list(tree[1]), from_tuple(tree[2]))
+    if op == '∅':
+        return Empty(name.strip() for name in tree[1].split(',') if name.strip())
+    if op == '⨝':
+        algorithm = tree[4] if len(tree) > 4 else None
+        return Join(tree[1], from_tuple(tree[2]), from_tuple(tree[3]), algorithm)
+    raise ValueError(f"Operador desconhecido na árvore: {op!r}")
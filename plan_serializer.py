@@ -0,0 +1,506 @@
+"""
+Serialização binária compacta de planos de consulta.
+
+Formato (versão 1), todos os inteiros em varint (LEB128 sem sinal; inteiros
+com sinal usam zigzag):
+
+    magic (4 bytes) | versão (1 byte) | tabela de strings | corpo
+
+A tabela de strings guarda uma única vez cada nome de tabela, alias, coluna,
+operador, algoritmo, literal de texto e linha de log; o corpo referencia as
+strings pelo índice. Nós do plano, expressões e comandos SELECT são gravados
+em pré-ordem, cada um precedido de uma tag de um byte. Um nó ou expressão
+igual a outro já gravado (as árvores original e otimizada e a AST compartilham
+quase todas as condições) é gravado como uma referência ao anterior, e a
+leitura reaproveita o mesmo objeto imutável.
+
+Dois tipos de arquivo compartilham a codificação:
+    b'RAPL' - uma árvore de plano (dump_plan/load_plan)
+    b'RAPC' - entradas do cache de planos (dump_cache_entries/load_cache_entries)
+"""
+import gc
+import struct
+
+from plan_nodes import Scan, Rename, Select, Project, Join, Empty
+from sql_parser import (
+    ColumnRef, Literal, Parameter, Star, FunctionCall, Arithmetic, Comparison,
+    InList, IsNull, And, Or, Not, SelectItem, TableRef, JoinClause, SelectStatement,
+)
+
+FORMAT_VERSION = 1
+PLAN_MAGIC = b'RAPL'
+CACHE_MAGIC = b'RAPC'
+
+# Tags dos nós do plano
+_SCAN, _RENAME, _SELECT, _PROJECT, _JOIN, _EMPTY = range(1, 7)
+# Tags das expressões
+(_COLUMN, _LIT_NULL, _LIT_INT, _LIT_FLOAT, _LIT_STR, _PARAM, _STAR, _FUNC,
+ _ARITH, _CMP, _IN, _IS_NULL, _AND, _OR, _NOT) = range(16, 31)
+_NONE = 0
+# Referência a um nó/expressão já gravado (índice na ordem em que terminaram)
+_REF = 31
+
+_FLOAT = struct.Struct('<d')
+
+
+class _Writer:
+    """Codificador: acumula o corpo e interna as strings."""
+
+    def __init__(self):
+        self.body = bytearray()
+        self.strings = {}
+        self.refs = {}
+
+    def _ref(self, obj):
+        """Grava uma referência se `obj` já foi gravado; retorna True nesse caso."""
+        index = self.refs.get(obj)
+        if index is None:
+            return False
+        self.body.append(_REF)
+        self.uint(index)
+        return True
+
+    def _done(self, obj):
+        self.refs[obj] = len(self.refs)
+
+    def uint(self, value):
+        out = self.body
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+
+    def sint(self, value):
+        self.uint(value * 2 if value >= 0 else -value * 2 - 1)
+
+    def string(self, text):
+        index = self.strings.get(text)
+        if index is None:
+            index = self.strings[text] = len(self.strings)
+        self.uint(index)
+
+    def opt_string(self, text):
+        if text is None:
+            self.uint(0)
+        else:
+            index = self.strings.get(text)
+            if index is None:
+                index = self.strings[text] = len(self.strings)
+            self.uint(index + 1)
+
+    # --- Plano ---
+
+    def node(self, node):
+        if self._ref(node):
+            return
+        out = self.body
+        if isinstance(node, Scan):
+            out.append(_SCAN)
+            self.string(node.table)
+        elif isinstance(node, Rename):
+            out.append(_RENAME)
+            self.string(node.alias)
+            self.node(node.child)
+        elif isinstance(node, Select):
+            out.append(_SELECT)
+            self.expr(node.condition)
+            self.node(node.child)
+        elif isinstance(node, Project):
+            out.append(_PROJECT)
+            self.uint(len(node.columns_list))
+            for item in node.columns_list:
+                self.select_item(item)
+            self.node(node.child)
+        elif isinstance(node, Join):
+            out.append(_JOIN)
+            self.opt_string(node.algorithm)
+            self.expr(node.condition)
+            self.node(node.left)
+            self.node(node.right)
+        elif isinstance(node, Empty):
+            out.append(_EMPTY)
+            self.uint(len(node.relations))
+            for name in sorted(node.relations):
+                self.string(name)
+        else:
+            raise TypeError(f"Nó de plano não serializável: {type(node).__name__}")
+        self._done(node)
+
+    # --- Expressões ---
+
+    def expr(self, expr):
+        out = self.body
+        if expr is None:
+            out.append(_NONE)
+            return
+        if self._ref(expr):
+            return
+        if isinstance(expr, ColumnRef):
+            out.append(_COLUMN)
+            self.opt_string(expr.table)
+            self.string(expr.name)
+        elif isinstance(expr, Literal):
+            value = expr.value
+            if value is None:
+                out.append(_LIT_NULL)
+            elif isinstance(value, int):
+                out.append(_LIT_INT)
+                self.sint(value)
+            elif isinstance(value, float):
+                out.append(_LIT_FLOAT)
+                out += _FLOAT.pack(value)
+            else:
+                out.append(_LIT_STR)
+                self.string(value)
+        elif isinstance(expr, Parameter):
+            out.append(_PARAM)
+            self.uint(expr.index)
+        elif isinstance(expr, Star):
+            out.append(_STAR)
+            self.opt_string(expr.table)
+        elif isinstance(expr, FunctionCall):
+            out.append(_FUNC)
+            self.string(expr.name)
+            self.expr_list(expr.args)
+        elif isinstance(expr, (Arithmetic, Comparison)):
+            out.append(_ARITH if isinstance(expr, Arithmetic) else _CMP)
+            self.string(expr.op)
+            self.expr(expr.left)
+            self.expr(expr.right)
+        elif isinstance(expr, InList):
+            out.append(_IN)
+            out.append(expr.negated)
+            self.expr(expr.expr)
+            self.expr_list(expr.values)
+        elif isinstance(expr, IsNull):
+            out.append(_IS_NULL)
+            out.append(expr.negated)
+            self.expr(expr.expr)
+        elif isinstance(expr, (And, Or)):
+            out.append(_AND if isinstance(expr, And) else _OR)
+            self.expr_list(expr.terms)
+        elif isinstance(expr, Not):
+            out.append(_NOT)
+            self.expr(expr.term)
+        else:
+            raise TypeError(f"Expressão não serializável: {type(expr).__name__}")
+        self._done(expr)
+
+    def expr_list(self, exprs):
+        self.uint(len(exprs))
+        for expr in exprs:
+            self.expr(expr)
+
+    def select_item(self, item):
+        self.expr(item.expr)
+        self.opt_string(item.alias)
+
+    # --- Comando SELECT ---
+
+    def table_ref(self, ref):
+        self.string(ref.name)
+        self.opt_string(ref.alias)
+
+    def statement(self, statement):
+        self.uint(len(statement.columns))
+        for item in statement.columns:
+            self.select_item(item)
+        self.table_ref(statement.table)
+        self.uint(len(statement.joins))
+        for join in statement.joins:
+            self.string(join.join_type)
+            self.table_ref(join.table)
+            self.expr(join.condition)
+        self.expr(statement.where)
+
+    def to_bytes(self, magic):
+        header = _Writer()
+        header.uint(len(self.strings))
+        for text in self.strings:  # dicts preservam a ordem de inserção (= índice)
+            data = text.encode('utf-8')
+            header.uint(len(data))
+            header.body += data
+        return magic + bytes((FORMAT_VERSION,)) + bytes(header.body) + bytes(self.body)
+
+
+class _Reader:
+    """Decodificador sobre um buffer produzido por _Writer."""
+
+    def __init__(self, data, magic):
+        if data[:4] != magic:
+            raise ValueError("Arquivo não é um plano serializado (assinatura inválida).")
+        if len(data) < 5 or data[4] != FORMAT_VERSION:
+            version = data[4] if len(data) > 4 else None
+            raise ValueError(f"Versão de formato de plano não suportada: {version} "
+                             f"(esperada {FORMAT_VERSION}).")
+        self.data = data
+        self.pos = 5
+        self.refs = []
+        count = self.uint()
+        strings = []
+        for _ in range(count):
+            size = self.uint()
+            end = self.pos + size
+            if end > len(data):
+                raise IndexError("tabela de strings além do fim dos dados")
+            strings.append(data[self.pos:end].decode('utf-8'))
+            self.pos = end
+        self.strings = strings
+
+    def finish(self):
+        """Confere que o buffer foi consumido por inteiro."""
+        extra = len(self.data) - self.pos
+        if extra:
+            raise ValueError(f"Plano serializado com {extra} bytes a mais após o fim.")
+
+    def uint(self):
+        data = self.data
+        result = shift = 0
+        while True:
+            byte = data[self.pos]
+            self.pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def sint(self):
+        value = self.uint()
+        return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+    def byte(self):
+        value = self.data[self.pos]
+        self.pos += 1
+        return value
+
+    def string(self):
+        return self.strings[self.uint()]
+
+    def opt_string(self):
+        index = self.uint()
+        return self.strings[index - 1] if index else None
+
+    # --- Plano ---
+
+    def node(self):
+        tag = self.byte()
+        if tag == _REF:
+            return self.refs[self.uint()]
+        node = self._node(tag)
+        self.refs.append(node)
+        return node
+
+    def _node(self, tag):
+        if tag == _SCAN:
+            return Scan(self.string())
+        if tag == _RENAME:
+            alias = self.string()
+            return Rename(alias, self.node())
+        if tag == _SELECT:
+            condition = self.expr()
+            return Select(condition, self.node())
+        if tag == _PROJECT:
+            items = [self.select_item() for _ in range(self.uint())]
+            return Project(items, self.node())
+        if tag == _JOIN:
+            algorithm = self.opt_string()
+            condition = self.expr()
+            left = self.node()
+            return Join(condition, left, self.node(), algorithm)
+        if tag == _EMPTY:
+            return Empty([self.string() for _ in range(self.uint())])
+        raise ValueError(f"Tag de nó desconhecida: {tag}")
+
+    # --- Expressões ---
+
+    def expr(self):
+        tag = self.byte()
+        if tag == _NONE:
+            return None
+        if tag == _REF:
+            return self.refs[self.uint()]
+        expr = self._expr(tag)
+        self.refs.append(expr)
+        return expr
+
+    def _expr(self, tag):
+        if tag == _COLUMN:
+            table = self.opt_string()
+            return ColumnRef(table, self.string())
+        if tag == _LIT_NULL:
+            return Literal(None)
+        if tag == _LIT_INT:
+            return Literal(self.sint())
+        if tag == _LIT_FLOAT:
+            value = _FLOAT.unpack_from(self.data, self.pos)[0]
+            self.pos += _FLOAT.size
+            return Literal(value)
+        if tag == _LIT_STR:
+            return Literal(self.string())
+        if tag == _PARAM:
+            return Parameter(self.uint())
+        if tag == _STAR:
+            return Star(self.opt_string())
+        if tag == _FUNC:
+            name = self.string()
+            return FunctionCall(name, self.expr_list())
+        if tag in (_ARITH, _CMP):
+            op = self.string()
+            left = self.expr()
+            right = self.expr()
+            return Arithmetic(op, left, right) if tag == _ARITH else Comparison(op, left, right)
+        if tag == _IN:
+            negated = bool(self.byte())
+            expr = self.expr()
+            return InList(expr, self.expr_list(), negated)
+        if tag == _IS_NULL:
+            negated = bool(self.byte())
+            return IsNull(self.expr(), negated)
+        if tag == _AND:
+            return And(self.expr_list())
+        if tag == _OR:
+            return Or(self.expr_list())
+        if tag == _NOT:
+            return Not(self.expr())
+        raise ValueError(f"Tag de expressão desconhecida: {tag}")
+
+    def expr_list(self):
+        return [self.expr() for _ in range(self.uint())]
+
+    def select_item(self):
+        expr = self.expr()
+        return SelectItem(expr, self.opt_string())
+
+    # --- Comando SELECT ---
+
+    def table_ref(self):
+        name = self.string()
+        return TableRef(name, self.opt_string())
+
+    def statement(self):
+        columns = [self.select_item() for _ in range(self.uint())]
+        table = self.table_ref()
+        joins = []
+        for _ in range(self.uint()):
+            join_type = self.string()
+            join_table = self.table_ref()
+            joins.append(JoinClause(join_type, join_table, self.expr()))
+        return SelectStatement(columns, table, joins, self.expr())
+
+
+def dump_plan(tree):
+    """
+    Serializa uma árvore de plano (otimizada ou não).
+
+    Args:
+        tree: PlanNode
+
+    Returns:
+        bytes: Representação binária versionada
+    """
+    writer = _Writer()
+    writer.node(tree)
+    return writer.to_bytes(PLAN_MAGIC)
+
+
+def load_plan(data):
+    """
+    Reconstrói uma árvore de plano serializada por dump_plan.
+
+    Raises:
+        ValueError: Se a assinatura ou a versão do formato não forem
+                    reconhecidas, ou se os dados estiverem truncados ou corrompidos
+    """
+    return _decode(data, PLAN_MAGIC, _Reader.node)
+
+
+def dump_cache_entries(entries):
+    """
+    Serializa entradas do cache de planos.
+
+    Args:
+        entries: Iterável de (chave, entrada), onde a entrada é o dicionário
+                 {'parsed', 'tree', 'optimized_tree', 'optimization_log'}
+
+    Returns:
+        bytes: Representação binária versionada
+    """
+    writer = _Writer()
+    entries = list(entries)
+    writer.uint(len(entries))
+    for key, entry in entries:
+        writer.string(key)
+        writer.statement(entry['parsed'])
+        writer.node(entry['tree'])
+        optimized = entry['optimized_tree']
+        writer.body.append(optimized is not None)
+        if optimized is not None:
+            writer.node(optimized)
+            writer.uint(len(entry['optimization_log']))
+            for line in entry['optimization_log']:
+                writer.string(line)
+    return writer.to_bytes(CACHE_MAGIC)
+
+
+def load_cache_entries(data):
+    """
+    Reconstrói as entradas gravadas por dump_cache_entries.
+
+    Returns:
+        list: Lista de (chave, entrada) na ordem em que foram gravadas
+
+    Raises:
+        ValueError: Se a assinatura ou a versão do formato não forem
+                    reconhecidas, ou se os dados estiverem truncados ou corrompidos
+    """
+    return _decode(data, CACHE_MAGIC, _read_cache_entries)
+
+
+def _decode(data, magic, read):
+    """
+    Aplica `read` a um _Reader sobre `data`. Leituras além do fim (arquivo
+    truncado, ex.: gravação interrompida) e bytes inválidos viram ValueError,
+    assim como bytes sobrando após o último registro.
+    """
+    with _gc_paused():
+        try:
+            reader = _Reader(data, magic)
+            result = read(reader)
+        except (IndexError, UnicodeDecodeError, struct.error) as e:
+            raise ValueError(f"Plano serializado truncado ou corrompido: {e}") from e
+    reader.finish()
+    return result
+
+
+def _read_cache_entries(reader):
+    entries = []
+    for _ in range(reader.uint()):
+        key = reader.string()
+        entry = {
+            'parsed': reader.statement(),
+            'tree': reader.node(),
+            'optimized_tree': None,
+            'optimization_log': None,
+        }
+        if reader.byte():
+            entry['optimized_tree'] = reader.node()
+            entry['optimization_log'] = [reader.string() for _ in range(reader.uint())]
+        entries.append((key, entry))
+    return entries
+
+
+class _gc_paused:
+    """
+    Suspende o coletor de ciclos durante a decodificação: ela cria muitos
+    objetos pequenos e acíclicos, e as coletas disparadas pela alocação
+    dominariam o tempo de carga.
+    """
+
+    def __enter__(self):
+        self.was_enabled = gc.isenabled()
+        gc.disable()
+
+    def __exit__(self, *exc):
+        if self.was_enabled:
+            gc.enable()
+        return False
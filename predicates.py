@@ -0,0 +1,542 @@
+"""
+Utilitários sobre árvores de predicados (expressões do sql_parser).
+
+As condições de seleção e de junção são mantidas como expressões já
+analisadas; estas funções as decompõem e recompõem sem voltar ao texto.
+"""
+import operator
+
+from relation_sets import RelationBits, iter_bits, bit_count
+from sql_parser import (
+    And, Or, Not, ColumnRef, Comparison, Arithmetic, InList, IsNull, Literal, Parameter,
+)
+
+# Operador equivalente com os operandos trocados (`10 < x` é `x > 10`)
+FLIPPED_OPS = {'<': '>', '<=': '>=', '>': '<', '>=': '<=', '=': '=', '<>': '<>', '!=': '!='}
+
+# Valores lógicos intermediários da simplificação; nunca ficam em um plano
+# (simplify_condition os transforma em "sem condição" ou em contradição)
+TRUE = Literal(True)
+FALSE = Literal(False)
+
+_COMPARE = {'=': operator.eq, '<>': operator.ne, '!=': operator.ne, '<': operator.lt,
+            '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+_ARITHMETIC = {'+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv}
+
+
+def split_conjuncts(condition):
+    """
+    Decompõe uma condição em seus termos conjuntivos (AND de nível superior).
+
+    Disjunções não são separadas: `a = 1 OR b = 2` é um único termo.
+
+    Args:
+        condition: Expression ou None
+
+    Returns:
+        list: Lista de Expression (vazia se não houver condição)
+    """
+    if condition is None:
+        return []
+    if isinstance(condition, And):
+        terms = []
+        for term in condition.terms:
+            terms.extend(split_conjuncts(term))
+        return terms
+    return [condition]
+
+
+def conjoin(terms):
+    """
+    Combina termos em uma única condição conjuntiva.
+
+    Returns:
+        Expression: None para lista vazia, o próprio termo se houver só um,
+                    ou um And achatado
+    """
+    flat = []
+    for term in terms:
+        flat.extend(split_conjuncts(term))
+    if not flat:
+        return None
+    if len(flat) == 1:
+        return flat[0]
+    return And(flat)
+
+
+def equi_join_columns(condition):
+    """
+    Retorna os pares (coluna, coluna) de igualdades entre relações diferentes.
+
+    Args:
+        condition: Expression ou None
+
+    Returns:
+        list: Lista de tuplas (ColumnRef, ColumnRef)
+    """
+    pairs = []
+    for term in split_conjuncts(condition):
+        if (isinstance(term, Comparison) and term.op == '='
+                and isinstance(term.left, ColumnRef) and isinstance(term.right, ColumnRef)
+                and term.left.table and term.right.table
+                and term.left.table != term.right.table):
+            pairs.append((term.left, term.right))
+    return pairs
+
+
+def column_constant(term):
+    """
+    Decompõe `coluna op constante` (ou `constante op coluna`).
+
+    Returns:
+        tuple: (ColumnRef, op, Literal/Parameter) com a coluna à esquerda,
+               ou None se o termo não tiver essa forma
+    """
+    if not isinstance(term, Comparison) or term.op not in FLIPPED_OPS:
+        return None
+    left, op, right = term.left, term.op, term.right
+    if isinstance(right, ColumnRef) and isinstance(left, (Literal, Parameter)):
+        left, op, right = right, FLIPPED_OPS[op], left
+    if isinstance(left, ColumnRef) and isinstance(right, (Literal, Parameter)):
+        return left, op, right
+    return None
+
+
+def column_equivalence_classes(conditions):
+    """
+    Agrupa colunas qualificadas ligadas por igualdades `a.x = b.y`.
+
+    A igualdade é transitiva: `a.x = b.y AND b.y = c.z` coloca as três
+    colunas na mesma classe.
+
+    Args:
+        conditions: Lista de Expression (termos conjuntivos)
+
+    Returns:
+        list: Classes (frozenset de ColumnRef) com duas ou mais colunas
+    """
+    parent = {}
+
+    def find(column):
+        parent.setdefault(column, column)
+        while parent[column] != column:
+            parent[column] = parent[parent[column]]
+            column = parent[column]
+        return column
+
+    for term in conditions:
+        if (isinstance(term, Comparison) and term.op == '='
+                and isinstance(term.left, ColumnRef) and isinstance(term.right, ColumnRef)
+                and term.left.table and term.right.table and term.left != term.right):
+            parent[find(term.left)] = find(term.right)
+
+    classes = {}
+    for column in parent:
+        classes.setdefault(find(column), set()).add(column)
+    return [frozenset(members) for members in classes.values() if len(members) > 1]
+
+
+def transitive_predicates(conditions):
+    """
+    Predicados implicados pelas igualdades entre colunas (fecho transitivo).
+
+    Para cada comparação `coluna op constante` cuja coluna pertence a uma
+    classe de equivalência, gera a mesma comparação para os demais membros
+    da classe: `c.id = p.cliente_id AND p.cliente_id = 10` implica
+    `c.id = 10`. Termos já presentes (em qualquer orientação) não são gerados
+    de novo, então reaplicar a função sobre o resultado não produz nada.
+
+    Args:
+        conditions: Lista de Expression (termos conjuntivos)
+
+    Returns:
+        list: Novos termos Comparison, na ordem em que foram derivados
+    """
+    classes = column_equivalence_classes(conditions)
+    if not classes:
+        return []
+    class_of = {column: members for members in classes for column in members}
+
+    existing = set()
+    for term in conditions:
+        bound = column_constant(term)
+        if bound is not None:
+            existing.add(bound)
+
+    derived = []
+    for term in conditions:
+        bound = column_constant(term)
+        if bound is None or bound[0] not in class_of:
+            continue
+        column, op, value = bound
+        for member in sorted(class_of[column], key=str):
+            if (member, op, value) not in existing:
+                existing.add((member, op, value))
+                derived.append(Comparison(op, member, value))
+    return derived
+
+
+# --- Simplificação ---
+#
+# Só literais numéricos participam do raciocínio sobre valores: comparações
+# de texto dependem da collation do MySQL (maiúsculas, acentos, espaços à
+# direita), então termos com texto ou marcadores `$n` são apenas
+# deduplicados. Comparações com NULL nunca são verdadeiras, por isso
+# `x IS NULL` contradiz qualquer comparação sobre x.
+
+def _numeric(expr):
+    return (isinstance(expr, Literal) and isinstance(expr.value, (int, float))
+            and not isinstance(expr.value, bool))
+
+
+def fold_constants(expr):
+    """
+    Avalia as partes da expressão que só envolvem constantes numéricas.
+
+    `100 * 5` vira `500`, `2 > 1` vira TRUE, `x > 1 OR 1 = 1` vira TRUE e
+    `x > 1 AND 1 = 0` vira FALSE. Divisão por zero (NULL no MySQL) não é
+    avaliada. Listas IN perdem valores repetidos (`x IN (1, 1)` vira `x = 1`).
+
+    Returns:
+        Expression: Expressão simplificada (pode ser TRUE ou FALSE)
+    """
+    def fold(node):
+        if isinstance(node, Arithmetic) and _numeric(node.left) and _numeric(node.right):
+            if node.op == '/' and node.right.value == 0:
+                return node
+            return Literal(_ARITHMETIC[node.op](node.left.value, node.right.value))
+        if (isinstance(node, Comparison) and node.op in _COMPARE
+                and _numeric(node.left) and _numeric(node.right)):
+            return TRUE if _COMPARE[node.op](node.left.value, node.right.value) else FALSE
+        if isinstance(node, InList) and _numeric(node.expr) and all(_numeric(v) for v in node.values):
+            found = any(node.expr.value == v.value for v in node.values)
+            return TRUE if found != node.negated else FALSE
+        if isinstance(node, InList):
+            # Valores repetidos (ex.: literais iguais ligados a marcadores distintos)
+            values = list(dict.fromkeys(node.values))
+            if len(values) == 1:
+                return Comparison('<>' if node.negated else '=', node.expr, values[0])
+            if len(values) < len(node.values):
+                return InList(node.expr, values, node.negated)
+        if isinstance(node, Not) and node.term in (TRUE, FALSE):
+            return FALSE if node.term == TRUE else TRUE
+        if isinstance(node, (And, Or)):
+            absorbing, neutral = (FALSE, TRUE) if isinstance(node, And) else (TRUE, FALSE)
+            if absorbing in node.terms:
+                return absorbing
+            terms = [t for t in node.terms if t != neutral]
+            if len(terms) == len(node.terms):
+                return node
+            if not terms:
+                return neutral
+            return terms[0] if len(terms) == 1 else node.with_operands(*terms)
+        return node
+    return expr.transform(fold)
+
+
+class _ColumnRange:
+    """Restrições numéricas de uma coluna dentro de uma conjunção."""
+
+    def __init__(self, column):
+        self.column = column
+        self.terms = []
+        self.equal = []
+        self.lower = None   # (Literal, inclusivo)
+        self.upper = None
+        self.not_equal = []
+        self.is_null = False
+        self.not_null = False
+
+    def add(self, term, op, value):
+        self.terms.append(term)
+        if op == '=':
+            self.equal.append(value)
+        elif op in ('<>', '!='):
+            self.not_equal.append(value)
+        elif op in ('>', '>='):
+            bound = (value, op == '>=')
+            if self.lower is None or _tighter(bound, self.lower, lower=True):
+                self.lower = bound
+        else:
+            bound = (value, op == '<=')
+            if self.upper is None or _tighter(bound, self.upper, lower=False):
+                self.upper = bound
+
+    def add_null_test(self, term):
+        self.terms.append(term)
+        if term.negated:
+            self.not_null = True
+        else:
+            self.is_null = True
+
+    def contradictory(self):
+        compared = self.equal or self.not_equal or self.lower or self.upper
+        if self.is_null and (compared or self.not_null):
+            return True
+        if len({v.value for v in self.equal}) > 1:
+            return True
+        if self.lower and self.upper:
+            (low, low_inclusive), (high, high_inclusive) = self.lower, self.upper
+            if low.value > high.value or (low.value == high.value and not (low_inclusive and high_inclusive)):
+                return True
+        if self.equal:
+            value = self.equal[0].value
+            if not self._within(value) or any(v.value == value for v in self.not_equal):
+                return True
+        return False
+
+    def _within(self, value):
+        if self.lower:
+            low, inclusive = self.lower
+            if value < low.value or (value == low.value and not inclusive):
+                return False
+        if self.upper:
+            high, inclusive = self.upper
+            if value > high.value or (value == high.value and not inclusive):
+                return False
+        return True
+
+    def simplified(self):
+        """Termos equivalentes sem redundâncias (supõe que não há contradição)."""
+        column = self.column
+        if self.is_null:
+            return [IsNull(column)]
+        if self.equal:
+            return [Comparison('=', column, self.equal[0])]
+        if (self.lower and self.upper and self.lower[1] and self.upper[1]
+                and self.lower[0].value == self.upper[0].value):
+            return [Comparison('=', column, self.lower[0])]
+        terms = []
+        if self.lower:
+            terms.append(Comparison('>=' if self.lower[1] else '>', column, self.lower[0]))
+        if self.upper:
+            terms.append(Comparison('<=' if self.upper[1] else '<', column, self.upper[0]))
+        seen = set()
+        for value in self.not_equal:
+            # `x <> v` fora do intervalo já é garantido pelos limites
+            if value.value not in seen and self._within(value.value):
+                seen.add(value.value)
+                terms.append(Comparison('<>', column, value))
+        if not terms and self.not_null:
+            terms.append(IsNull(column, negated=True))
+        return terms
+
+
+def _tighter(bound, current, lower):
+    """O limite `bound` restringe mais que `current`?"""
+    value, inclusive = bound[0].value, bound[1]
+    current_value, current_inclusive = current[0].value, current[1]
+    if value == current_value:
+        return current_inclusive and not inclusive
+    return value > current_value if lower else value < current_value
+
+
+def simplify_conjuncts(terms):
+    """
+    Normaliza uma lista de termos conjuntivos.
+
+    Avalia constantes (fold_constants), remove termos repetidos (também na
+    orientação invertida, `10 < x` e `x > 10`) e termos implicados por outros
+    sobre a mesma coluna (`x > 5 AND x > 10` → `x > 10`, `x = 3 AND x < 7` →
+    `x = 3`) e detecta contradições (`x = 1 AND x = 2`, `x > 10 AND x < 5`,
+    `x IS NULL AND x > 0`, ou um termo que é sempre falso).
+
+    Returns:
+        tuple: (termos simplificados, contraditório). Lista vazia sem
+               contradição significa condição sempre verdadeira.
+    """
+    slots = []      # termos mantidos e, na posição do primeiro termo, cada _ColumnRange
+    ranges = {}
+    seen = set()
+    for term in terms:
+        for part in _conjunct_parts(term):
+            if part == TRUE:
+                continue
+            if part == FALSE:
+                return [], True
+            bound = column_constant(part)
+            key = bound if bound is not None else part
+            if key in seen:
+                continue
+            seen.add(key)
+
+            column = None
+            if bound is not None and _numeric(bound[2]):
+                column = bound[0]
+            elif isinstance(part, IsNull) and isinstance(part.expr, ColumnRef):
+                column = part.expr
+            if column is None:
+                slots.append(part)
+                continue
+            column_range = ranges.get(column)
+            if column_range is None:
+                column_range = ranges[column] = _ColumnRange(column)
+                slots.append(column_range)
+            if isinstance(part, IsNull):
+                column_range.add_null_test(part)
+            else:
+                column_range.add(part, bound[1], bound[2])
+
+    result = []
+    for slot in slots:
+        if not isinstance(slot, _ColumnRange):
+            result.append(slot)
+            continue
+        if slot.contradictory():
+            return [], True
+        simplified = slot.simplified()
+        # Sem redundância na coluna: mantém os termos como foram escritos
+        if len(simplified) == len(slot.terms) and set(map(_term_key, simplified)) == set(map(_term_key, slot.terms)):
+            simplified = slot.terms
+        result.extend(simplified)
+    return result, False
+
+
+def _term_key(term):
+    bound = column_constant(term)
+    return bound if bound is not None else term
+
+
+def _conjunct_parts(term):
+    """Termos conjuntivos após avaliar constantes; cada OR já simplificado e fatorado."""
+    for part in split_conjuncts(fold_constants(term)):
+        if isinstance(part, Or):
+            yield from split_conjuncts(_simplify_disjunction(part))
+        else:
+            yield part
+
+
+def or_branches(expr):
+    """Ramos de um OR, achatando ORs aninhados."""
+    branches = []
+    for term in expr.terms:
+        branches.extend(or_branches(term) if isinstance(term, Or) else [term])
+    return branches
+
+
+def _simplify_disjunction(expr):
+    """
+    Simplifica cada ramo de um OR e normaliza a disjunção: ramos
+    contraditórios são descartados, um ramo que contém todos os termos de
+    outro é absorvido (`A OR (A ∧ C)` = `A`) e termos comuns a todos os
+    ramos são fatorados (`(A ∧ B) OR (A ∧ C)` = `A ∧ (B OR C)`). O que sobra
+    de igualdades sobre uma mesma coluna vira IN (`x = 1 OR x = 2` =
+    `x IN (1, 2)`), a mesma forma dos predicados de disjunction_predicates,
+    de modo que um predicado derivado e o OR de onde veio não ficam os dois.
+    """
+    branches = []
+    for branch in or_branches(expr):
+        terms, contradictory = simplify_conjuncts(split_conjuncts(branch))
+        if contradictory:
+            continue
+        if not terms:
+            return TRUE
+        if terms not in branches:
+            branches.append(terms)
+    if not branches:
+        return FALSE
+    branches = [b for i, b in enumerate(branches)
+                if not any(j != i and set(other) < set(b) for j, other in enumerate(branches))]
+    if len(branches) == 1:
+        return conjoin(branches[0])
+
+    common = [t for t in branches[0] if all(t in b for b in branches[1:])]
+    result = _disjunction_of([[t for t in b if t not in common] for b in branches])
+    if common:
+        result = conjoin(common + [result])
+    return expr if result == expr else result
+
+
+def disjunction_predicates(conditions, relation_bits=None):
+    """
+    Predicados por relação implicados por ORs que envolvem várias relações.
+
+    Em `(a.x = 1 ∧ b.y = 2) OR (a.x = 3 ∧ b.y = 4)`, todo ramo restringe
+    `a` e `b` separadamente, então valem `a.x IN (1, 3)` e `b.y IN (2, 4)`;
+    esses predicados podem descer até as relações, enquanto o OR original
+    continua acima da junção. Uma relação sem restrição em algum ramo não
+    recebe predicado. Termos já presentes em `conditions` não são gerados de
+    novo.
+
+    Args:
+        conditions: Lista de Expression (termos conjuntivos)
+        relation_bits: RelationBits da consulta (padrão: bits só das relações dos termos)
+
+    Returns:
+        list: Novos termos, na ordem em que foram derivados
+    """
+    if relation_bits is None:
+        relation_bits = RelationBits(frozenset().union(*(term.tables for term in conditions)))
+    mask = relation_bits.mask
+    existing = set(conditions)
+    derived = []
+    for term in conditions:
+        if not isinstance(term, Or) or bit_count(mask(term.tables)) < 2:
+            continue
+        branches = [split_conjuncts(branch) for branch in or_branches(term)]
+        implied = []
+        for index in iter_bits(mask(term.tables)):
+            relation = 1 << index
+            parts = [[t for t in branch if mask(t.tables) == relation] for branch in branches]
+            if all(parts):
+                implied.append(_disjunction_of(parts))
+        for predicate in sorted(implied, key=str):
+            if predicate not in existing:
+                existing.add(predicate)
+                derived.append(predicate)
+    return derived
+
+
+def _disjunction_of(branches):
+    """OR dos ramos (listas de termos); igualdades sobre uma mesma coluna viram IN."""
+    values = []
+    column = None
+    for terms in branches:
+        if len(terms) != 1:
+            break
+        term = terms[0]
+        if isinstance(term, InList) and not term.negated and isinstance(term.expr, ColumnRef):
+            branch_column, branch_values = term.expr, term.values
+        else:
+            bound = column_constant(term)
+            if bound is None or bound[1] != '=':
+                break
+            branch_column, branch_values = bound[0], (bound[2],)
+        if column is not None and branch_column != column:
+            break
+        column = branch_column
+        values.extend(v for v in branch_values if v not in values)
+    else:
+        return Comparison('=', column, values[0]) if len(values) == 1 else InList(column, values)
+
+    disjuncts = []
+    for terms in branches:
+        disjunct = conjoin(terms)
+        if disjunct not in disjuncts:
+            disjuncts.append(disjunct)
+    return disjuncts[0] if len(disjuncts) == 1 else Or(disjuncts)
+
+
+def simplify_condition(condition):
+    """
+    Simplifica uma condição de seleção ou de junção (ver simplify_conjuncts).
+
+    Returns:
+        tuple: (condição, contraditório); a condição é None quando é sempre
+               verdadeira ou quando é contraditória
+    """
+    if condition is None:
+        return None, False
+    terms, contradictory = simplify_conjuncts(split_conjuncts(condition))
+    if contradictory:
+        return None, True
+    return conjoin(terms), False
+
+
+def bind_parameters(expr, literals):
+    """Substitui os nós Parameter (`$n`) de uma expressão pelos literais correspondentes."""
+    def bind(node):
+        if isinstance(node, Parameter):
+            return Literal(literals[node.index - 1])
+        return node
+    return expr.transform(bind)
@@ -0,0 +1,73 @@
+"""
+Conjuntos de relações representados como inteiros (bitsets).
+
+Os bits valem para uma consulta: um RelationBits é montado a partir das
+relações (tabelas e aliases) da árvore sendo otimizada e passado a quem
+classifica predicados e enumera junções. Assim as máscaras têm no máximo
+um bit por relação da consulta, e otimizações simultâneas (threads, modo
+em lote) não compartilham estado. Testes de subconjunto, interseção e
+conectividade são operações inteiras (`a & ~b == 0`, `a & b`) em vez de
+operações sobre frozensets.
+"""
+
+
+class RelationBits:
+    """
+    Bits das relações de uma consulta.
+
+    Nomes são comparados sem distinção de maiúsculas (`Cliente` e `cliente`
+    são a mesma relação). Nomes que não estavam na consulta recebem o
+    próximo bit livre na primeira vez em que aparecem.
+    """
+    __slots__ = ('_bits', '_masks')
+
+    def __init__(self, names=()):
+        self._bits = {}
+        self._masks = {}
+        # Ordem estável: os bits não dependem da ordem de iteração do conjunto
+        for name in sorted(names, key=str.lower):
+            self.bit(name)
+
+    @classmethod
+    def of(cls, tree):
+        """Bits das tabelas e aliases de uma árvore (PlanNode)."""
+        return cls(tree.tables)
+
+    def __len__(self):
+        return len(self._bits)
+
+    def bit(self, name):
+        """Bit (potência de 2) associado ao nome de tabela/alias."""
+        key = name.lower()
+        bit = self._bits.get(key)
+        if bit is None:
+            bit = self._bits[key] = 1 << len(self._bits)
+        return bit
+
+    def mask(self, names):
+        """Máscara de um conjunto de nomes (o `tables` de um nó ou expressão), memorizada."""
+        mask = self._masks.get(names)
+        if mask is None:
+            mask = 0
+            for name in names:
+                mask |= self.bit(name)
+            self._masks[names] = mask
+        return mask
+
+
+def is_subset(mask, of):
+    """True se todas as relações de `mask` estão em `of`."""
+    return not mask & ~of
+
+
+def iter_bits(mask):
+    """Índices dos bits ligados, do menor para o maior."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def bit_count(mask):
+    """Número de relações no conjunto."""
+    return bin(mask).count('1')
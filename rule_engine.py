@@ -0,0 +1,182 @@
+"""
+Motor de regras de reescrita do otimizador.
+
+Cada reescrita é uma Rule com `match(tree, optimizer)` (a regra se aplica a
+esta árvore?) e `apply(tree, optimizer)` (retorna a nova árvore). O motor
+aplica as regras registradas, na ordem de registro, em passadas sucessivas
+até que uma passada inteira não altere a árvore (ponto fixo) ou até esgotar
+o limite de iterações.
+
+Cada execução de regra gera um RuleFiring com o número de nós antes e depois,
+o tempo gasto e se a árvore mudou, o que permite ver quais regras são caras
+e quais nunca disparam.
+"""
+import time
+
+DEFAULT_MAX_ITERATIONS = 5
+
+
+class Rule:
+    """
+    Regra de reescrita.
+
+    Pode ser usada diretamente, passando funções `apply`/`match`, ou
+    estendida sobrescrevendo os métodos de mesmo nome.
+
+    Args:
+        name: Identificador da regra (ex.: 'selection_pushdown')
+        title: Título exibido no log de otimização
+        apply: Função (tree, optimizer) -> nova árvore
+        match: Função (tree, optimizer) -> bool (padrão: sempre se aplica)
+        skip_message: Linha de log quando a regra não se aplica à consulta
+    """
+
+    def __init__(self, name, title=None, apply=None, match=None,
+                 skip_message="Regra não se aplica a esta consulta."):
+        self.name = name
+        self.title = title or name
+        self.skip_message = skip_message
+        self._apply = apply
+        self._match = match
+
+    def match(self, tree, optimizer):
+        return self._match(tree, optimizer) if self._match else True
+
+    def apply(self, tree, optimizer):
+        if self._apply is None:
+            raise NotImplementedError(f"Regra {self.name!r} sem apply")
+        return self._apply(tree, optimizer)
+
+    def __repr__(self):
+        return f"Rule({self.name!r})"
+
+
+class RuleFiring:
+    """Registro de uma execução de regra."""
+    __slots__ = ('rule', 'iteration', 'matched', 'changed', 'nodes_before', 'nodes_after', 'elapsed')
+
+    def __init__(self, rule, iteration, matched, changed, nodes_before, nodes_after, elapsed):
+        self.rule = rule
+        self.iteration = iteration
+        self.matched = matched
+        self.changed = changed
+        self.nodes_before = nodes_before
+        self.nodes_after = nodes_after
+        self.elapsed = elapsed
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return (f"RuleFiring({self.rule!r}, iteration={self.iteration}, changed={self.changed}, "
+                f"nodes={self.nodes_before}->{self.nodes_after}, elapsed={self.elapsed * 1000:.3f}ms)")
+
+
+class RuleEngine:
+    """Aplica regras registradas até o ponto fixo, registrando cada execução."""
+
+    def __init__(self, rules=(), max_iterations=DEFAULT_MAX_ITERATIONS):
+        self.rules = list(rules)
+        self.max_iterations = max_iterations
+        self.trace = []
+        self.iterations = 0
+
+    def register(self, rule, before=None, after=None):
+        """
+        Registra uma regra, por padrão no fim da lista.
+
+        Args:
+            rule: Rule a registrar
+            before/after: Nome de uma regra já registrada para posicionar a nova
+        """
+        if any(r.name == rule.name for r in self.rules):
+            raise ValueError(f"Regra já registrada: {rule.name!r}")
+        anchor = before or after
+        if anchor is None:
+            self.rules.append(rule)
+            return rule
+        for i, existing in enumerate(self.rules):
+            if existing.name == anchor:
+                self.rules.insert(i if before else i + 1, rule)
+                return rule
+        raise KeyError(f"Regra não encontrada: {anchor!r}")
+
+    def unregister(self, name):
+        """Remove a regra com o nome dado."""
+        self.rules = [rule for rule in self.rules if rule.name != name]
+
+    def rule(self, name):
+        for rule in self.rules:
+            if rule.name == name:
+                return rule
+        raise KeyError(f"Regra não encontrada: {name!r}")
+
+    def run(self, tree, optimizer):
+        """
+        Reescreve a árvore até o ponto fixo.
+
+        O log de otimização (optimizer.optimization_log) recebe o título de
+        cada regra na primeira passada; nas passadas seguintes só aparecem as
+        regras que alteraram a árvore.
+
+        Returns:
+            PlanNode: Árvore reescrita
+        """
+        log = optimizer.optimization_log
+        self.trace = []
+        self.iterations = 0
+
+        for iteration in range(1, self.max_iterations + 1):
+            self.iterations = iteration
+            pass_start = tree
+            for index, rule in enumerate(self.rules, 1):
+                mark = len(log)
+                header = f"\n[HEURÍSTICA {index}] {rule.title}:"
+                if iteration > 1:
+                    header = f"\n[HEURÍSTICA {index}] {rule.title} (iteração {iteration}):"
+                log.append(header)
+
+                nodes_before = tree.node_count()
+                start = time.perf_counter()
+                matched = rule.match(tree, optimizer)
+                new_tree = rule.apply(tree, optimizer) if matched else tree
+                elapsed = time.perf_counter() - start
+                changed = new_tree != tree
+
+                self.trace.append(RuleFiring(rule.name, iteration, matched, changed, nodes_before,
+                                             new_tree.node_count() if changed else nodes_before, elapsed))
+                if iteration == 1 and not matched:
+                    log.append(f"  - {rule.skip_message}")
+                elif iteration > 1 and not changed:
+                    del log[mark:]
+                tree = new_tree
+            if tree == pass_start:
+                break
+        else:
+            log.append(f"\n  ! Limite de {self.max_iterations} iterações atingido antes do ponto fixo.")
+        return tree
+
+    def summary(self):
+        """
+        Totais por regra da última execução.
+
+        Returns:
+            list: [{'rule', 'runs', 'fired', 'elapsed'}] na ordem de registro
+        """
+        totals = {rule.name: {'rule': rule.name, 'runs': 0, 'fired': 0, 'elapsed': 0.0}
+                  for rule in self.rules}
+        for firing in self.trace:
+            entry = totals.setdefault(firing.rule, {'rule': firing.rule, 'runs': 0, 'fired': 0, 'elapsed': 0.0})
+            entry['runs'] += 1
+            entry['fired'] += firing.changed
+            entry['elapsed'] += firing.elapsed
+        return list(totals.values())
+
+    def format_trace(self):
+        """Tabela textual com cada execução de regra da última otimização."""
+        lines = [f"{'iter':>4}  {'regra':<24} {'disparou':<8} {'nós':>11} {'tempo':>10}"]
+        for f in self.trace:
+            fired = 'sim' if f.changed else ('-' if f.matched else 'n/a')
+            lines.append(f"{f.iteration:>4}  {f.rule:<24} {fired:<8} "
+                         f"{f.nodes_before:>5}->{f.nodes_after:<5} {f.elapsed * 1000:8.3f}ms")
+        return '\n'.join(lines)
@@ -0,0 +1,930 @@
+"""
+Analisador léxico e sintático (descendente recursivo) para o subconjunto de SQL
+suportado pelo projeto:
+
+    SELECT colunas FROM tabela [alias] [[INNER] JOIN tabela [alias] ON condição]* [WHERE condição]
+
+A consulta é tokenizada uma única vez e convertida em uma AST compartilhada pelo
+validador, pelo conversor e pelo otimizador.
+"""
+import re
+
+
+
+class SQLSyntaxError(ValueError):
+    """Erro de sintaxe encontrado durante a análise léxica ou sintática."""
+
+    def __init__(self, message, position=None):
+        super().__init__(message)
+        self.message = message
+        self.position = position
+
+
+KEYWORDS = frozenset({
+    'SELECT', 'FROM', 'WHERE', 'AS', 'JOIN', 'INNER', 'LEFT', 'RIGHT', 'FULL',
+    'OUTER', 'CROSS', 'ON', 'AND', 'OR', 'NOT', 'IN', 'IS', 'NULL', 'LIKE',
+})
+
+JOIN_TYPES = ('INNER', 'LEFT', 'RIGHT', 'FULL', 'CROSS')
+
+COMPARISON_OPERATORS = ('=', '<>', '!=', '<', '<=', '>', '>=')
+
+
+# =============================================================================
+# Analisador léxico
+# =============================================================================
+
+class Token:
+    """Token produzido pelo analisador léxico."""
+    __slots__ = ('kind', 'value', 'pos')
+
+    def __init__(self, kind, value, pos):
+        self.kind = kind
+        self.value = value
+        self.pos = pos
+
+    def __repr__(self):
+        return f"Token({self.kind}, {self.value!r}, {self.pos})"
+
+
+# Uma única expressão com alternativas nomeadas: cada token é reconhecido com um
+# `match` ancorado na posição atual, sem retrocesso sobre o restante do texto.
+_TOKEN_RE = re.compile(r"""
+    (?P<WS>\s+)
+  | (?P<COMMENT>--[^\n]*|/\*(?:[^*]|\*(?!/))*\*/)
+  | (?P<STRING>'(?:[^']|'')*'|"(?:[^"]|"")*")
+  | (?P<NUMBER>\d+(?:\.\d+)?)
+  | (?P<IDENT>[^\W\d]\w*|`[^`]+`)
+  | (?P<OP><>|!=|<=|>=|=|<|>|\+|-|/)
+  | (?P<PUNCT>[(),.;*])
+  | (?P<CONJ>∧)
+""", re.VERBOSE)
+
+
+def tokenize(query):
+    """
+    Converte o texto da consulta em uma lista de tokens.
+
+    Args:
+        query: String contendo a consulta SQL
+
+    Returns:
+        list: Lista de Token terminada por um token 'EOF'
+    """
+    tokens = []
+    pos = 0
+    length = len(query)
+    match = _TOKEN_RE.match
+    while pos < length:
+        m = match(query, pos)
+        if not m:
+            char = query[pos]
+            if char in '\'"':
+                raise SQLSyntaxError("Literal de texto não terminado.", pos)
+            raise SQLSyntaxError(f"Caractere inesperado '{char}' na posição {pos}.", pos)
+        kind = m.lastgroup
+        text = m.group(kind)
+        if kind == 'IDENT':
+            if text.startswith('`'):
+                tokens.append(Token('IDENT', text[1:-1], pos))
+            elif text.upper() in KEYWORDS:
+                tokens.append(Token('KEYWORD', text.upper(), pos))
+            else:
+                tokens.append(Token('IDENT', text, pos))
+        elif kind == 'STRING':
+            quote = text[0]
+            tokens.append(Token('STRING', text[1:-1].replace(quote * 2, quote), pos))
+        elif kind == 'CONJ':
+            # '∧' é a forma como as condições são exibidas nas árvores
+            tokens.append(Token('KEYWORD', 'AND', pos))
+        elif kind not in ('WS', 'COMMENT'):
+            tokens.append(Token(kind, text, pos))
+        pos = m.end()
+    tokens.append(Token('EOF', None, length))
+    return tokens
+
+
+# =============================================================================
+# AST - Expressões
+# =============================================================================
+
+class Expression:
+    """
+    Classe base dos nós de expressão (condições e valores).
+
+    Os nós são imutáveis e calculam na construção o hash estrutural e os
+    conjuntos de relações (`tables`) e colunas (`columns`) referenciadas, a
+    partir dos operandos.
+    Assim o otimizador classifica predicados sem percorrer nem reanalisar a
+    expressão.
+    """
+    __slots__ = ('_hash', 'tables', 'columns')
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} é imutável")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} é imutável")
+
+    def _init(self, **fields):
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, '_hash', hash((type(self).__name__,) + self._key()))
+        tables, columns = self._references()
+        object.__setattr__(self, 'tables', tables)
+        object.__setattr__(self, 'columns', columns)
+
+    def _references(self):
+        operands = self.operands
+        if not operands:
+            return frozenset(), frozenset()
+        if len(operands) == 1:
+            return operands[0].tables, operands[0].columns
+        tables, columns = set(), set()
+        for operand in operands:
+            tables |= operand.tables
+            columns |= operand.columns
+        return frozenset(tables), frozenset(columns)
+
+    # --- Estrutura ---
+
+    @property
+    def operands(self):
+        """Subexpressões diretas."""
+        return ()
+
+    def _key(self):
+        """Campos que definem a identidade estrutural (e os argumentos do construtor)."""
+        raise NotImplementedError
+
+    def with_operands(self, *operands):
+        """Retorna uma cópia da expressão com novos operandos."""
+        return self
+
+    def transform(self, function):
+        """
+        Reconstrói a expressão de baixo para cima aplicando `function` a cada nó.
+
+        Args:
+            function: Recebe uma Expression (com operandos já transformados) e
+                      retorna a expressão que a substitui
+
+        Returns:
+            Expression: Nova expressão (subárvores inalteradas são reaproveitadas)
+        """
+        operands = self.operands
+        node = self
+        if operands:
+            new_operands = [operand.transform(function) for operand in operands]
+            if any(new is not old for new, old in zip(new_operands, operands)):
+                node = self.with_operands(*new_operands)
+        return function(node)
+
+    def __reduce__(self):
+        return (type(self), self._key())
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if type(other) is not type(self) or self._hash != other._hash:
+            return False
+        return self._key() == other._key()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self})"
+
+
+class ColumnRef(Expression):
+    """Referência a uma coluna, opcionalmente qualificada (`tabela.coluna`)."""
+    __slots__ = ('table', 'name')
+
+    def __init__(self, table, name):
+        self._init(table=table, name=name)
+
+    def _key(self):
+        return (self.table, self.name)
+
+    def _references(self):
+        return frozenset((self.table,)) if self.table else frozenset(), frozenset((self,))
+
+    def __str__(self):
+        return f"{self.table}.{self.name}" if self.table else self.name
+
+
+class Literal(Expression):
+    """Constante numérica, de texto ou NULL."""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self._init(value=value)
+
+    def _key(self):
+        # O tipo distingue 1 de 1.0, que são exibidos de forma diferente
+        return (self.value, type(self.value).__name__)
+
+    def __reduce__(self):
+        return (Literal, (self.value,))
+
+    def __str__(self):
+        if self.value is None:
+            return 'NULL'
+        if isinstance(self.value, str):
+            return "'" + self.value.replace("'", "''") + "'"
+        return str(self.value)
+
+
+class Parameter(Expression):
+    """
+    Marcador de posição (`$n`) que substitui um literal na forma canônica da
+    consulta (ver plan_cache.fingerprint_sql). O índice começa em 1.
+    """
+    __slots__ = ('index',)
+
+    def __init__(self, index):
+        self._init(index=index)
+
+    def _key(self):
+        return (self.index,)
+
+    def __str__(self):
+        return f"${self.index}"
+
+
+class Star(Expression):
+    """`*` ou `tabela.*` na lista de colunas."""
+    __slots__ = ('table',)
+
+    def __init__(self, table=None):
+        self._init(table=table)
+
+    def _key(self):
+        return (self.table,)
+
+    def _references(self):
+        return frozenset((self.table,)) if self.table else frozenset(), frozenset()
+
+    def __str__(self):
+        return f"{self.table}.*" if self.table else '*'
+
+
+class FunctionCall(Expression):
+    """Chamada de função, como `COUNT(*)` ou `UPPER(c.Nome)`."""
+    __slots__ = ('name', 'args')
+
+    def __init__(self, name, args):
+        self._init(name=name, args=tuple(args))
+
+    @property
+    def operands(self):
+        return self.args
+
+    def _key(self):
+        return (self.name, self.args)
+
+    def with_operands(self, *operands):
+        return FunctionCall(self.name, operands)
+
+    def __str__(self):
+        return f"{self.name}({', '.join(str(a) for a in self.args)})"
+
+
+class Arithmetic(Expression):
+    """Operação aritmética binária (+, -, *, /)."""
+    __slots__ = ('op', 'left', 'right')
+
+    def __init__(self, op, left, right):
+        self._init(op=op, left=left, right=right)
+
+    @property
+    def operands(self):
+        return (self.left, self.right)
+
+    def _key(self):
+        return (self.op, self.left, self.right)
+
+    def with_operands(self, left, right):
+        return Arithmetic(self.op, left, right)
+
+    def __str__(self):
+        return f"{_wrap_operand(self.left)} {self.op} {_wrap_operand(self.right)}"
+
+
+class Comparison(Expression):
+    """Comparação binária: =, <>, !=, <, <=, >, >=, LIKE e NOT LIKE."""
+    __slots__ = ('op', 'left', 'right')
+
+    def __init__(self, op, left, right):
+        self._init(op=op, left=left, right=right)
+
+    @property
+    def operands(self):
+        return (self.left, self.right)
+
+    def _key(self):
+        return (self.op, self.left, self.right)
+
+    def with_operands(self, left, right):
+        return Comparison(self.op, left, right)
+
+    def __str__(self):
+        return f"{self.left} {self.op} {self.right}"
+
+
+class InList(Expression):
+    """`expr [NOT] IN (v1, v2, ...)`."""
+    __slots__ = ('expr', 'values', 'negated')
+
+    def __init__(self, expr, values, negated=False):
+        self._init(expr=expr, values=tuple(values), negated=negated)
+
+    @property
+    def operands(self):
+        return (self.expr,) + self.values
+
+    def _key(self):
+        return (self.expr, self.values, self.negated)
+
+    def with_operands(self, expr, *values):
+        return InList(expr, values, self.negated)
+
+    def __str__(self):
+        op = 'NOT IN' if self.negated else 'IN'
+        return f"{self.expr} {op} ({', '.join(str(v) for v in self.values)})"
+
+
+class IsNull(Expression):
+    """`expr IS [NOT] NULL`."""
+    __slots__ = ('expr', 'negated')
+
+    def __init__(self, expr, negated=False):
+        self._init(expr=expr, negated=negated)
+
+    @property
+    def operands(self):
+        return (self.expr,)
+
+    def _key(self):
+        return (self.expr, self.negated)
+
+    def with_operands(self, expr):
+        return IsNull(expr, self.negated)
+
+    def __str__(self):
+        return f"{self.expr} IS {'NOT NULL' if self.negated else 'NULL'}"
+
+
+class And(Expression):
+    """Conjunção de duas ou mais condições (renderizada com ∧)."""
+    __slots__ = ('terms',)
+
+    def __init__(self, terms):
+        self._init(terms=tuple(terms))
+
+    @property
+    def operands(self):
+        return self.terms
+
+    def _key(self):
+        return (self.terms,)
+
+    def with_operands(self, *operands):
+        return And(operands)
+
+    def __str__(self):
+        return ' ∧ '.join(_wrap_boolean(t, Or) for t in self.terms)
+
+
+class Or(Expression):
+    """Disjunção de duas ou mais condições."""
+    __slots__ = ('terms',)
+
+    def __init__(self, terms):
+        self._init(terms=tuple(terms))
+
+    @property
+    def operands(self):
+        return self.terms
+
+    def _key(self):
+        return (self.terms,)
+
+    def with_operands(self, *operands):
+        return Or(operands)
+
+    def __str__(self):
+        return ' OR '.join(_wrap_boolean(t, And) for t in self.terms)
+
+
+class Not(Expression):
+    """Negação lógica."""
+    __slots__ = ('term',)
+
+    def __init__(self, term):
+        self._init(term=term)
+
+    @property
+    def operands(self):
+        return (self.term,)
+
+    def _key(self):
+        return (self.term,)
+
+    def with_operands(self, term):
+        return Not(term)
+
+    def __str__(self):
+        return f"NOT ({self.term})"
+
+
+def _wrap_boolean(term, other_kind):
+    """Coloca parênteses em torno de AND/OR aninhados para manter a leitura clara."""
+    return f"({term})" if isinstance(term, other_kind) else str(term)
+
+
+def _wrap_operand(expr):
+    return f"({expr})" if isinstance(expr, Arithmetic) else str(expr)
+
+
+# =============================================================================
+# AST - Comando SELECT
+# =============================================================================
+
+class SelectItem:
+    """Item da lista de colunas do SELECT, com alias opcional (imutável)."""
+    __slots__ = ('expr', 'alias', '_hash')
+
+    def __init__(self, expr, alias=None):
+        object.__setattr__(self, 'expr', expr)
+        object.__setattr__(self, 'alias', alias)
+        object.__setattr__(self, '_hash', hash(('SelectItem', expr, alias)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SelectItem é imutável")
+
+    @property
+    def tables(self):
+        return self.expr.tables
+
+    @property
+    def columns(self):
+        return self.expr.columns
+
+    def transform(self, function):
+        """Aplica `function` à expressão do item (ver Expression.transform)."""
+        expr = self.expr.transform(function)
+        return self if expr is self.expr else SelectItem(expr, self.alias)
+
+    def __reduce__(self):
+        return (SelectItem, (self.expr, self.alias))
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        return (isinstance(other, SelectItem) and self._hash == other._hash
+                and self.expr == other.expr and self.alias == other.alias)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __str__(self):
+        return f"{self.expr} AS {self.alias}" if self.alias else str(self.expr)
+
+    def __repr__(self):
+        return f"SelectItem({self})"
+
+
+class TableRef:
+    """Tabela na cláusula FROM/JOIN, com alias opcional."""
+    __slots__ = ('name', 'alias')
+
+    def __init__(self, name, alias=None):
+        self.name = name
+        self.alias = alias
+
+    def __repr__(self):
+        return f"TableRef({self.name!r}, {self.alias!r})"
+
+
+class JoinClause:
+    """Cláusula `[tipo] JOIN tabela ON condição`."""
+    __slots__ = ('join_type', 'table', 'condition')
+
+    def __init__(self, join_type, table, condition):
+        self.join_type = join_type
+        self.table = table
+        self.condition = condition
+
+    def __repr__(self):
+        return f"JoinClause({self.join_type!r}, {self.table!r}, {self.condition!r})"
+
+
+class SelectStatement:
+    """Raiz da AST de uma consulta SELECT."""
+    __slots__ = ('columns', 'table', 'joins', 'where')
+
+    def __init__(self, columns, table, joins, where):
+        self.columns = list(columns)
+        self.table = table
+        self.joins = list(joins)
+        self.where = where
+
+    @property
+    def columns_text(self):
+        """Lista de colunas renderizada como texto (ex.: 'c.Nome, p.valor')."""
+        return ', '.join(str(c) for c in self.columns)
+
+    @property
+    def tables(self):
+        """Lista de TableRef na ordem em que aparecem no FROM."""
+        return [self.table] + [j.table for j in self.joins]
+
+    def __repr__(self):
+        return (f"SelectStatement(columns={self.columns!r}, table={self.table!r}, "
+                f"joins={self.joins!r}, where={self.where!r})")
+
+
+# =============================================================================
+# Analisador sintático
+# =============================================================================
+
+class Parser:
+    """Parser descendente recursivo sobre a lista de tokens."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.index = 0
+        self._paren_depth = 0
+
+    # --- Navegação ---
+
+    @property
+    def current(self):
+        return self.tokens[self.index]
+
+    def _peek(self, offset=1):
+        index = min(self.index + offset, len(self.tokens) - 1)
+        return self.tokens[index]
+
+    def _advance(self):
+        token = self.tokens[self.index]
+        if token.kind != 'EOF':
+            self.index += 1
+        return token
+
+    def _is_keyword(self, *words, token=None):
+        token = token or self.current
+        return token.kind == 'KEYWORD' and token.value in words
+
+    def _is_punct(self, value):
+        return self.current.kind == 'PUNCT' and self.current.value == value
+
+    def _accept_keyword(self, *words):
+        if self._is_keyword(*words):
+            return self._advance()
+        return None
+
+    def _expect_keyword(self, word, message):
+        if not self._is_keyword(word):
+            self._error(message)
+        return self._advance()
+
+    def _expect_punct(self, value, message):
+        if not self._is_punct(value):
+            self._error(message)
+        return self._advance()
+
+    def _error(self, message):
+        raise SQLSyntaxError(message, self.current.pos)
+
+    def _describe(self, token):
+        if token.kind == 'EOF':
+            return 'fim da consulta'
+        return f"'{token.value}'"
+
+    # --- Comando ---
+
+    def parse_statement(self):
+        if not self._is_keyword('SELECT'):
+            self._error("A consulta deve começar com 'SELECT'.")
+        self._advance()
+        if self._is_keyword('SELECT'):
+            self._error("Palavra-chave 'SELECT' duplicada.")
+
+        columns = self._parse_select_list()
+
+        if not self._is_keyword('FROM'):
+            if self.current.kind == 'EOF':
+                self._error("Faltando a cláusula 'FROM'.")
+            self._error(f"Sintaxe inválida na lista de colunas perto de {self._describe(self.current)}. "
+                        f"Faltou uma vírgula?")
+        self._advance()
+        if self._is_keyword('FROM'):
+            self._error("Palavra-chave 'FROM' duplicada.")
+
+        table = self._parse_table_ref("Tabela base não identificada na cláusula FROM.")
+        joins = []
+        while self._is_keyword('JOIN', *JOIN_TYPES):
+            joins.append(self._parse_join())
+
+        where = None
+        if self._accept_keyword('WHERE'):
+            if self._is_keyword('WHERE'):
+                self._error("Palavra-chave 'WHERE' duplicada.")
+            where = self._parse_condition()
+
+        if self._is_punct(';'):
+            self._advance()
+        if self.current.kind != 'EOF':
+            if self._is_keyword('ON'):
+                self._error("Cláusula 'ON' utilizada sem JOIN.")
+            if self._is_keyword('JOIN', *JOIN_TYPES):
+                self._error("JOIN não pode aparecer após a cláusula WHERE.")
+            self._error(f"Texto inesperado perto de {self._describe(self.current)}.")
+
+        return SelectStatement(columns, table, joins, where)
+
+    def _parse_select_list(self):
+        if self._is_keyword('FROM') or self.current.kind == 'EOF':
+            self._error("Lista de colunas do SELECT está vazia ou ausente.")
+        if self._is_punct('*'):
+            self._advance()
+            return [SelectItem(Star())]
+
+        items = [self._parse_select_item()]
+        while self._is_punct(','):
+            self._advance()
+            if self._is_punct(',') or self._is_keyword('FROM'):
+                self._error("Vírgula extra ou mal posicionada na lista de colunas.")
+            items.append(self._parse_select_item())
+        return items
+
+    def _parse_select_item(self):
+        token = self.current
+        if token.kind == 'KEYWORD':
+            self._error(f"Palavra-chave reservada '{token.value}' não pode ser usada como nome de coluna.")
+        if token.kind == 'PUNCT' and token.value == '(':
+            self._error("Parênteses inapropriados na lista de colunas.")
+        if token.kind == 'PUNCT' and token.value == ',':
+            self._error("Vírgula extra ou mal posicionada na lista de colunas.")
+
+        if (token.kind == 'IDENT' and self._peek().value == '.'
+                and self._peek(2).kind == 'PUNCT' and self._peek(2).value == '*'):
+            # Qualificador, ponto e asterisco
+            self._advance()
+            self._advance()
+            self._advance()
+            return SelectItem(Star(token.value))
+
+        expr = self._parse_additive()
+        alias = None
+        if self._accept_keyword('AS'):
+            alias = self._expect_identifier("Alias ausente após 'AS' na lista de colunas.")
+        return SelectItem(expr, alias)
+
+    def _expect_identifier(self, message):
+        token = self.current
+        if token.kind == 'KEYWORD':
+            self._error(f"'{token.value}' é uma palavra-chave reservada. {message}")
+        if token.kind != 'IDENT':
+            self._error(message)
+        return self._advance().value
+
+    # --- FROM / JOIN ---
+
+    def _parse_table_ref(self, message):
+        if self._is_keyword('JOIN', *JOIN_TYPES, 'WHERE', 'SELECT', 'ON'):
+            self._error(f"'{self.current.value}' é uma palavra-chave reservada e não pode ser usada como tabela.")
+        name = self._expect_identifier(message)
+        alias = None
+        if self._accept_keyword('AS'):
+            alias = self._expect_identifier("Alias ausente após 'AS'.")
+        elif self.current.kind == 'IDENT':
+            alias = self._advance().value
+        return TableRef(name, alias)
+
+    def _parse_join(self):
+        join_type = 'INNER'
+        if self._is_keyword('LEFT', 'RIGHT', 'FULL'):
+            # O plano só representa junções internas: montar um outer join
+            # como INNER perderia as linhas sem correspondência
+            self._error(f"{self.current.value} JOIN não é suportado; use INNER JOIN.")
+        if self._is_keyword(*JOIN_TYPES):
+            join_type = self._advance().value
+        self._expect_keyword('JOIN', f"Esperado 'JOIN' após '{join_type}'.")
+        if self._is_keyword('JOIN', *JOIN_TYPES):
+            self._error(f"'{self.current.value} JOIN' duplicado.")
+
+        table = self._parse_table_ref("Tabela ausente após JOIN.")
+        if not self._is_keyword('ON'):
+            self._error("JOIN sem cláusula ON correspondente.")
+        self._advance()
+        if self._is_keyword('ON'):
+            self._error("Palavra-chave 'ON' duplicada.")
+        condition = self._parse_condition()
+        return JoinClause(join_type, table, condition)
+
+    # --- Condições ---
+
+    def _parse_condition(self):
+        terms = [self._parse_and()]
+        while self._accept_keyword('OR'):
+            terms.append(self._parse_and())
+        return terms[0] if len(terms) == 1 else Or(terms)
+
+    def _parse_and(self):
+        terms = [self._parse_not()]
+        while self._accept_keyword('AND'):
+            terms.append(self._parse_not())
+        return terms[0] if len(terms) == 1 else And(terms)
+
+    def _parse_not(self):
+        if self._accept_keyword('NOT'):
+            return Not(self._parse_not())
+        return self._parse_predicate()
+
+    def _parse_predicate(self):
+        if self._is_keyword('AND', 'OR'):
+            self._error("Operadores lógicos combinados de forma inválida.")
+        if self.current.kind == 'EOF' or self._is_punct(';'):
+            self._error("Condição incompleta: a cláusula não pode terminar com 'AND', 'OR' ou 'NOT'.")
+
+        left = self._parse_additive()
+        token = self.current
+
+        if token.kind == 'OP' and token.value in COMPARISON_OPERATORS:
+            self._advance()
+            return Comparison(token.value, left, self._parse_operand_after(token.value))
+
+        negated = bool(self._accept_keyword('NOT'))
+        if self._accept_keyword('LIKE'):
+            op = 'NOT LIKE' if negated else 'LIKE'
+            return Comparison(op, left, self._parse_operand_after('LIKE'))
+        if self._accept_keyword('IN'):
+            self._expect_punct('(', "Esperado '(' após IN.")
+            values = [self._parse_additive()]
+            while self._is_punct(','):
+                self._advance()
+                values.append(self._parse_additive())
+            self._expect_punct(')', "Parênteses desbalanceados na lista do IN.")
+            return InList(left, values, negated)
+        if negated:
+            self._error("Esperado LIKE ou IN após NOT.")
+
+        if self._accept_keyword('IS'):
+            negated = bool(self._accept_keyword('NOT'))
+            self._expect_keyword('NULL', "Esperado NULL após IS.")
+            return IsNull(left, negated)
+
+        if isinstance(left, (And, Or, Not, Comparison, InList, IsNull)):
+            return left
+        if self._paren_depth:
+            # Valor entre parênteses, como em `(a + b) > 3`: a comparação é
+            # concluída pelo nível externo.
+            return left
+        self._error(f"Condição incompleta perto de '{left}': esperado um operador de comparação.")
+
+    def _parse_operand_after(self, op):
+        token = self.current
+        if token.kind == 'OP' and token.value != '-':
+            self._error(f"Operador de comparação duplicado ou inválido ('{op} {token.value}').")
+        return self._parse_additive()
+
+    # --- Valores ---
+
+    def _parse_additive(self):
+        left = self._parse_term()
+        while self.current.kind == 'OP' and self.current.value in ('+', '-'):
+            op = self._advance().value
+            left = Arithmetic(op, left, self._parse_term())
+        return left
+
+    def _parse_term(self):
+        left = self._parse_unary()
+        while ((self.current.kind == 'PUNCT' and self.current.value == '*')
+               or (self.current.kind == 'OP' and self.current.value == '/')):
+            op = self._advance().value
+            left = Arithmetic(op, left, self._parse_unary())
+        return left
+
+    def _parse_unary(self):
+        if self.current.kind == 'OP' and self.current.value == '-':
+            self._advance()
+            operand = self._parse_unary()
+            if isinstance(operand, Literal) and isinstance(operand.value, (int, float)):
+                return Literal(-operand.value)
+            return Arithmetic('-', Literal(0), operand)
+        return self._parse_primary()
+
+    def _parse_primary(self):
+        token = self.current
+
+        if token.kind == 'NUMBER':
+            self._advance()
+            return Literal(float(token.value) if '.' in token.value else int(token.value))
+        if token.kind == 'STRING':
+            self._advance()
+            return Literal(token.value)
+        if self._is_keyword('NULL'):
+            self._advance()
+            return Literal(None)
+        if token.kind == 'PARAM':
+            self._advance()
+            return Parameter(int(token.value))
+
+        if token.kind == 'IDENT':
+            self._advance()
+            if self._is_punct('.'):
+                self._advance()
+                if self.current.kind != 'IDENT':
+                    self._error(f"Nome de coluna inválido após '{token.value}.'.")
+                return ColumnRef(token.value, self._advance().value)
+            if self._is_punct('('):
+                return self._parse_function_args(token.value)
+            return ColumnRef(None, token.value)
+
+        if self._is_punct('('):
+            self._advance()
+            self._paren_depth += 1
+            expr = self._parse_condition()
+            self._paren_depth -= 1
+            self._expect_punct(')', "Parênteses desbalanceados na condição.")
+            return expr
+
+        if self._is_keyword('JOIN', *JOIN_TYPES):
+            self._error("JOIN não pode ser usado dentro de uma cláusula WHERE/ON.")
+        if token.kind == 'KEYWORD':
+            self._error(f"Palavra-chave SQL '{token.value}' usada incorretamente como valor.")
+        if token.kind == 'EOF':
+            self._error("Condição incompleta: esperado um valor.")
+        self._error(f"Valor inesperado perto de {self._describe(token)}.")
+
+    def _parse_function_args(self, name):
+        self._advance()  # '('
+        args = []
+        if self._is_punct('*'):
+            self._advance()
+            args.append(Star())
+        elif not self._is_punct(')'):
+            args.append(self._parse_additive())
+            while self._is_punct(','):
+                self._advance()
+                args.append(self._parse_additive())
+        self._expect_punct(')', f"Parênteses desbalanceados na chamada de '{name}'.")
+        return FunctionCall(name, args)
+
+
+def parse_sql(query):
+    """
+    Faz a análise léxica e sintática de uma consulta SELECT.
+
+    Args:
+        query: String contendo a consulta SQL
+
+    Returns:
+        SelectStatement: AST da consulta
+
+    Raises:
+        SQLSyntaxError: Se a consulta não pertencer ao subconjunto suportado
+    """
+    return Parser(tokenize(query)).parse_statement()
+
+
+def parse_expression(text):
+    """
+    Analisa uma condição isolada (como exibida nas árvores, aceitando '∧').
+
+    Args:
+        text: Texto da condição
+
+    Returns:
+        Expression: Árvore do predicado
+
+    Raises:
+        SQLSyntaxError: Se o texto não for uma condição válida
+    """
+    parser = Parser(tokenize(text))
+    expr = parser._parse_condition()
+    if parser.current.kind != 'EOF':
+        parser._error(f"Texto inesperado perto de {parser._describe(parser.current)}.")
+    return expr
+
+
+def parse_select_list(text):
+    """
+    Analisa uma lista de colunas do SELECT (ex.: 'c.nome, p.valor AS v').
+
+    Returns:
+        list: Lista de SelectItem
+    """
+    parser = Parser(tokenize(text))
+    items = parser._parse_select_list()
+    if parser.current.kind != 'EOF':
+        parser._error(f"Texto inesperado perto de {parser._describe(parser.current)}.")
+    return items
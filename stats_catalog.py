@@ -0,0 +1,359 @@
+"""
+Catálogo de estatísticas usado pelo modelo de custo do otimizador.
+
+Para cada tabela guarda o número de linhas e o tamanho médio de uma linha;
+para cada coluna, o número de valores distintos, a fração de nulos, os
+valores mínimo e máximo, a lista de valores mais comuns (MCV) com suas
+frequências e um histograma equi-depth dos demais valores. Tabelas e colunas
+sem estatística recebem valores padrão, de modo que o otimizador funciona
+mesmo com o catálogo vazio.
+"""
+import json
+from bisect import bisect_left
+from collections import Counter
+
+# Valores usados quando a tabela não está no catálogo
+DEFAULT_ROW_COUNT = 1000
+DEFAULT_ROW_BYTES = 100
+
+# Tamanho padrão das estatísticas montadas a partir de amostras
+DEFAULT_HISTOGRAM_BUCKETS = 20
+DEFAULT_MCV_SIZE = 10
+
+
+class ColumnStats:
+    """
+    Estatísticas de uma coluna.
+
+    `mcv` é uma lista de pares (valor, fração das linhas da tabela); o
+    `histogram` é a lista de limites de baldes equi-depth (cada balde contém
+    a mesma quantidade de linhas) calculada sobre os valores não nulos que
+    não estão na lista de MCV, como no PostgreSQL.
+    """
+    __slots__ = ('distinct', 'null_fraction', 'min_value', 'max_value', 'mcv', 'histogram')
+
+    def __init__(self, distinct=None, null_fraction=0.0, min_value=None, max_value=None,
+                 mcv=None, histogram=None):
+        self.distinct = distinct
+        self.null_fraction = null_fraction
+        self.min_value = min_value
+        self.max_value = max_value
+        self.mcv = [tuple(pair) for pair in mcv or ()]
+        self.histogram = list(histogram or ())
+
+    @classmethod
+    def from_values(cls, values, buckets=DEFAULT_HISTOGRAM_BUCKETS, mcv_size=DEFAULT_MCV_SIZE):
+        """
+        Calcula as estatísticas a partir de uma amostra (ou de todos os valores) da coluna.
+
+        Args:
+            values: Valores da coluna (None representa NULL)
+            buckets: Número de baldes do histograma
+            mcv_size: Tamanho máximo da lista de valores mais comuns
+
+        Returns:
+            ColumnStats: Estatísticas da amostra
+        """
+        total = len(values)
+        non_null = [v for v in values if v is not None]
+        if not total or not non_null:
+            return cls(distinct=0, null_fraction=1.0 if total else 0.0)
+        counts = Counter(non_null)
+
+        # Entram na lista de MCV os valores mais frequentes que a média
+        # (todos, se couberem na lista)
+        if len(counts) <= mcv_size:
+            common = counts.most_common()
+        else:
+            average = len(non_null) / len(counts)
+            common = [(v, c) for v, c in counts.most_common(mcv_size) if c > average]
+        mcv = [(value, count / total) for value, count in common]
+
+        histogram = []
+        common_values = {value for value, _ in common}
+        try:
+            rest = sorted(v for v in non_null if v not in common_values)
+            low, high = min(non_null), max(non_null)
+        except TypeError:
+            # Tipos não comparáveis entre si: sem histograma nem mínimo/máximo
+            rest, low, high = [], None, None
+        if len(rest) >= 2:
+            k = min(buckets, len(rest) - 1)
+            histogram = [rest[round(i * (len(rest) - 1) / k)] for i in range(k + 1)]
+
+        return cls(distinct=len(counts), null_fraction=(total - len(non_null)) / total,
+                   min_value=low, max_value=high, mcv=mcv, histogram=histogram)
+
+    # --- Estimativas ---
+
+    @property
+    def mcv_fraction(self):
+        """Fração das linhas coberta pela lista de MCV."""
+        return sum(fraction for _, fraction in self.mcv)
+
+    def equal_fraction(self, value):
+        """
+        Fração das linhas com coluna = valor, ou None sem estatística suficiente.
+
+        Valores da lista de MCV usam a frequência registrada; os demais dividem
+        igualmente as linhas que sobram entre os valores distintos restantes.
+        """
+        for common, fraction in self.mcv:
+            if common == value:
+                return fraction
+        if not self.distinct:
+            return None
+        others = self.distinct - len(self.mcv)
+        if others <= 0:
+            return 0.0
+        return max(0.0, 1.0 - self.null_fraction - self.mcv_fraction) / others
+
+    def less_fraction(self, value, inclusive=False):
+        """
+        Fração das linhas com coluna < valor (ou <= com `inclusive`), ou None.
+
+        Soma as frequências dos MCV abaixo do valor e a parte dos demais
+        valores estimada pelo histograma (interpolação linear dentro do balde)
+        ou, sem histograma, pela interpolação entre mínimo e máximo.
+        """
+        try:
+            below_mcv = sum(f for v, f in self.mcv if v < value or (inclusive and v == value))
+        except TypeError:
+            return None
+        rest = max(0.0, 1.0 - self.null_fraction - self.mcv_fraction)
+
+        fraction = _histogram_fraction(self.histogram, value)
+        if fraction is None:
+            fraction = _interpolate(self.min_value, self.max_value, value)
+        if fraction is None:
+            if self.mcv and rest < 1e-9:
+                fraction = 0.0
+            else:
+                return None
+        result = below_mcv + rest * fraction
+        if inclusive and not any(v == value for v, _ in self.mcv):
+            result += self.equal_fraction(value) or 0.0
+        return min(1.0 - self.null_fraction, result)
+
+    def to_dict(self):
+        data = {
+            'distinct': self.distinct,
+            'null_fraction': self.null_fraction,
+            'min': self.min_value,
+            'max': self.max_value,
+        }
+        if self.mcv:
+            data['mcv'] = [list(pair) for pair in self.mcv]
+        if self.histogram:
+            data['histogram'] = list(self.histogram)
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Reconstrói as estatísticas de um dicionário (ver to_dict). Se houver uma
+        amostra de valores ('sample') sem MCV/histograma, eles são calculados a
+        partir dela; os demais campos informados têm precedência.
+        """
+        if data.get('sample') and not (data.get('mcv') or data.get('histogram')):
+            sampled = cls.from_values(data['sample'])
+            return cls(distinct=data.get('distinct') or sampled.distinct,
+                       null_fraction=data.get('null_fraction', sampled.null_fraction),
+                       min_value=data.get('min', sampled.min_value),
+                       max_value=data.get('max', sampled.max_value),
+                       mcv=sampled.mcv,
+                       histogram=sampled.histogram)
+        return cls(distinct=data.get('distinct'),
+                   null_fraction=data.get('null_fraction', 0.0),
+                   min_value=data.get('min'),
+                   max_value=data.get('max'),
+                   mcv=data.get('mcv'),
+                   histogram=data.get('histogram'))
+
+    def __repr__(self):
+        return (f"ColumnStats(distinct={self.distinct}, null_fraction={self.null_fraction}, "
+                f"min={self.min_value!r}, max={self.max_value!r}, mcv={len(self.mcv)}, "
+                f"buckets={max(0, len(self.histogram) - 1)})")
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _interpolate(low, high, value):
+    """Posição relativa (0 a 1) de `value` entre `low` e `high`, ou None."""
+    if not (_is_number(low) and _is_number(high) and _is_number(value)):
+        return None
+    if high <= low:
+        return 0.0 if value <= low else 1.0
+    return min(1.0, max(0.0, (value - low) / (high - low)))
+
+
+def _histogram_fraction(bounds, value):
+    """Fração dos valores do histograma equi-depth abaixo de `value`, ou None."""
+    if len(bounds) < 2:
+        return None
+    try:
+        if value <= bounds[0]:
+            return 0.0
+        if value > bounds[-1]:
+            return 1.0
+        buckets = len(bounds) - 1
+        # Limites repetidos (valor muito frequente fora da lista de MCV)
+        # contam como baldes inteiros abaixo do valor
+        i = min(bisect_left(bounds, value), buckets) - 1
+        position = _interpolate(bounds[i], bounds[i + 1], value)
+    except TypeError:
+        return None
+    if position is None:
+        position = 0.5
+    return (i + position) / buckets
+
+
+class TableStats:
+    """
+    Estatísticas de uma tabela e de suas colunas (nomes sem diferenciar maiúsculas).
+
+    `indexes` lista as colunas de cada índice, na ordem da chave; a chave
+    primária (`primary_key`) é o índice clusterizado do InnoDB, ou seja, a
+    ordem física das linhas em uma leitura sequencial.
+    """
+    __slots__ = ('name', 'row_count', 'row_bytes', 'columns', 'indexes', 'primary_key')
+
+    def __init__(self, name, row_count, row_bytes=DEFAULT_ROW_BYTES, columns=None,
+                 indexes=None, primary_key=None):
+        self.name = name
+        self.row_count = row_count
+        self.row_bytes = row_bytes
+        self.columns = {}
+        for column, stats in (columns or {}).items():
+            self.set_column(column, stats)
+        self.primary_key = tuple(c.lower() for c in primary_key) if primary_key else None
+        self.indexes = [tuple(c.lower() for c in index) for index in (indexes or [])]
+        if self.primary_key and self.primary_key not in self.indexes:
+            self.indexes.insert(0, self.primary_key)
+
+    def has_index(self, column):
+        """True se algum índice começa pela coluna (permite busca por igualdade)."""
+        column = column.lower()
+        return any(index[0] == column for index in self.indexes)
+
+    def set_column(self, column, stats):
+        if isinstance(stats, dict):
+            stats = ColumnStats.from_dict(stats)
+        self.columns[column.lower()] = stats
+
+    def column(self, column):
+        """ColumnStats da coluna, ou None se não houver estatística."""
+        return self.columns.get(column.lower())
+
+    def to_dict(self):
+        data = {
+            'row_count': self.row_count,
+            'row_bytes': self.row_bytes,
+            'columns': {name: stats.to_dict() for name, stats in self.columns.items()},
+        }
+        if self.primary_key:
+            data['primary_key'] = list(self.primary_key)
+        secondary = [list(index) for index in self.indexes if index != self.primary_key]
+        if secondary:
+            data['indexes'] = secondary
+        return data
+
+    def __repr__(self):
+        return f"TableStats({self.name!r}, row_count={self.row_count}, columns={len(self.columns)})"
+
+
+class StatisticsCatalog:
+    """
+    Catálogo de estatísticas indexado pelo nome da tabela (sem diferenciar maiúsculas).
+
+    Exemplo:
+        catalog = StatisticsCatalog()
+        catalog.add_table('Pedido', 1_000_000, columns={
+            'idPedido': {'distinct': 1_000_000},
+            'Cliente_idCliente': {'distinct': 50_000},
+            'ValorTotalPedido': {'distinct': 20_000, 'min': 1, 'max': 10_000},
+        })
+    """
+
+    def __init__(self, tables=None):
+        self.tables = {}
+        for name, data in (tables or {}).items():
+            if isinstance(data, TableStats):
+                self.tables[name.lower()] = data
+            else:
+                self.add_table(name, data.get('row_count', DEFAULT_ROW_COUNT),
+                               row_bytes=data.get('row_bytes', DEFAULT_ROW_BYTES),
+                               columns=data.get('columns'), indexes=data.get('indexes'),
+                               primary_key=data.get('primary_key'))
+
+    def add_table(self, name, row_count, row_bytes=DEFAULT_ROW_BYTES, columns=None,
+                  indexes=None, primary_key=None):
+        """Registra (ou substitui) as estatísticas de uma tabela."""
+        stats = TableStats(name, row_count, row_bytes, columns, indexes, primary_key)
+        self.tables[name.lower()] = stats
+        return stats
+
+    def table(self, name):
+        """TableStats da tabela, ou None se ela não estiver no catálogo."""
+        return self.tables.get(name.lower())
+
+    def row_count(self, name):
+        stats = self.table(name)
+        return stats.row_count if stats else DEFAULT_ROW_COUNT
+
+    def row_bytes(self, name):
+        stats = self.table(name)
+        return stats.row_bytes if stats else DEFAULT_ROW_BYTES
+
+    def column(self, table, column):
+        """ColumnStats de `tabela.coluna`, ou None."""
+        stats = self.table(table)
+        return stats.column(column) if stats else None
+
+    def has_index(self, table, column):
+        """True se a tabela tem um índice que começa pela coluna."""
+        stats = self.table(table)
+        return stats.has_index(column) if stats else False
+
+    def primary_key(self, table):
+        """Colunas da chave primária (ordem física das linhas), ou None."""
+        stats = self.table(table)
+        return stats.primary_key if stats else None
+
+    def __len__(self):
+        return len(self.tables)
+
+    def __contains__(self, name):
+        return name.lower() in self.tables
+
+    # --- Persistência ---
+
+    def to_dict(self):
+        return {stats.name: stats.to_dict() for stats in self.tables.values()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data)
+
+    def save_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load_json(cls, path):
+        """Carrega um catálogo gravado por save_json (ou escrito à mão no mesmo formato)."""
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_database(cls, config=None):
+        """
+        Coleta as estatísticas do banco MySQL configurado (ver db.get_db_statistics).
+
+        Returns:
+            StatisticsCatalog: Catálogo preenchido, ou vazio se o banco estiver indisponível
+        """
+        from db import get_db_config, get_db_statistics
+        return cls.from_dict(get_db_statistics(config or get_db_config()) or {})
@@ -0,0 +1,64 @@
+"""
+Testes do processamento de workloads pela linha de comando (cli).
+"""
+import io
+import json
+
+from cli import iter_sql_statements, iter_general_log, read_statements, run
+
+
+def test_splitter_ignores_semicolons_in_quotes_and_comments():
+    """';' dentro de literais, crases e comentários não separa comandos, mesmo entre linhas."""
+    script = io.StringIO(
+        "SELECT Nome FROM Cliente WHERE Nome = 'a;b''c'; -- fim; não separa\n"
+        "SELECT Nome FROM Cliente WHERE Email = 'x\\';y' /* ; */\n"
+        "  AND Nome = \"q;r\";\n"
+        "SELECT `a;b` FROM Produto\n"
+    )
+    statements = list(iter_sql_statements(script))
+    assert len(statements) == 3
+    assert statements[0] == "SELECT Nome FROM Cliente WHERE Nome = 'a;b''c'"
+    assert "'x\\';y'" in statements[1] and statements[1].endswith('"q;r"')
+    assert statements[2] == "SELECT `a;b` FROM Produto"
+
+
+def test_general_log_reader():
+    """Somente eventos Query são lidos; linhas de continuação pertencem à consulta anterior."""
+    log = io.StringIO(
+        "/usr/sbin/mysqld, Version: 8.0.36 (MySQL Community Server - GPL). started with:\n"
+        "Tcp port: 3306  Unix socket: /var/run/mysqld/mysqld.sock\n"
+        "Time                 Id Command    Argument\n"
+        "2024-05-20T10:00:00.000001Z\t   12 Connect\troot@localhost on loja\n"
+        "2024-05-20T10:00:00.000002Z\t   12 Query\tSELECT Nome FROM Cliente\n"
+        "\t\t   12 Query\tSELECT Nome\n"
+        "FROM Produto WHERE Preco > 10\n"
+        "2024-05-20T10:00:01.000000Z\t   12 Quit\t\n"
+    )
+    assert list(read_statements(log)) == [
+        "SELECT Nome FROM Cliente",
+        "SELECT Nome\nFROM Produto WHERE Preco > 10",
+    ]
+    assert list(iter_general_log(["240520 10:00:00\t    3 Query\tSELECT 1;\n"])) == ["SELECT 1"]
+
+
+def test_run_writes_one_jsonl_record_per_statement():
+    """Cada comando vira um registro JSONL, inclusive os inválidos."""
+    statements = iter_sql_statements(io.StringIO(
+        "SELECT c.nome FROM cliente c INNER JOIN pedidos p ON c.id = p.cliente_id WHERE p.valor > 5;\n"
+        "SELECT FROM;\n"
+    ))
+    output = io.StringIO()
+    report = run(statements, output)
+
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert report['queries'] == 2 and report['valid'] == 1 and report['invalid'] == 1
+    assert records[0]['valid'] and records[0]['algebra'].startswith('π (c.nome)')
+    assert records[0]['optimized_tree'][0] == 'π' and 'HEURÍSTICA' in records[0]['optimization_log']
+    assert not records[1]['valid'] and records[1]['optimized_tree'] is None
+
+
+if __name__ == "__main__":
+    test_splitter_ignores_semicolons_in_quotes_and_comments()
+    test_general_log_reader()
+    test_run_writes_one_jsonl_record_per_statement()
+    print("Todos os testes da linha de comando passaram.")
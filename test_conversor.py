@@ -0,0 +1,245 @@
+"""
+Testes do conversor SQL -> Álgebra Relacional (sem banco de dados).
+"""
+
+from conversor import RelationalAlgebraConverter
+from plan_cache import normalize_sql, fingerprint_sql, fingerprint_workload
+
+
+def test_plan_cache_hits_on_normalized_sql():
+    """Consultas que diferem só em espaços/maiúsculas reutilizam o mesmo plano."""
+    converter = RelationalAlgebraConverter(cache_size=4)
+    q1 = "SELECT c.nome FROM cliente c INNER JOIN pedidos p ON c.id = p.cliente_id WHERE p.valor > 500"
+    q2 = "select  c.nome\nfrom cliente c inner join pedidos p on c.id = p.cliente_id where p.valor > 500;"
+
+    assert normalize_sql(q1) == normalize_sql(q2)
+
+    unopt1, opt1 = converter.convert_to_optimized_tree(q1)
+    log1 = converter.get_optimization_log()
+    unopt2, opt2 = converter.convert_to_optimized_tree(q2)
+
+    assert (unopt1, opt1) == (unopt2, opt2)
+    assert converter.get_optimization_log() == log1
+    stats = converter.get_cache_stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1 and stats['size'] == 1
+
+
+def test_plan_cache_is_bounded():
+    """O cache descarta a entrada menos usada quando o limite é atingido."""
+    converter = RelationalAlgebraConverter(cache_size=2)
+    converter.convert_to_tree("SELECT Nome FROM Cliente")
+    converter.convert_to_tree("SELECT Nome FROM Produto")
+    converter.convert_to_tree("SELECT Nome FROM Pedido")
+    converter.convert_to_tree("SELECT Nome FROM Cliente")
+
+    stats = converter.get_cache_stats()
+    assert stats['size'] == 2 and stats['misses'] == 4 and stats['hits'] == 0
+
+
+def test_fingerprint_shares_plan_across_literals():
+    """Consultas com a mesma forma e constantes diferentes reutilizam a otimização."""
+    converter = RelationalAlgebraConverter()
+    template = ("SELECT c.nome, p.valor FROM cliente c INNER JOIN pedidos p "
+                "ON c.id = p.cliente_id WHERE p.valor > {} AND c.nome = {}")
+
+    _, opt_500 = converter.convert_to_optimized_tree(template.format(500, "'Ana'"))
+    _, opt_750 = converter.convert_to_optimized_tree(template.format(-750, "'Bia'"))
+
+    assert "p.valor > 500" in repr(opt_500) and "'Ana'" in repr(opt_500)
+    assert "p.valor > -750" in repr(opt_750) and "'Bia'" in repr(opt_750)
+    assert "$" not in repr(opt_750)
+    assert converter.get_cache_stats()['misses'] == 1
+
+    key, literals, _ = fingerprint_sql("SELECT a FROM t WHERE x = -5 AND y IN (1, 'b');")
+    assert key == "SELECT a FROM t WHERE x = ? AND y IN ( ? , ? )"
+    assert literals == [-5, 1, 'b']
+
+
+def test_fingerprint_workload_counts_shapes():
+    """O resumo do workload conta consultas, consultas distintas e formas distintas."""
+    report = fingerprint_workload([
+        "SELECT Nome FROM Cliente WHERE id = 1",
+        "SELECT Nome FROM Cliente WHERE id = 2",
+        "SELECT Nome FROM Cliente WHERE id = 2",
+        "SELECT Preco FROM Produto WHERE Preco > 10",
+        "SELECT FROM",
+    ])
+    assert report['queries'] == 5 and report['invalid'] == 1
+    assert report['distinct_queries'] == 3 and report['distinct_shapes'] == 2
+
+
+def test_pushdown_keeps_disjunctions_whole():
+    """Um OR entre relações diferentes não é dividido (vai para o JOIN); conjunções simples descem."""
+    converter = RelationalAlgebraConverter()
+    _, optimized = converter.convert_to_optimized_tree(
+        "SELECT c.nome FROM cliente c INNER JOIN pedidos p ON c.id = p.cliente_id "
+        "WHERE p.valor > 500 AND (c.uf = 'SP' OR p.valor > 900)")
+    join = optimized.child
+    assert str(join.condition) == "c.id = p.cliente_id ∧ (c.uf = 'SP' OR p.valor > 900)"
+    pedidos = join.left if join.left.tables >= {'p'} else join.right
+    # π mantém só as colunas de p usadas acima: junção e o OR
+    assert pedidos.columns_text == "p.cliente_id, p.valor"
+    assert str(pedidos.child.child.condition) == "p.valor > 500"
+
+
+def test_transitive_closure_filters_every_join_side():
+    """`c.id = p.cliente_id AND p.cliente_id = 10` também filtra c (e, pela cadeia, e) antes dos JOINs."""
+    converter = RelationalAlgebraConverter()
+    _, optimized = converter.convert_to_optimized_tree(
+        "SELECT c.nome FROM cliente c INNER JOIN pedidos p ON c.id = p.cliente_id "
+        "INNER JOIN enderecos e ON e.cliente_id = c.id WHERE p.cliente_id = 10 AND p.valor > 5")
+    algebra = optimized.to_algebra()
+    for filtered in ("ρ_c(σ (c.id = 10) (cliente))", "ρ_e(σ (e.cliente_id = 10) (enderecos))",
+                     "ρ_p(σ (p.cliente_id = 10 ∧ p.valor > 5) (pedidos))"):
+        assert filtered in algebra
+    # p.valor não pertence a nenhuma classe de equivalência: o filtro fica só em p
+    assert algebra.count("> 5") == 1
+    assert "Predicado derivado: c.id = 10" in converter.get_optimization_log()
+
+
+def test_simplification_with_query_literals():
+    """Filtros redundantes somem e contradições viram ∅, mesmo com o plano genérico vindo do cache."""
+    converter = RelationalAlgebraConverter()
+    sql = ("SELECT c.nome FROM cliente c INNER JOIN pedidos p ON c.id = p.cliente_id "
+           "WHERE p.valor > {} AND p.valor > {} AND 2 * 3 = {}")
+    _, optimized = converter.convert_to_optimized_tree(sql.format(5, 10, 6))
+    assert "ρ_p(σ (p.valor > 10) (pedidos))" in optimized.to_algebra()
+    assert "p.valor > 5" not in optimized.to_algebra() and "= 6" not in optimized.to_algebra()
+
+    # Mesma forma (acerto no cache), mas agora o filtro constante é falso
+    _, optimized = converter.convert_to_optimized_tree(sql.format(5, 10, 7))
+    assert optimized.to_algebra() == "π (c.nome) (∅)"
+    assert converter.get_cache_stats()['hits'] >= 1
+    assert "⇒ ∅" in converter.get_optimization_log()
+
+    _, optimized = converter.convert_to_optimized_tree(
+        "SELECT c.nome FROM cliente c WHERE c.id > 10 AND c.id < 5")
+    assert optimized.to_algebra() == "π (c.nome) (∅)"
+
+
+def test_or_across_relations_pushes_implied_filters():
+    """De `(c.. ∧ p..) OR (c.. ∧ p..)` saem filtros IN por relação; o OR original fica no JOIN."""
+    converter = RelationalAlgebraConverter()
+    _, optimized = converter.convert_to_optimized_tree(
+        "SELECT c.nome FROM cliente c INNER JOIN pedidos p ON c.id = p.cliente_id "
+        "WHERE (c.uf = 'SP' AND p.status = 1) OR (c.uf = 'RJ' AND p.status = 3)")
+    algebra = optimized.to_algebra()
+    assert "ρ_c(σ (c.uf IN ('SP', 'RJ')) (cliente))" in algebra
+    assert "ρ_p(σ (p.status IN (1, 3)) (pedidos))" in algebra
+    join = optimized.child
+    assert "(c.uf = 'SP' ∧ p.status = 1) OR (c.uf = 'RJ' ∧ p.status = 3)" in str(join.condition)
+    # Termos comuns a todos os ramos são fatorados e descem como filtros comuns
+    _, optimized = converter.convert_to_optimized_tree(
+        "SELECT c.nome FROM cliente c INNER JOIN pedidos p ON c.id = p.cliente_id "
+        "WHERE (c.uf = 'SP' AND p.status = 1) OR (c.uf = 'SP' AND p.valor > 9)")
+    assert "ρ_c(σ (c.uf = 'SP') (cliente))" in optimized.to_algebra()
+    # Fatorado o termo comum, o OR restante é o próprio IN derivado: o filtro não aparece duas vezes
+    _, optimized = converter.convert_to_optimized_tree(
+        "SELECT c.nome FROM cliente c INNER JOIN pedidos p ON c.id = p.cliente_id "
+        "WHERE (c.uf = 'SP' AND p.status = 1) OR (c.uf = 'SP' AND p.status = 3)")
+    algebra = optimized.to_algebra()
+    assert "ρ_p(σ (p.status IN (1, 3)) (pedidos))" in algebra
+    assert " OR " not in algebra and algebra.count("p.status IN") == 1
+
+
+def test_outer_joins_are_rejected():
+    """LEFT/RIGHT/FULL JOIN não viram junção interna: todas as entradas tratam a consulta como inválida."""
+    converter = RelationalAlgebraConverter()
+    for join_type in ('LEFT', 'RIGHT OUTER', 'FULL'):
+        sql = f"SELECT c.nome FROM cliente c {join_type} JOIN pedidos p ON c.id = p.cliente_id"
+        result = converter.process_query(sql)
+        assert not result['valid'] and result['tree'] is None
+        assert f"{join_type.split()[0]} JOIN não é suportado" in result['error']
+        assert converter.convert(sql).startswith("Erro:")
+        assert converter.convert_to_tree(sql).startswith("Erro:")
+        tree, optimized = converter.convert_to_optimized_tree(sql)
+        assert tree.startswith("Erro:") and optimized.startswith("Erro:")
+    assert converter.process_query(
+        "SELECT c.nome FROM cliente c INNER JOIN pedidos p ON c.id = p.cliente_id")['valid']
+
+
+def test_projection_pushdown_prunes_columns_with_schema():
+    """Cada relação base ganha um π com as colunas usadas acima; sem esquema, colunas soltas bloqueiam o π."""
+    schema = {
+        'Cliente': [('id', 'int'), ('nome', 'varchar'), ('uf', 'char'), ('email', 'varchar'),
+                    ('endereco', 'varchar'), ('telefone', 'varchar'), ('cpf', 'char'), ('nascimento', 'date')],
+        'Pedidos': ['id', 'cliente_id', 'valor', 'data'],
+    }
+    sql = "SELECT nome FROM Cliente c INNER JOIN Pedidos p ON c.id = p.cliente_id WHERE p.valor > 10"
+    converter = RelationalAlgebraConverter(schema=schema)
+    result = converter.process_query(sql)
+    algebra = result['optimized_tree'].to_algebra()
+    assert "π (c.id, nome) (ρ_c(Cliente))" in algebra
+    assert "π (p.cliente_id) (ρ_p(σ (p.valor > 10) (Pedidos)))" in algebra
+    assert "π sobre c: c.id, nome (~100 B → ~25 B por linha)" in result['optimization_log']
+    plan = converter.physical_plan(result['optimized_tree'])
+    assert plan.root.children[0].width == 25 + 25
+
+    # Reotimizar não empilha projeções
+    assert converter.optimizer.optimize_tree(result['optimized_tree']) == result['optimized_tree']
+
+    result = RelationalAlgebraConverter().process_query(sql)
+    assert result['optimized_tree'].to_algebra().count('π') == 1
+    assert "Sem projeção em c, p" in result['optimization_log']
+
+
+def test_projection_pushdown_skips_single_relation():
+    """Com uma só relação, a projeção final já fica sobre ela: nenhum π intermediário é inserido."""
+    schema = {'Cliente': ['id', 'nome', 'x']}
+    for converter, sql in ((RelationalAlgebraConverter(), "SELECT c.nome FROM Cliente c WHERE c.x > 5"),
+                           (RelationalAlgebraConverter(schema=schema), "SELECT nome FROM Cliente WHERE x > 5")):
+        result = converter.process_query(sql)
+        assert result['optimized_tree'].to_algebra().count('π') == 1
+        assert "π sobre" not in result['optimization_log']
+
+
+def test_optimize_many_preserves_order_and_reports_errors():
+    """O lote em vários processos mantém a ordem e registra erros por consulta."""
+    queries = [f"SELECT c.nome FROM cliente c INNER JOIN pedidos p ON c.id = p.cliente_id "
+               f"WHERE p.valor > {i}" for i in range(20)]
+    queries.insert(7, "SELECT FROM cliente")
+    converter = RelationalAlgebraConverter()
+
+    parallel = converter.optimize_many(queries, workers=2, chunk_size=3)
+    serial = converter.optimize_many(queries, workers=1)
+
+    assert [r['query'] for r in parallel] == queries
+    assert not parallel[7]['valid'] and parallel[7]['error'].startswith("Sintaxe inválida")
+    assert all(r['valid'] for i, r in enumerate(parallel) if i != 7)
+    assert "p.valor > 19" in repr(parallel[-1]['optimized_tree'])
+    assert [r['optimized_tree'] for r in parallel] == [r['optimized_tree'] for r in serial]
+    assert converter.convert_many(queries[:1], workers=1)[0]['optimized_tree'] is None
+
+
+def test_pipeline_parses_once_and_derives_text_from_tree():
+    """Validação, AST, árvores, texto e log saem de um único parsing."""
+    converter = RelationalAlgebraConverter()
+    sql = "SELECT c.nome FROM cliente c INNER JOIN pedidos p ON c.id = p.cliente_id WHERE p.valor > 500"
+
+    assert converter.validate_sql_syntax(sql)[0]
+    assert converter.get_statement(sql).table.name == 'cliente'
+    result = converter.process_query(sql)
+    assert converter.convert(sql) == result['algebra'] == result['tree'].to_algebra()
+    assert result['algebra'] == ("π (c.nome) (σ (p.valor > 500) ((ρ_c(cliente) ⨝ (c.id = p.cliente_id) "
+                                 "ρ_p(pedidos))))")
+    assert "ρ_p(σ (p.valor > 500) (pedidos))" in result['optimized_tree'].to_algebra()
+    # A validação memorizou o único parsing; nenhuma etapa seguinte faltou no cache
+    stats = converter.get_cache_stats()
+    assert stats['size'] == 1 and stats['misses'] == 0
+
+
+if __name__ == "__main__":
+    test_plan_cache_hits_on_normalized_sql()
+    test_plan_cache_is_bounded()
+    test_fingerprint_shares_plan_across_literals()
+    test_fingerprint_workload_counts_shapes()
+    test_pushdown_keeps_disjunctions_whole()
+    test_transitive_closure_filters_every_join_side()
+    test_simplification_with_query_literals()
+    test_or_across_relations_pushes_implied_filters()
+    test_outer_joins_are_rejected()
+    test_projection_pushdown_prunes_columns_with_schema()
+    test_projection_pushdown_skips_single_relation()
+    test_optimize_many_preserves_order_and_reports_errors()
+    test_pipeline_parses_once_and_derives_text_from_tree()
+    print("Todos os testes do conversor passaram.")
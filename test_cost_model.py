@@ -0,0 +1,228 @@
+"""
+Testes do catálogo de estatísticas e do modelo de custo.
+"""
+import random
+
+import pytest
+
+from conversor import RelationalAlgebraConverter
+from cost_model import CostModel
+from plan_nodes import Scan, Rename, Select, Project, Join
+from stats_catalog import StatisticsCatalog, ColumnStats
+
+JOIN_3 = ("SELECT c.nome FROM cliente c "
+          "INNER JOIN pedidos p ON c.id = p.cliente_id "
+          "INNER JOIN produto pr ON p.produto_id = pr.id "
+          "WHERE pr.categoria = 'livros'")
+
+
+def _catalog():
+    return StatisticsCatalog({
+        'cliente': {'row_count': 10_000, 'columns': {'id': {'distinct': 10_000}}},
+        'pedidos': {'row_count': 1_000_000, 'columns': {
+            'cliente_id': {'distinct': 10_000},
+            'produto_id': {'distinct': 500},
+            'valor': {'distinct': 5_000, 'min': 0, 'max': 1000},
+        }},
+        'produto': {'row_count': 500, 'columns': {
+            'id': {'distinct': 500},
+            'categoria': {'distinct': 50},
+        }},
+    })
+
+
+def _first_join(tree):
+    """Aliases das duas relações da junção mais profunda (a primeira executada)."""
+    while isinstance(tree, Select):
+        tree = tree.child
+    for side in (tree.left, tree.right):
+        if isinstance(side, Join):
+            return _first_join(side)
+    return {_alias(tree.left), _alias(tree.right)}
+
+
+def _alias(relation):
+    while isinstance(relation, Project):
+        relation = relation.child
+    return relation.alias
+
+
+def test_selectivity_uses_column_statistics():
+    """Igualdade usa valores distintos e intervalos interpolam entre mínimo e máximo."""
+    model = CostModel(_catalog())
+    pedidos = Rename('p', Scan('pedidos'))
+    assert model.rows(Select('p.valor > 750', pedidos)) == pytest.approx(250_000, rel=1e-3)
+    assert model.rows(Select('p.valor = 10', pedidos)) == 200
+    assert model.rows(Select('p.valor > 750 OR p.valor < 250', pedidos)) == pytest.approx(
+        1_000_000 * (1 - 0.75 * 0.75), rel=1e-3)
+    join = Join('c.id = p.cliente_id', Rename('c', Scan('cliente')), pedidos)
+    assert model.rows(join) == 1_000_000
+
+
+def _skewed_pedidos():
+    """Pedidos com valores concentrados abaixo de 100 e status dominado por 'entregue'."""
+    rng = random.Random(7)
+    valores = [rng.randint(1, 100) for _ in range(9_000)] + [rng.randint(500, 10_000) for _ in range(1_000)]
+    status = ['entregue'] * 7_000 + ['pendente'] * 2_000 + [f"s{i}" for i in range(1_000)]
+    catalog = StatisticsCatalog()
+    catalog.add_table('pedidos', 10_000, columns={
+        'valor': ColumnStats.from_values(valores),
+        'status': ColumnStats.from_values(status),
+    })
+    return catalog, valores
+
+
+def test_histogram_and_mcv_selectivity():
+    """Histograma e MCV estimam filtros sobre colunas assimétricas perto do valor real."""
+    catalog, valores = _skewed_pedidos()
+    model = CostModel(catalog)
+    pedidos = Rename('p', Scan('pedidos'))
+
+    def estimate(condition):
+        return model.rows(Select(condition, pedidos))
+
+    # Erro máximo de um balde do histograma (20 baldes)
+    bucket = len(valores) / 20
+    actual = sum(v > 500 for v in valores)
+    assert estimate('p.valor > 500') == pytest.approx(actual, abs=bucket)
+    # Só com mínimo/máximo a interpolação diria ~95% das linhas
+    assert CostModel(StatisticsCatalog({'pedidos': {'row_count': 10_000, 'columns': {
+        'valor': {'distinct': 5_000, 'min': 1, 'max': 10_000}}}})).rows(
+        Select('p.valor > 500', pedidos)) > 9_000
+
+    actual = sum(10 <= v < 50 for v in valores)
+    assert estimate('p.valor >= 10 AND p.valor < 50') == pytest.approx(actual, abs=bucket)
+    assert estimate("p.status = 'entregue'") == pytest.approx(7_000)
+    assert estimate("p.status <> 'entregue'") == pytest.approx(3_000)
+    assert estimate("p.status = 's5'") == pytest.approx(1)
+    assert estimate("p.status IN ('entregue', 'pendente')") == pytest.approx(9_000)
+
+
+def test_plan_estimates_use_query_literals():
+    """O plano em cache é genérico, mas a estimativa exibida usa os literais da consulta."""
+    catalog, _ = _skewed_pedidos()
+    converter = RelationalAlgebraConverter(catalog=catalog)
+    rows = {}
+    for status in ('entregue', 's5'):
+        result = converter.process_query(f"SELECT p.valor FROM pedidos p WHERE p.status = '{status}'")
+        rows[status] = converter.estimate_plan(result['optimized_tree'])[result['optimized_tree']].rows
+    assert converter.get_cache_stats()['size'] == 1
+    assert rows['entregue'] == pytest.approx(7_000) and rows['s5'] == pytest.approx(1)
+
+
+def test_statistics_drive_join_order():
+    """A primeira junção envolve a relação mais seletiva segundo o catálogo."""
+    converter = RelationalAlgebraConverter(catalog=_catalog())
+    _, optimized = converter.convert_to_optimized_tree(JOIN_3)
+    assert _first_join(optimized.child) == {'p', 'pr'}
+
+    # Com poucos clientes (e a maioria dos pedidos sem cliente correspondente)
+    # e muitos produtos, juntar pedidos e clientes primeiro gera menos linhas
+    catalog = _catalog()
+    catalog.add_table('cliente', 10, columns={'id': {'distinct': 10}})
+    catalog.add_table('produto', 5_000_000, columns={'id': {'distinct': 5_000_000}})
+    catalog.add_table('pedidos', 100, columns={'cliente_id': {'distinct': 100}})
+    converter.set_statistics(catalog)
+    _, optimized = converter.convert_to_optimized_tree(JOIN_3)
+    assert _first_join(optimized.child) == {'c', 'p'}
+
+
+def test_join_algorithm_follows_cost():
+    """Hash join para entradas grandes, nested loop para entradas mínimas ou sem igualdade."""
+    catalog = _catalog()
+    catalog.add_table('unico', 1)
+    catalog.add_table('outro', 1)
+    converter = RelationalAlgebraConverter(catalog=catalog)
+
+    _, optimized = converter.convert_to_optimized_tree(
+        "SELECT c.nome FROM cliente c INNER JOIN pedidos p ON c.id = p.cliente_id")
+    assert optimized.child.algorithm == 'hash_join'
+
+    _, optimized = converter.convert_to_optimized_tree(
+        "SELECT u.a FROM unico u INNER JOIN outro o ON u.id = o.id")
+    assert optimized.child.algorithm == 'nested_loop'
+
+    _, optimized = converter.convert_to_optimized_tree(
+        "SELECT c.nome FROM cliente c INNER JOIN pedidos p ON c.id < p.cliente_id")
+    assert optimized.child.algorithm == 'nested_loop'
+
+
+def test_index_and_sort_merge_joins():
+    """Índice na relação interna favorece o nested loop com índice; entradas já ordenadas, o sort-merge."""
+    catalog = _catalog()
+    catalog.add_table('pedidos', 1_000_000, columns=catalog.table('pedidos').columns,
+                      indexes=[('cliente_id',)])
+    model = CostModel(catalog)
+    cliente = Select('c.id = 5', Rename('c', Scan('cliente')))
+    join = Join('c.id = p.cliente_id', cliente, Rename('p', Scan('pedidos')))
+    algorithm, costs = model.best_join_algorithm(join)
+    assert algorithm == 'index_nested_loop'
+    assert costs['index_nested_loop'] * 10 < min(costs['hash_join'], costs['nested_loop'])
+    assert model.describe_join(join.with_algorithm(algorithm)) == \
+        "Index Nested-Loop (índice em pedidos.cliente_id)"
+
+    # Sem índice, o hash join monta a tabela sobre o lado menor
+    join = Join('p.cliente_id = c.id', Rename('p', Scan('pedidos')), Rename('c', Scan('cliente')))
+    assert model.best_join_algorithm(join)[0] == 'hash_join'
+    assert model.hash_build_side(join) == 'right'
+
+    # Duas tabelas grandes lidas na ordem da chave primária: o hash join
+    # particionaria em disco, o sort-merge só intercala
+    for name in ('nota', 'item_nota'):
+        catalog.add_table(name, 2_000_000, primary_key=('id',))
+    model = CostModel(catalog)
+    join = Join('n.id = i.id', Rename('n', Scan('nota')), Rename('i', Scan('item_nota')))
+    algorithm, costs = model.best_join_algorithm(join)
+    assert algorithm == 'sort_merge' and costs['sort_merge'] < costs['hash_join']
+    join = join.with_algorithm(algorithm)
+    assert model.describe_join(join) == "Sort-Merge Join (já ordenado por n.id, i.id)"
+    assert ('n', 'id') in model.output_order(join)
+
+
+def test_reordering_keeps_unqualified_filters():
+    """Condições sem tabela acima do bloco de junções continuam no plano."""
+    converter = RelationalAlgebraConverter()
+    _, optimized = converter.convert_to_optimized_tree(
+        "SELECT c.nome FROM cliente c INNER JOIN pedidos p ON c.id = p.cliente_id WHERE status = 1")
+    assert isinstance(optimized.child, Select)
+    assert str(optimized.child.condition) == "status = 1"
+    assert isinstance(optimized.child.child, Join)
+
+
+def test_catalog_json_round_trip(tmp_path):
+    """O catálogo gravado em JSON é recarregado com as mesmas estatísticas."""
+    path = tmp_path / 'stats.json'
+    _catalog().save_json(path)
+    catalog = StatisticsCatalog.load_json(path)
+    assert catalog.row_count('PEDIDOS') == 1_000_000
+    assert catalog.column('pedidos', 'Valor').max_value == 1000
+
+    skewed, _ = _skewed_pedidos()
+    skewed.save_json(path)
+    status = StatisticsCatalog.load_json(path).column('pedidos', 'status')
+    assert status.mcv == skewed.column('pedidos', 'status').mcv
+    assert status.equal_fraction('entregue') == pytest.approx(0.7)
+    assert catalog.row_count('inexistente') == 1000
+
+    catalog.add_table('nota', 10, primary_key=('Id',), indexes=[('cliente_id', 'data')])
+    catalog.save_json(path)
+    catalog = StatisticsCatalog.load_json(path)
+    assert catalog.primary_key('nota') == ('id',)
+    assert catalog.has_index('nota', 'ID') and catalog.has_index('nota', 'cliente_id')
+    assert not catalog.has_index('nota', 'data')
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    test_selectivity_uses_column_statistics()
+    test_histogram_and_mcv_selectivity()
+    test_plan_estimates_use_query_literals()
+    test_statistics_drive_join_order()
+    test_join_algorithm_follows_cost()
+    test_index_and_sort_merge_joins()
+    test_reordering_keeps_unqualified_filters()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_catalog_json_round_trip(pathlib.Path(tmp))
+    print("Todos os testes do modelo de custo passaram.")
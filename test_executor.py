@@ -0,0 +1,235 @@
+"""
+Testes do executor vetorizado (executor).
+"""
+import os
+import tempfile
+import tracemalloc
+from itertools import islice
+
+import numpy as np
+import pytest
+
+from conversor import RelationalAlgebraConverter
+from cost_model import CostModel
+from executor import Database, Executor, StreamingExecutor, ExecutionError, Table, equi_join_indices
+from optimizer import QueryOptimizer
+from plan_nodes import Scan, Rename, Select, Project, Join
+
+
+def _database():
+    db = Database()
+    db.add_table('Cliente', {
+        'id': [1, 2, 3, 4],
+        'nome': ['Ana', 'Rui', 'Bia', None],
+        'uf': ['SP', 'RJ', 'SP', 'MG'],
+    })
+    db.add_table('Pedidos', {
+        'id': [10, 11, 12, 13, 14, 15],
+        'cliente_id': [1, 1, 2, 3, None, 3],
+        'valor': [5.0, 50.0, 100.0, 20.0, 70.0, 900.0],
+    })
+    return db
+
+
+def _run(db, sql):
+    converter = RelationalAlgebraConverter(catalog=db.statistics(), schema=db.schema())
+    result = converter.process_query(sql)
+    assert result['valid'], result['error']
+    executor = Executor(db)
+    return executor.execute(result['tree']), executor.execute(result['optimized_tree'])
+
+
+def test_optimized_tree_returns_same_rows():
+    """A árvore otimizada produz as mesmas linhas que a original, com menos trabalho."""
+    db = _database()
+    original, optimized = _run(db, (
+        "SELECT c.nome, p.valor FROM Cliente c INNER JOIN Pedidos p ON c.id = p.cliente_id "
+        "WHERE p.valor > 10 AND c.uf = 'SP'"))
+    assert optimized.labels == original.labels == ['c.nome', 'p.valor']
+    assert sorted(optimized.rows()) == sorted(original.rows()) == [('Ana', 50.0), ('Bia', 20.0), ('Bia', 900.0)]
+    assert optimized.values_processed < original.values_processed
+    # Medidas em pré-ordem: a raiz vem primeiro
+    assert optimized.stats[0].op == 'π' and optimized.stats[0].rows == 3 and optimized.stats[0].depth == 0
+    assert 'total' in optimized.format_stats()
+
+
+def test_nulls_like_in_and_aggregates():
+    """NULL não casa em junções nem comparações; LIKE, IN e agregações são avaliados."""
+    db = _database()
+    _, result = _run(db, "SELECT nome FROM Cliente WHERE nome LIKE '%a' OR uf IN ('RJ')")
+    assert sorted(result.rows()) == [('Ana',), ('Bia',), ('Rui',)]
+    _, result = _run(db, "SELECT nome FROM Cliente WHERE nome NOT LIKE 'A%'")
+    assert sorted(result.rows()) == [('Bia',), ('Rui',)]
+
+    _, result = _run(db, "SELECT nome FROM Cliente WHERE nome IS NULL")
+    assert result.rows() == [(None,)]
+
+    _, result = _run(db, (
+        "SELECT COUNT(*), SUM(p.valor), MAX(p.valor) FROM Cliente c "
+        "INNER JOIN Pedidos p ON c.id = p.cliente_id"))
+    assert result.rows() == [(5, 1075.0, 900.0)]
+
+    # Junção sem igualdade: blocos do produto cartesiano
+    tree = Join('c.id > p.cliente_id', Rename('c', Scan('Cliente')),
+                Rename('p', Select('p.valor > 60', Scan('Pedidos'))))
+    result = Executor(_database(), nested_loop_block=2).execute(tree)
+    assert sorted(result.column('c.id').tolist()) == [3, 4, 4]
+
+
+def test_not_and_not_in_follow_three_valued_logic():
+    """NOT de um resultado desconhecido (NULL) continua desconhecido; NOT IN com NULL na lista não devolve linhas."""
+    db = _database()
+    queries = {
+        "SELECT id FROM Pedidos WHERE NOT (cliente_id = 1)": [(12,), (13,), (15,)],
+        "SELECT id FROM Pedidos WHERE cliente_id <> 1": [(12,), (13,), (15,)],
+        "SELECT id FROM Pedidos WHERE NOT (cliente_id = 1 OR valor > 50)": [(13,)],
+        "SELECT id FROM Pedidos WHERE cliente_id NOT IN (1, NULL)": [],
+        "SELECT id FROM Pedidos WHERE cliente_id IN (1, NULL)": [(10,), (11,)],
+        "SELECT id FROM Pedidos WHERE NOT (cliente_id NOT IN (1, NULL))": [(10,), (11,)],
+        "SELECT id FROM Pedidos WHERE cliente_id NOT IN (1, 2)": [(13,), (15,)],
+    }
+    for sql, expected in queries.items():
+        original, optimized = _run(db, sql)
+        assert sorted(original.rows()) == sorted(optimized.rows()) == expected, sql
+
+
+def test_equi_join_kernel_and_errors():
+    """O núcleo da junção expande chaves repetidas dos dois lados e aceita chaves compostas de texto."""
+    left, right = equi_join_indices([np.array([1, 2, 2, 5])], [np.array([2, 2, 5, 7, 2])])
+    pairs = sorted(zip(left.tolist(), right.tolist()))
+    assert pairs == [(1, 0), (1, 1), (1, 4), (2, 0), (2, 1), (2, 4), (3, 2)]
+
+    keys = np.array(['a', 'b', None], dtype=object)
+    left, right = equi_join_indices([keys, np.array([1, 2, 3])],
+                                    [np.array(['b', 'a', None], dtype=object), np.array([2, 2, 3])])
+    assert list(zip(left.tolist(), right.tolist())) == [(1, 0)]
+
+    db = Database([Table('t', {'x': np.arange(5)})])
+    tree = QueryOptimizer().optimize_tree(Select('x >= 3', Scan('t')))
+    assert Executor(db).execute(tree).column('t.x').tolist() == [3, 4]
+    with pytest.raises(ExecutionError):
+        Executor(db).execute(Scan('u'))
+    with pytest.raises(ExecutionError):
+        Executor(db).execute(Select('y = 1', Scan('t')))
+
+
+def test_streaming_matches_batch_execution():
+    """O modo por iteradores devolve as mesmas linhas para qualquer tamanho de lote, em lotes de até batch_size."""
+    db = _database()
+    converter = RelationalAlgebraConverter(catalog=db.statistics(), schema=db.schema())
+    queries = [
+        "SELECT c.nome, p.valor FROM Cliente c INNER JOIN Pedidos p ON c.id = p.cliente_id WHERE p.valor > 10",
+        "SELECT COUNT(*), AVG(valor), MIN(valor) FROM Pedidos WHERE valor > 10",
+        "SELECT nome FROM Cliente WHERE uf = 'RS'",
+        "SELECT c.nome FROM Cliente c INNER JOIN Pedidos p ON c.id > p.cliente_id",
+    ]
+    for sql in queries:
+        tree = converter.process_query(sql)['optimized_tree']
+        expected = Executor(db).execute(tree)
+        for batch_size in (1, 2, 100):
+            executor = StreamingExecutor(db, batch_size=batch_size)
+            batches = list(executor.iter_batches(tree))
+            assert all(batch.length <= batch_size for batch in batches)
+            result = executor.execute(tree)
+            assert result.labels == expected.labels
+            assert sorted(result.rows(), key=str) == sorted(expected.rows(), key=str), sql
+    # Medidas por operador, em pré-ordem, com o número de lotes entregues
+    assert [stat.op for stat in executor.stats][:2] == ['π', '⨝']
+    assert executor.stats[-1].batches == 1
+
+
+def test_streaming_memory_follows_batch_size():
+    """Um pipeline π(σ(tabela)) não materializa intermediários: o pico de memória acompanha o lote."""
+    rows = 1_000_000
+    db = Database([Table('t', {'x': np.arange(rows), 'y': np.arange(rows) % 10})])
+    tree = Project(['x', 'x * 2'], Select('y < 5', Scan('t')))
+
+    def peak(run):
+        tracemalloc.start()
+        try:
+            run()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def stream(batch_size):
+        def run():
+            total = sum(batch.length for batch in StreamingExecutor(db, batch_size).iter_batches(tree))
+            assert total == rows // 2
+        return run
+
+    small, large = peak(stream(2_000)), peak(stream(40_000))
+    materialized = peak(lambda: Executor(db).execute(tree))
+    assert small * 5 < large < materialized
+    assert list(islice(StreamingExecutor(db, 4).iter_rows(tree), 2)) == [(0, 0), (1, 2)]
+    with pytest.raises(ValueError):
+        StreamingExecutor(db, batch_size=0)
+
+
+def _join_database():
+    rng = np.random.default_rng(7)
+    keys = rng.integers(0, 2_000, 20_000).astype(float)
+    keys[::50] = np.nan
+    db = Database()
+    db.add_table('pedidos', {'id': np.arange(20_000), 'cliente_id': keys, 'valor': rng.uniform(0, 100, 20_000)})
+    db.add_table('cliente', {'id': np.arange(2_000), 'uf': np.array(['SP', 'RJ'] * 1_000, dtype=object)})
+    return db
+
+
+def test_grace_hash_join_spills_and_matches():
+    """Acima do orçamento a junção hash particiona em disco, recursivamente, e devolve as mesmas linhas."""
+    db = _join_database()
+    tree = Join('p.cliente_id = c.id AND p.valor > 50', Rename('p', Scan('pedidos')), Rename('c', Scan('cliente')),
+                'hash_join')
+    expected = sorted(Executor(db).execute(tree).rows())
+    with tempfile.TemporaryDirectory() as spill_dir:
+        for budget, depth in ((20_000, 1), (2_000, 2)):
+            executor = StreamingExecutor(db, batch_size=500, memory_budget=budget, spill_partitions=4,
+                                         spill_dir=spill_dir)
+            # Sem modelo de custo, a construção usa a direita (cliente, 32 KB)
+            result = executor.execute(tree)
+            assert sorted(result.rows()) == expected
+            spill = result.stats[0].spill
+            assert spill.depth >= depth and spill.partitions >= 4 * depth
+            assert result.spill_bytes == spill.spill_bytes > 0 and spill.spilled_rows >= 2_000
+            assert 'partições' in result.format_stats()
+            assert not os.listdir(spill_dir)
+
+        result = Executor(db, memory_budget=4_000, spill_partitions=4, spill_dir=spill_dir).execute(tree)
+        assert sorted(result.rows()) == expected and result.stats[0].spill.partitions
+        assert Executor(db).execute(tree).stats[0].spill is None
+
+        # Chave única repetida: não há como dividir, a partição é juntada acima do orçamento
+        skew = Join('p.cliente_id = c.id', Rename('p', Scan('pedidos')),
+                    Rename('c', Select('c.id = 3', Scan('cliente'))), 'hash_join')
+        executor = StreamingExecutor(db, memory_budget=100, spill_partitions=2, spill_dir=spill_dir)
+        result = executor.execute(Join(skew.condition, skew.right, skew.left, 'hash_join'))
+        assert result.row_count == Executor(db).execute(skew).row_count
+        assert result.stats[0].spill.oversized == 1
+
+
+def test_grace_hash_join_builds_on_smaller_estimate():
+    """Com o modelo de custo, a tabela de hash é montada com a entrada de menor tamanho estimado."""
+    db = _join_database()
+    tree = Join('c.id = p.cliente_id', Rename('c', Select("c.id < 10", Scan('cliente'))),
+                Rename('p', Scan('pedidos')), 'hash_join')
+    model = CostModel(db.statistics())
+    assert model.hash_build_side(tree) == 'left'
+    with tempfile.TemporaryDirectory() as spill_dir:
+        estimated = StreamingExecutor(db, memory_budget=50_000, model=model, spill_dir=spill_dir).execute(tree)
+        right = StreamingExecutor(db, memory_budget=50_000, spill_dir=spill_dir).execute(tree)
+    assert estimated.spill_bytes == 0 and right.spill_bytes > 0
+    assert sorted(estimated.rows()) == sorted(right.rows())
+    assert estimated.labels[0] == 'c.id'
+
+
+if __name__ == "__main__":
+    test_optimized_tree_returns_same_rows()
+    test_nulls_like_in_and_aggregates()
+    test_not_and_not_in_follow_three_valued_logic()
+    test_equi_join_kernel_and_errors()
+    test_streaming_matches_batch_execution()
+    test_streaming_memory_follows_batch_size()
+    test_grace_hash_join_spills_and_matches()
+    test_grace_hash_join_builds_on_smaller_estimate()
+    print("Todos os testes do executor passaram.")
@@ -0,0 +1,64 @@
+"""
+Testes da instrumentação por etapa do pipeline (instrumentation).
+"""
+import json
+
+from conversor import RelationalAlgebraConverter
+from instrumentation import Metrics
+
+SQL = ("SELECT c.nome FROM cliente c INNER JOIN pedidos p ON c.id = p.cliente_id "
+       "WHERE p.valor > {}")
+
+
+def test_result_carries_per_stage_metrics():
+    """Cada resultado traz tempo, nós e avaliações de regex das etapas que executou."""
+    converter = RelationalAlgebraConverter()
+    result = converter.process_query(SQL.format(500))
+    stages = result['metrics']['stages']
+    for name in ('fingerprint', 'parse', 'build_tree', 'optimize', 'bind'):
+        assert stages[name]['calls'] == 1 and stages[name]['elapsed'] >= 0
+    assert stages['fingerprint']['regex'] > 0
+    assert stages['build_tree']['nodes'] == result['tree'].node_count()
+    assert stages['optimize']['nodes'] == result['optimized_tree'].node_count()
+    assert any(name.startswith('rule:') for name in stages)
+    assert result['metrics']['total_elapsed'] > 0
+
+
+def test_aggregate_sums_requests_and_cache_hits_skip_stages():
+    """O agregado soma as requisições; a segunda forma igual não analisa nem otimiza de novo."""
+    converter = RelationalAlgebraConverter()
+    converter.process_query(SQL.format(500))
+    second = converter.process_query(SQL.format(700))
+    assert 'parse' not in second['metrics']['stages']
+    assert 'optimize' not in second['metrics']['stages']
+    assert second['metrics']['stages']['plan_cache_hit']['calls'] == 1
+
+    stages = converter.metrics.stages
+    assert stages['fingerprint'].calls == 2 and stages['bind'].calls == 2
+    assert stages['parse'].calls == 1 and stages['optimize'].calls == 1
+    # Inválidas também são medidas, e a validação entra no agregado
+    converter.process_query("SELECT FROM")
+    assert stages['fingerprint'].calls == 3 and stages['validate'].calls == 1
+
+
+def test_metrics_json_round_trip(tmp_path):
+    """A exportação em JSON preserva as etapas e os contadores."""
+    converter = RelationalAlgebraConverter()
+    converter.optimize_many([SQL.format(v) for v in (1, 2, 3)], workers=1)
+    path = tmp_path / "metricas.json"
+    converter.metrics.save_json(path)
+    data = json.loads(path.read_text(encoding='utf-8'))
+    assert data['stages']['fingerprint']['calls'] == 3
+    restored = Metrics.from_dict(data)
+    assert restored.to_dict() == converter.metrics.to_dict()
+    assert "fingerprint" in restored.format_summary()
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_result_carries_per_stage_metrics()
+    test_aggregate_sums_requests_and_cache_hits_skip_stages()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_metrics_json_round_trip(pathlib.Path(tmp))
+    print("Todos os testes de instrumentação passaram.")
@@ -0,0 +1,94 @@
+"""
+Testes da enumeração de junções por programação dinâmica (DPccp).
+"""
+from join_enumeration import csg_cmp_pairs
+from optimizer import QueryOptimizer
+from conversor import RelationalAlgebraConverter
+from stats_catalog import StatisticsCatalog
+
+# Pedido_has_Produto liga pedidos e produtos; as demais tabelas formam uma cadeia
+BRIDGE_QUERY = (
+    "SELECT c.nome, pr.descricao FROM cliente c "
+    "INNER JOIN pedido p ON p.cliente_id = c.id "
+    "INNER JOIN pedido_has_produto pp ON pp.pedido_id = p.id "
+    "INNER JOIN produto pr ON pp.produto_id = pr.id "
+    "INNER JOIN categoria cat ON pr.categoria_id = cat.id "
+    "INNER JOIN fornecedor f ON pr.fornecedor_id = f.id "
+    "INNER JOIN cidade ci ON c.cidade_id = ci.id "
+    "INNER JOIN estado e ON ci.estado_id = e.id "
+    "WHERE cat.nome = 'livros' AND e.sigla = 'SP'"
+)
+
+
+def _catalog():
+    return StatisticsCatalog({
+        'cliente': {'row_count': 100_000, 'columns': {'id': {'distinct': 100_000}}},
+        'pedido': {'row_count': 1_000_000, 'columns': {'cliente_id': {'distinct': 100_000}}},
+        'pedido_has_produto': {'row_count': 5_000_000, 'columns': {
+            'pedido_id': {'distinct': 1_000_000}, 'produto_id': {'distinct': 20_000}}},
+        'produto': {'row_count': 20_000, 'columns': {'id': {'distinct': 20_000}}},
+        'categoria': {'row_count': 200, 'columns': {'nome': {'distinct': 200}}},
+        'fornecedor': {'row_count': 500},
+        'cidade': {'row_count': 5_000, 'columns': {'estado_id': {'distinct': 27}}},
+        'estado': {'row_count': 27, 'columns': {'sigla': {'distinct': 27}}},
+    })
+
+
+def _chain(n):
+    neighbors = [0] * n
+    for i in range(n - 1):
+        neighbors[i] |= 1 << (i + 1)
+        neighbors[i + 1] |= 1 << i
+    return neighbors
+
+
+def test_csg_cmp_pairs_chain_and_bushy():
+    """Numa cadeia de n relações há (n³ - n) / 6 pares, incluindo divisões bushy."""
+    for n in range(2, 9):
+        pairs = csg_cmp_pairs(_chain(n), (1 << n) - 1)
+        assert len(pairs) == (n ** 3 - n) // 6
+        assert len({frozenset(p) for p in pairs}) == len(pairs)
+    pairs = {frozenset(p) for p in csg_cmp_pairs(_chain(4), 0b1111)}
+    assert frozenset((0b0011, 0b1100)) in pairs
+    # Relações não adjacentes nunca formam par (sem produto cartesiano)
+    assert frozenset((0b0001, 0b0100)) not in pairs
+
+
+def test_dynamic_programming_beats_greedy():
+    """Numa junção de 8 tabelas, o plano da programação dinâmica não custa mais que o guloso."""
+    converter = RelationalAlgebraConverter(catalog=_catalog())
+    _, dp_tree = converter.convert_to_optimized_tree(BRIDGE_QUERY)
+    dp_log = converter.get_optimization_log()
+
+    greedy = QueryOptimizer(_catalog(), max_dp_relations=4)
+    greedy_tree = greedy.optimize_tree(converter.convert_to_tree(BRIDGE_QUERY))
+    greedy_log = greedy.get_optimization_log()
+
+    assert "Programação dinâmica (DPccp, 8 relações" in dp_log
+    assert "Heurística gulosa (8 relações" in greedy_log
+    assert dp_tree.tables == greedy_tree.tables
+    cost = QueryOptimizer(_catalog()).cost_model.estimate
+    assert cost(dp_tree).cost <= cost(greedy_tree).cost
+
+
+def test_disconnected_relations_become_cross_product():
+    """Relações sem condição entre si são combinadas por produto cartesiano no topo."""
+    converter = RelationalAlgebraConverter()
+    _, optimized = converter.convert_to_optimized_tree(
+        "SELECT a.x FROM a INNER JOIN b ON a.id = b.a_id INNER JOIN c ON c.k > 1")
+    crosses = [n for n in _joins(optimized) if n.condition is None]
+    assert len(crosses) == 1 and len(_joins(optimized)) == 2
+
+
+def _joins(tree):
+    found = [tree] if hasattr(tree, 'algorithm') else []
+    for child in tree.children:
+        found.extend(_joins(child))
+    return found
+
+
+if __name__ == "__main__":
+    test_csg_cmp_pairs_chain_and_bushy()
+    test_dynamic_programming_beats_greedy()
+    test_disconnected_relations_become_cross_product()
+    print("Todos os testes da enumeração de junções passaram.")
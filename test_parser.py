@@ -0,0 +1,94 @@
+"""
+Testes do analisador léxico/sintático compartilhado (sql_parser).
+Verifica a AST produzida para consultas válidas e as mensagens de erro
+para consultas malformadas.
+"""
+
+from sql_parser import (
+    parse_sql, tokenize, SQLSyntaxError,
+    And, Or, Comparison, ColumnRef, Literal, InList, IsNull, parse_expression,
+)
+from predicates import split_conjuncts, conjoin
+
+
+def test_tokenize_handles_quotes_and_comments():
+    """Literais com aspas, ponto e vírgula e comentários não quebram a tokenização."""
+    tokens = tokenize("SELECT Nome FROM Cliente WHERE Nome = 'a;b''c' -- comentário\n")
+    kinds = [t.kind for t in tokens]
+    assert kinds == ['KEYWORD', 'IDENT', 'KEYWORD', 'IDENT', 'KEYWORD', 'IDENT', 'OP', 'STRING', 'EOF']
+    assert tokens[7].value == "a;b'c"
+
+
+def test_parse_joins_and_where():
+    """Consulta com JOINs, aliases e WHERE composta gera a AST esperada."""
+    stmt = parse_sql(
+        "SELECT c.Nome, p.Preco AS preco FROM Cliente c "
+        "INNER JOIN Pedido AS ped ON c.id = ped.cliente_id "
+        "JOIN Produto p ON ped.produto_id = p.id "
+        "WHERE p.Preco > 100 AND c.Nome = 'Ana';"
+    )
+    assert stmt.columns_text == "c.Nome, p.Preco AS preco"
+    assert (stmt.table.name, stmt.table.alias) == ('Cliente', 'c')
+    assert [(j.table.name, j.table.alias) for j in stmt.joins] == [('Pedido', 'ped'), ('Produto', 'p')]
+    assert isinstance(stmt.where, And)
+    first = stmt.where.terms[0]
+    assert isinstance(first, Comparison) and first.op == '>'
+    assert isinstance(first.left, ColumnRef) and first.left.table == 'p'
+    assert isinstance(first.right, Literal) and first.right.value == 100
+    assert str(stmt.where) == "p.Preco > 100 ∧ c.Nome = 'Ana'"
+
+
+def test_parse_boolean_precedence_and_predicates():
+    """AND tem precedência sobre OR; IN, IS NULL e expressões entre parênteses são aceitos."""
+    stmt = parse_sql(
+        "SELECT * FROM funcionarios WHERE (Salario > 5000 AND Depto = 'TI') OR Cargo = 'Gerente'"
+    )
+    assert isinstance(stmt.where, Or)
+    assert isinstance(stmt.where.terms[0], And)
+    assert str(stmt.where) == "(Salario > 5000 ∧ Depto = 'TI') OR Cargo = 'Gerente'"
+
+    stmt = parse_sql("SELECT * FROM t WHERE a IN (1, 2) AND b IS NOT NULL AND (a + 1) * 2 >= 4")
+    assert isinstance(stmt.where.terms[0], InList)
+    assert isinstance(stmt.where.terms[1], IsNull) and stmt.where.terms[1].negated
+    assert str(stmt.where.terms[2]) == "(a + 1) * 2 >= 4"
+
+
+def test_invalid_queries_raise_syntax_error():
+    """Consultas malformadas geram SQLSyntaxError com mensagem descritiva."""
+    invalid = [
+        ("SELECT Nome Email FROM Cliente", "vírgula"),
+        ("SELECT * FROM Cliente INNER JOIN Pedido", "ON"),
+        ("SELECT * FROM Cliente WHERE Nome = 'A' AND", "terminar"),
+        ("SELECT * FROM Cliente WHERE Preco > > 50", "duplicado"),
+        ("SELECT * FROM Cliente WHERE (Nome = 'A'", "Parênteses"),
+        ("SELECT * FROM Cliente WHERE Nome = 'A", "não terminado"),
+        ("SELECT * FROM Cliente WHERE a || b", "inesperado"),
+    ]
+    for query, fragment in invalid:
+        try:
+            parse_sql(query)
+        except SQLSyntaxError as e:
+            assert fragment.lower() in e.message.lower(), (query, e.message)
+        else:
+            raise AssertionError(f"Consulta deveria ser inválida: {query}")
+
+
+def test_predicate_trees_cache_references():
+    """Predicados guardam relações/colunas referenciadas e só separam conjunções de nível superior."""
+    where = parse_sql("SELECT a FROM t x WHERE x.a = 1 AND (x.b = 2 OR y.c = 'z') AND y.d > x.e").where
+    terms = split_conjuncts(where)
+    assert len(terms) == 3
+    assert terms[1].tables == {'x', 'y'} and terms[2].tables == {'y', 'x'}
+    assert {str(c) for c in where.columns} == {'x.a', 'x.b', 'y.c', 'y.d', 'x.e'}
+    # Igualdade estrutural e ida e volta pelo texto exibido (com ∧)
+    assert parse_expression(str(where)) == where
+    assert conjoin(terms) == where and conjoin([]) is None
+
+
+if __name__ == "__main__":
+    test_tokenize_handles_quotes_and_comments()
+    test_parse_joins_and_where()
+    test_parse_boolean_precedence_and_predicates()
+    test_invalid_queries_raise_syntax_error()
+    test_predicate_trees_cache_references()
+    print("Todos os testes do parser passaram.")
@@ -0,0 +1,84 @@
+"""
+Testes do plano físico (physical_plan).
+"""
+import pytest
+
+from conversor import RelationalAlgebraConverter
+from cost_model import CostModel
+from physical_plan import (
+    build_physical_plan, SeqScan, IndexScan, Filter, Project, HashJoin, MergeJoin, NestedLoopJoin,
+)
+from plan_nodes import Scan, Rename, Select, Join
+from stats_catalog import StatisticsCatalog
+
+
+def _catalog():
+    return StatisticsCatalog({
+        'cliente': {'row_count': 10_000, 'primary_key': ['id'], 'columns': {
+            'id': {'distinct': 10_000}, 'uf': {'distinct': 27}}},
+        'pedidos': {'row_count': 1_000_000, 'indexes': [['cliente_id']], 'columns': {
+            'cliente_id': {'distinct': 10_000},
+            'valor': {'distinct': 5_000, 'min': 0, 'max': 1000},
+        }},
+    })
+
+
+def test_operators_carry_logical_estimates():
+    """Cada operador traz linhas, largura e custo acumulado iguais aos do modelo de custo."""
+    model = CostModel(_catalog())
+    cliente = Rename('c', Select("c.uf = 'SP'", Scan('cliente')))
+    tree = Join('c.id = p.cliente_id', cliente, Rename('p', Scan('pedidos')), 'hash_join')
+    plan = build_physical_plan(tree, model)
+
+    assert isinstance(plan.root, HashJoin) and plan.root.build_side == 'left'
+    scan, filtered, pedidos, join = plan.operators()
+    assert isinstance(scan, SeqScan) and scan.alias == 'c' and isinstance(filtered, Filter)
+    assert (pedidos.table, pedidos.alias) == ('pedidos', 'p')
+    estimate = model.estimate(tree)
+    assert (join.rows, join.width, join.cost) == (estimate.rows, estimate.row_bytes, estimate.cost)
+    assert pedidos.cost < join.cost
+    # ρ e a tabela base apontam para a leitura que os absorveu
+    assert plan.operator_for(cliente) is filtered
+    assert plan.operator_for(tree.right) is plan.operator_for(Scan('pedidos')) is pedidos
+    assert plan.cost == pytest.approx(estimate.cost)
+
+
+def test_index_scan_and_index_nested_loop():
+    """Seleção por índice vira IndexScan; o nested loop com índice busca a interna a cada linha externa."""
+    model = CostModel(_catalog())
+    cliente = Rename('c', Select('c.id = 7', Scan('cliente')))
+    tree = Join('c.id = p.cliente_id', cliente, Rename('p', Select('p.valor > 900', Scan('pedidos'))))
+    tree = tree.with_algorithm(model.best_join_algorithm(tree)[0])
+    plan = build_physical_plan(tree, model)
+
+    assert isinstance(plan.root, NestedLoopJoin) and plan.root.index
+    outer, inner = plan.root.children
+    assert isinstance(outer, IndexScan) and outer.alias == 'c' and outer.rows == 1
+    assert isinstance(inner, Filter) and inner.loops == outer.rows
+    probe = inner.children[0]
+    assert isinstance(probe, IndexScan) and probe.index_condition == 'p.cliente_id = c.id'
+    assert plan.root.cost == pytest.approx(model.estimate(tree).cost)
+    assert 'IndexScan (pedidos AS p; índice: p.cliente_id = c.id)' in plan.explain()
+
+
+def test_compare_plans_by_cost():
+    """O plano otimizado custa menos que o original, e o sort-merge indica os lados ordenados."""
+    converter = RelationalAlgebraConverter(catalog=_catalog())
+    result = converter.process_query(
+        "SELECT c.nome FROM cliente c INNER JOIN pedidos p ON c.id = p.cliente_id WHERE p.valor > 900")
+    optimized = converter.physical_plan(result['optimized_tree'])
+    original = converter.physical_plan(result['tree'])
+    assert isinstance(optimized.root, Project)
+    assert optimized.cost < original.cost
+
+    tree = Join('c.id = p.cliente_id', Rename('c', Scan('cliente')), Rename('p', Scan('pedidos')), 'sort_merge')
+    merge = build_physical_plan(tree, CostModel(_catalog())).root
+    assert isinstance(merge, MergeJoin) and merge.sorts == ('right',)
+    assert merge.detail() == 'c.id = p.cliente_id; ordena: direita'
+
+
+if __name__ == "__main__":
+    test_operators_carry_logical_estimates()
+    test_index_scan_and_index_nested_loop()
+    test_compare_plans_by_cost()
+    print("Todos os testes do plano físico passaram.")
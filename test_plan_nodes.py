@@ -0,0 +1,77 @@
+"""
+Testes dos nós tipados do plano lógico (plan_nodes).
+"""
+import pickle
+
+from plan_nodes import Scan, Rename, Select, Project, Join, from_tuple
+from relation_sets import RelationBits, is_subset
+
+
+def _sample_tree():
+    left = Rename('c', Scan('Cliente'))
+    right = Rename('p', Select('p.valor > 500', Scan('Pedido')))
+    return Project(['c.nome', 'p.valor'], Join('c.id = p.cliente_id', left, right, 'hash_join'))
+
+
+def test_structural_equality_and_hash():
+    """Árvores construídas separadamente com a mesma estrutura são iguais e têm o mesmo hash."""
+    a, b = _sample_tree(), _sample_tree()
+    assert a is not b and a == b and hash(a) == hash(b)
+    assert len({a, b}) == 1
+    assert a != a.child.with_algorithm('nested_loop')
+
+
+def test_cached_tables_and_columns():
+    """Tabelas e colunas da subárvore ficam disponíveis sem percorrer a árvore."""
+    tree = _sample_tree()
+    assert tree.tables == {'Cliente', 'c', 'Pedido', 'p'}
+    assert tree.child.right.tables == {'Pedido', 'p'}
+    assert tree.columns == {'c.nome', 'p.valor', 'c.id', 'p.cliente_id'}
+    assert tree.node_count() == 7
+
+
+def test_nodes_are_immutable_and_picklable():
+    """Nós não aceitam atribuição e sobrevivem a pickle (usado em pools de processos)."""
+    tree = _sample_tree()
+    try:
+        tree.child = Scan('X')
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("Nó deveria ser imutável")
+    assert pickle.loads(pickle.dumps(tree)) == tree
+
+
+def test_relation_bits_are_scoped_to_the_query():
+    """Os bits vêm das relações da consulta: máscaras coerentes com os conjuntos de nomes, sem estado global."""
+    tree = _sample_tree()
+    join = tree.child
+    bits = RelationBits.of(tree)
+    mask = bits.mask
+    assert len(bits) == 4 and mask(tree.tables) == (1 << 4) - 1
+    assert mask(tree.tables) == mask(join.left.tables) | mask(join.right.tables)
+    assert is_subset(mask(join.condition.tables), mask(join.tables))
+    assert not is_subset(mask(join.condition.tables), mask(join.left.tables))
+    assert mask(join.right.child.condition.tables) & mask(join.right.tables)
+
+    # Outra consulta começa do bit 0, sem herdar nomes; maiúsculas não contam
+    other = RelationBits.of(Rename('x', Scan('cliente')))
+    assert len(other) == 2 and other.bit('CLIENTE') == other.bit('Cliente') == other.bit('cliente')
+    assert other.mask(frozenset({'X', 'cliente'})) == 0b11
+
+
+def test_tuple_round_trip():
+    """O formato legado em tuplas é convertido nos dois sentidos, inclusive o join anotado."""
+    tree = _sample_tree()
+    legacy = tree.to_tuple()
+    assert legacy[0] == 'π' and legacy[2][4] == 'hash_join'
+    assert from_tuple(legacy) == tree
+
+
+if __name__ == "__main__":
+    test_structural_equality_and_hash()
+    test_cached_tables_and_columns()
+    test_nodes_are_immutable_and_picklable()
+    test_relation_bits_are_scoped_to_the_query()
+    test_tuple_round_trip()
+    print("Todos os testes dos nós do plano passaram.")
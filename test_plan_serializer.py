@@ -0,0 +1,102 @@
+"""
+Testes da serialização binária de planos (plan_serializer).
+"""
+import os
+import tempfile
+
+import pytest
+
+from conversor import RelationalAlgebraConverter
+from plan_nodes import Scan, Rename, Select, Project, Join, Empty, from_tuple
+from plan_serializer import dump_plan, load_plan, dump_cache_entries, load_cache_entries, FORMAT_VERSION
+from sql_parser import Parameter, Comparison, ColumnRef
+
+
+def test_round_trip_every_node_and_expression_type():
+    """Todos os tipos de nó e de expressão (inclusive o join anotado) sobrevivem à ida e volta."""
+    left = Rename('c', Select("c.nome LIKE 'A%' AND NOT (c.uf IN ('SP', 'RJ')) AND c.email IS NOT NULL",
+                              Scan('Cliente')))
+    right = Rename('p', Select("p.valor * 1.5 >= -20 OR UPPER(p.status) = NULL", Scan('Pedido')))
+    joined = Join('c.id = p.cliente_id', left, right, 'hash_join')
+    cross = Join(None, joined, Select(Comparison('>', ColumnRef('e', 'x'), Parameter(1)), Scan('Estoque')))
+    tree = Project(['c.nome AS nome', 'p.*', 'COUNT(*)'], cross)
+
+    data = dump_plan(tree)
+    restored = load_plan(data)
+    assert restored == tree and restored.to_tuple() == tree.to_tuple()
+    assert restored.child.left.algorithm == 'hash_join' and restored.child.condition is None
+    # A tabela de strings guarda cada nome uma única vez
+    assert data.count(b'Cliente') == 1 and len(data) < len(repr(tree.to_tuple()).encode('utf-8'))
+    # Relação vazia deixada por um filtro contraditório
+    empty = Project(['d.valor'], Empty(['d', 'Desconto']))
+    assert load_plan(dump_plan(empty)) == empty and from_tuple(empty.to_tuple()) == empty
+
+
+def test_rejects_unknown_format_version():
+    """Arquivos de outra versão do formato são recusados com erro claro."""
+    data = bytearray(dump_plan(Scan('Cliente')))
+    data[4] = FORMAT_VERSION + 1
+    try:
+        load_plan(bytes(data))
+    except ValueError as e:
+        assert "versão" in str(e).lower()
+    else:
+        raise AssertionError("Versão desconhecida deveria ser recusada")
+
+
+def test_rejects_truncated_or_padded_data():
+    """Arquivo cortado no meio (gravação interrompida) ou com bytes sobrando é recusado com ValueError."""
+    converter = RelationalAlgebraConverter()
+    converter.convert_to_optimized_tree(
+        "SELECT c.nome FROM cliente c INNER JOIN pedidos p ON c.id = p.cliente_id "
+        "WHERE p.valor > 2.5 AND c.nome LIKE 'Jo%'")
+    data = dump_cache_entries(converter.plan_cache.items())
+    for size in range(len(data)):
+        with pytest.raises(ValueError):
+            load_cache_entries(data[:size])
+    with pytest.raises(ValueError):
+        load_cache_entries(data + b'\x00')
+    with pytest.raises(ValueError):
+        load_plan(dump_plan(Scan('Cliente'))[:-1])
+
+    fd, path = tempfile.mkstemp(suffix='.plans')
+    os.close(fd)
+    try:
+        with open(path, 'wb') as f:
+            f.write(data[:len(data) // 2])
+        with pytest.raises(ValueError):
+            RelationalAlgebraConverter().load_plan_cache(path)
+    finally:
+        os.remove(path)
+
+
+def test_plan_cache_warms_from_disk():
+    """Um novo conversor carrega o cache gravado e não volta a analisar nem otimizar."""
+    query = ("SELECT c.nome, p.valor FROM cliente c INNER JOIN pedidos p "
+             "ON c.id = p.cliente_id WHERE p.valor > {}")
+    first = RelationalAlgebraConverter()
+    expected = first.convert_to_optimized_tree(query.format(500))
+    expected_log = first.get_optimization_log()
+
+    fd, path = tempfile.mkstemp(suffix='.plans')
+    os.close(fd)
+    try:
+        assert first.save_plan_cache(path) == 1
+        second = RelationalAlgebraConverter()
+        assert second.load_plan_cache(path) == 1
+        second.optimizer.optimize_tree = None  # falharia se a otimização fosse refeita
+        assert second.convert_to_optimized_tree(query.format(500)) == expected
+        assert second.get_optimization_log() == expected_log
+        assert second.convert(query.format(750)).endswith("σ (p.valor > 750) ((ρ_c(cliente) ⨝ "
+                                                          "(c.id = p.cliente_id) ρ_p(pedidos))))")
+        assert second.get_cache_stats()['misses'] == 0
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    test_round_trip_every_node_and_expression_type()
+    test_rejects_unknown_format_version()
+    test_rejects_truncated_or_padded_data()
+    test_plan_cache_warms_from_disk()
+    print("Todos os testes de serialização passaram.")
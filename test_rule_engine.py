@@ -0,0 +1,69 @@
+"""
+Testes do motor de regras do otimizador (rule_engine).
+"""
+from types import SimpleNamespace
+
+from conversor import RelationalAlgebraConverter
+from optimizer import QueryOptimizer
+from plan_nodes import Scan, Select
+from rule_engine import Rule, RuleEngine
+
+SQL = ("SELECT c.nome FROM cliente c INNER JOIN pedidos p ON c.id = p.cliente_id "
+       "WHERE 1 = 1 AND p.valor > 500")
+
+
+def _drop_trivial(tree, optimizer):
+    """Remove seleções `1 = 1` (regra de exemplo)."""
+    if isinstance(tree, Select) and str(tree.condition) == "1 = 1":
+        return _drop_trivial(tree.child, optimizer)
+    return tree.with_children(*[_drop_trivial(c, optimizer) for c in tree.children]) if tree.children else tree
+
+
+def test_registered_rule_fires_and_is_traced():
+    """Uma regra registrada participa do ponto fixo e aparece no rastro com nós e tempo."""
+    optimizer = QueryOptimizer()
+    optimizer.register_rule(Rule('drop_trivial', "Remoção de filtros triviais", apply=_drop_trivial),
+                            after='selection_pushdown')
+    assert [r.name for r in optimizer.rules][:3] == ['selection_pushdown', 'drop_trivial', 'projection_pushdown']
+
+    tree = RelationalAlgebraConverter().convert_to_tree(SQL)
+    optimized = optimizer.optimize_tree(tree)
+    assert "1 = 1" not in optimized.to_algebra()
+
+    trace = optimizer.get_rule_trace()
+    fired = [f for f in trace if f.rule == 'drop_trivial' and f.changed]
+    assert len(fired) == 1 and fired[0].nodes_after < fired[0].nodes_before
+    assert all(f.elapsed >= 0 for f in trace)
+    # A última passada não muda nada: é ela que confirma o ponto fixo
+    last = max(f.iteration for f in trace)
+    assert not any(f.changed for f in trace if f.iteration == last)
+    summary = {entry['rule']: entry for entry in optimizer.engine.summary()}
+    assert summary['drop_trivial']['fired'] == 1 and summary['projection_pushdown']['fired'] == 1
+    assert "[HEURÍSTICA 2] Remoção de filtros triviais:" in optimizer.get_optimization_log()
+
+
+def test_iteration_budget_stops_oscillating_rules():
+    """Regras que nunca convergem param no limite de iterações, com aviso no log."""
+    flip = Rule('flip', apply=lambda tree, _: Scan('b' if tree.table == 'a' else 'a'))
+    engine = RuleEngine([flip], max_iterations=3)
+    context = SimpleNamespace(optimization_log=[])
+    assert engine.run(Scan('a'), context) == Scan('b')
+    assert engine.iterations == 3 and len(engine.trace) == 3
+    assert "Limite de 3 iterações" in context.optimization_log[-1]
+
+
+def test_join_rules_skip_when_already_annotated():
+    """Reotimizar uma árvore já otimizada não reexecuta a enumeração de junções."""
+    converter = RelationalAlgebraConverter()
+    _, optimized = converter.convert_to_optimized_tree(SQL)
+    optimizer = QueryOptimizer()
+    assert optimizer.optimize_tree(optimized) == optimized
+    matched = {f.rule: f.matched for f in optimizer.get_rule_trace()}
+    assert matched['join_reordering'] is False and matched['join_algorithms'] is False
+
+
+if __name__ == "__main__":
+    test_registered_rule_fires_and_is_traced()
+    test_iteration_budget_stops_oscillating_rules()
+    test_join_rules_skip_when_already_annotated()
+    print("Todos os testes do motor de regras passaram.")